@@ -4,21 +4,373 @@ This module automates the Packer plugin build and installation process,
 ensuring reproducible builds without -dev suffixes and proper plugin installation.
 """
 
+import asyncio
+import contextlib
+import contextvars
+import hashlib
 import json
+import os
+import posixpath
 import re
+import shlex
+import shutil
+import sys
+import tempfile
 import time
-from typing import Annotated, Optional
+import urllib.request
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import cached_property, partial
+from typing import Annotated, Awaitable, Callable, Optional
 
 import dagger
 from dagger import dag, function, object_type, Doc
 
 
-# Default Go version when no .go-version file and no explicit --go-version
+# Default Go version when there is no explicit --go-version, .go-version file or go.mod go directive
 DEFAULT_GO_VERSION = "1.21"
 
 
-# Storage for normalization warnings to be included in output
-_normalization_warnings: list[str] = []
+# Environment variable carrying the content-addressed build key through the
+# build and install containers
+BUILD_KEY_ENV = "PACKER_PLUGIN_BUILD_KEY"
+
+
+# Environment variable recording the plugin version in the build container,
+# used by native installs to name the binary without running packer
+PLUGIN_VERSION_ENV = "PACKER_PLUGIN_VERSION"
+
+
+# Plugin API (protocol) version embedded in installed binary names
+DEFAULT_PLUGIN_API_VERSION = "x5.0"
+
+
+# Supported install modes: `packer plugins install` or the module's native install
+INSTALL_MODES = ("packer", "native")
+
+
+# Build profiles: compiler/linker presets selected with --profile
+BUILD_PROFILES = ("default", "dev", "release")
+
+
+# Profile-guided optimization profile picked up by `go build -pgo=auto`
+PGO_PROFILE_FILE = "default.pgo"
+
+
+# Read size for streaming file hashes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# Lockfile in the source root that pins base image tags to digests
+IMAGE_LOCK_FILE = "packer-plugin-images.lock.json"
+
+
+# Environment variable recording the output binary name in the build container
+PLUGIN_BINARY_ENV = "PACKER_PLUGIN_BINARY"
+
+# describe output written by the build exec of a binary built for the engine's
+# platform, so its API version is read without running another container
+PLUGIN_DESCRIPTION_PATH = "/work/.packer-plugin-describe.json"
+
+
+# Default number of plugins built at once by build_many
+DEFAULT_BATCH_CONCURRENCY = 4
+
+
+# Per-plugin status report written to the root of the build_many output
+BATCH_REPORT_FILE = "build-report.json"
+
+
+# `go build` flags and ldflags that remove every source of nondeterminism:
+# no absolute paths, no VCS stamping and an empty build ID
+REPRODUCIBLE_BUILD_FLAGS = ["-trimpath", "-buildvcs=false"]
+REPRODUCIBLE_LDFLAGS = ["-buildid="]
+
+
+# Trace file written to the output directory when tracing is enabled
+TRACE_FILE = "trace.json"
+
+
+# Manifest recording the inputs of the artifacts in an output directory
+BUILD_MANIFEST_FILE = "build-manifest.json"
+
+
+# Stages finishing faster than this are reported as (estimated) cache hits
+CACHE_HIT_THRESHOLD_SECONDS = 1.0
+
+
+# Index of the module caches, build caches and artifacts in a portable cache
+PORTABLE_CACHE_INDEX = "cache-index.json"
+
+
+# Path inside the OCI image that carries a published portable cache
+PORTABLE_CACHE_IMAGE_PATH = "/cache"
+
+
+# Packer commands run per template by validate_templates (build is opt-in)
+TEMPLATE_PHASES = ("init", "validate")
+
+
+# Release metadata written by package_release next to the archives
+RELEASE_MANIFEST_FILE = "manifest.json"
+
+
+# Version used by dev_install when neither --version nor a VERSION file is given
+DEFAULT_DEV_VERSION = "0.0.0-dev"
+
+
+# Default number of parallel go test containers
+DEFAULT_TEST_SHARDS = 4
+
+
+# Merged `go test -json` events and the per-package summary written by test_plugin
+TEST_OUTPUT_FILE = "test-output.json"
+TEST_REPORT_FILE = "test-report.json"
+
+
+# Go module and build cache locations inside the golang image
+GO_MOD_CACHE_PATH = "/go/pkg/mod"
+GO_BUILD_CACHE_PATH = "/root/.cache/go-build"
+
+
+# GOOS and GOARCH values accepted for cross-compilation (go tool dist list)
+KNOWN_GOOS = (
+    "aix", "android", "darwin", "dragonfly", "freebsd", "illumos", "ios", "js",
+    "linux", "netbsd", "openbsd", "plan9", "solaris", "wasip1", "windows",
+)
+KNOWN_GOARCH = (
+    "386", "amd64", "arm", "arm64", "loong64", "mips", "mips64", "mips64le",
+    "mipsle", "ppc64", "ppc64le", "riscv64", "s390x", "wasm",
+)
+
+
+class PluginValidationError(Exception):
+    """Invalid inputs, raised before any container is started.
+    
+    Every problem found by one call is collected, so they can all be fixed
+    at once instead of one failed build at a time.
+    
+    Attributes:
+        problems: Descriptions of the invalid inputs
+    """
+    
+    def __init__(self, problems: list[str]) -> None:
+        self.problems = list(problems)
+        super().__init__("\n".join(f"✗ Error: {problem}" for problem in self.problems))
+
+
+def _raise_for_problems(problems: list[str]) -> None:
+    """Raise a PluginValidationError if any problems were found."""
+    if problems:
+        raise PluginValidationError(problems)
+
+
+class _Diagnostics:
+    """Collects info and warning messages for a single function call.
+    
+    Messages are surfaced through the function log once the call has been
+    resolved, instead of as container exec steps, so the build and install
+    layers never depend on message text.
+    """
+    
+    def __init__(self) -> None:
+        self.messages: list[dict[str, str]] = []
+    
+    def info(self, message: str) -> None:
+        """Record an informational message (e.g., auto-detected values)."""
+        self._add("info", message)
+    
+    def warning(self, message: str) -> None:
+        """Record a warning message (e.g., normalized input)."""
+        self._add("warning", message)
+    
+    def _add(self, level: str, message: str) -> None:
+        entry = {"level": level, "message": message}
+        if entry not in self.messages:
+            self.messages.append(entry)
+    
+    def warnings(self) -> list[str]:
+        """Return the recorded warning messages."""
+        return [entry["message"] for entry in self.messages if entry["level"] == "warning"]
+    
+    def emit(self) -> None:
+        """Write all recorded messages to the function log."""
+        for entry in self.messages:
+            print(entry["message"], file=sys.stderr)
+
+
+# Span ID of the innermost open span in the current task, used as parent
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("_current_span", default=None)
+
+
+class _Tracer:
+    """Records timing spans for a single function call.
+    
+    Dagger evaluates pipelines lazily, so each container stage is forced with
+    `sync()` inside its span to attribute time to it. When tracing is
+    disabled, spans are not recorded and stages are returned unevaluated, so
+    the pipeline runs exactly as without instrumentation.
+    
+    Spans are exported as OTLP/JSON (OpenTelemetry protocol JSON encoding).
+    Whether a stage was served from the Dagger cache is not exposed to the
+    SDK; it is estimated from the stage duration.
+    """
+    
+    def __init__(self, enabled: bool = False, service: str = "dagger-packer-plugin") -> None:
+        self.enabled = enabled
+        self.service = service
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[dict] = []
+    
+    def start(self, name: str, **attributes) -> Optional[dict]:
+        """Open a leaf span under the current span; close it with end()."""
+        if not self.enabled:
+            return None
+        span = {
+            "name": name,
+            "span_id": os.urandom(8).hex(),
+            "parent_id": _current_span.get(),
+            "start": time.time_ns(),
+            "end": None,
+            "attributes": dict(attributes),
+            "error": None,
+        }
+        self.spans.append(span)
+        return span
+    
+    def end(self, span: Optional[dict], error: Optional[str] = None, **attributes) -> None:
+        """Close a span opened with start()."""
+        if span is None:
+            return
+        span["end"] = time.time_ns()
+        span["attributes"].update(attributes)
+        span["error"] = error
+    
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        """Record a span that becomes the parent of spans opened inside it."""
+        span = self.start(name, **attributes)
+        token = _current_span.set(span["span_id"]) if span else None
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, error=str(e) or type(e).__name__)
+            raise
+        else:
+            self.end(span)
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+    
+    async def stage(self, name: str, container: dagger.Container, **attributes) -> dagger.Container:
+        """Evaluate a container stage inside a span with a cache hit estimate."""
+        if not self.enabled:
+            return container
+        with self.span(name, **attributes) as span:
+            container = await container.sync()
+        seconds = (span["end"] - span["start"]) / 1e9
+        span["attributes"]["cache.hit"] = seconds < CACHE_HIT_THRESHOLD_SECONDS
+        span["attributes"]["cache.hit.estimated"] = True
+        return container
+    
+    def to_otlp(self) -> dict:
+        """Export finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service})},
+                "scopeSpans": [{
+                    "scope": {"name": self.service},
+                    "spans": [_otlp_span(self.trace_id, span) for span in self.spans if span["end"]],
+                }],
+            }],
+        }
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    """Encode span attributes as OTLP/JSON key-value pairs."""
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+def _otlp_span(trace_id: str, span: dict) -> dict:
+    """Encode a recorded span in the OTLP/JSON span format."""
+    encoded = {
+        "traceId": trace_id,
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span["start"]),
+        "endTimeUnixNano": str(span["end"]),
+        "attributes": _otlp_attributes(span["attributes"]),
+        # STATUS_CODE_OK / STATUS_CODE_ERROR
+        "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+    }
+    if span["parent_id"]:
+        encoded["parentSpanId"] = span["parent_id"]
+    return encoded
+
+
+async def _finish_trace(tracer: _Tracer, otlp_endpoint: Optional[str], diagnostics: _Diagnostics) -> str:
+    """Export the recorded spans to the collector (if any) and serialize them.
+    
+    Args:
+        tracer: Tracer of the function call
+        otlp_endpoint: Optional OTLP/HTTP collector base URL
+        diagnostics: Diagnostics receiving export failures
+        
+    Returns:
+        OTLP/JSON trace document
+    """
+    payload = tracer.to_otlp()
+    if otlp_endpoint:
+        error = await _export_otlp(payload, otlp_endpoint)
+        if error:
+            diagnostics.warning(f"⚠ Warning: {error}")
+        else:
+            diagnostics.info(f"ℹ Exported {len(tracer.spans)} spans to {otlp_endpoint}")
+    return json.dumps(payload, indent=2) + "\n"
+
+
+async def _export_otlp(payload: dict, endpoint: str) -> Optional[str]:
+    """POST an OTLP/JSON payload to a collector's /v1/traces endpoint.
+    
+    Args:
+        payload: OTLP/JSON trace export request
+        endpoint: Collector base URL (e.g., http://localhost:4318)
+        
+    Returns:
+        Error message if the export failed, None otherwise
+    """
+    url = endpoint.rstrip("/")
+    if not url.endswith("/v1/traces"):
+        url += "/v1/traces"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    
+    def send() -> None:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+    
+    try:
+        await asyncio.to_thread(send)
+    except (OSError, ValueError) as e:
+        return f"could not export trace to {url}: {e}"
+    return None
 
 
 def _normalize_to_lowercase(value: str) -> tuple[str, bool]:
@@ -81,405 +433,3437 @@ def _strip_plugin_prefix_from_source(git_source: str) -> str:
     return git_source
 
 
-async def _detect_go_version(source: dagger.Directory) -> Optional[str]:
-    """Detect Go version from .go-version file in source directory.
+def _plugin_name_from_dirname(dirname: str) -> tuple[str, bool]:
+    """Extract plugin name from a directory or repository name, normalized to lowercase.
     
     Args:
-        source: Plugin source directory to check for .go-version file
+        dirname: Directory name to parse
         
     Returns:
-        Go version string if .go-version file exists and is valid, None otherwise
+        Tuple of (plugin_name, was_normalized) where plugin_name is lowercase
+        and was_normalized indicates if the original contained uppercase
     """
-    try:
-        content = await source.file(".go-version").contents()
-        version = content.strip()
-        if version:
-            return version
-        return None
-    except Exception:
-        # File doesn't exist or can't be read
-        return None
+    # Strip packer-plugin- prefix if present (case-insensitive check)
+    dirname_lower = dirname.lower()
+    if dirname_lower.startswith("packer-plugin-"):
+        name = dirname[14:]  # len("packer-plugin-") == 14
+    else:
+        name = dirname
+    
+    # Normalize to lowercase
+    normalized, was_changed = _normalize_to_lowercase(name)
+    return normalized, was_changed
 
 
-async def _detect_git_source_from_gomod(source: dagger.Directory) -> tuple[Optional[str], Optional[str]]:
-    """Detect git source from go.mod module declaration.
+def _installed_binary_name(
+    plugin_name: str,
+    version: str,
+    api_version: str,
+    target_os: str,
+    target_arch: str,
+) -> str:
+    """Build the versioned binary name used by `packer plugins install`.
+    
+    Example: packer-plugin-docker_v1.0.10_x5.0_linux_amd64
     
     Args:
-        source: Plugin source directory to check for go.mod file
+        plugin_name: Plugin name (without packer-plugin- prefix)
+        version: Plugin version (without v prefix)
+        api_version: Plugin API version (e.g., x5.0)
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
         
     Returns:
-        Tuple of (module_path, error_message)
-        - (module_path, None) on success
-        - (None, error_message) on failure
+        Installed binary file name (with .exe on Windows)
     """
-    try:
-        go_mod_content = await source.file("go.mod").contents()
-        module_match = re.search(r'^module\s+(\S+)', go_mod_content, re.MULTILINE)
-        if module_match:
-            return module_match.group(1), None
-        return None, "no module declaration found"
-    except Exception:
-        return None, "file not found"
+    name = f"packer-plugin-{plugin_name}_v{version}_{api_version}_{target_os}_{target_arch}"
+    if target_os == "windows":
+        name += ".exe"
+    return name
 
 
-async def _resolve_git_source(
-    source: dagger.Directory,
-    explicit_git_source: Optional[str],
-) -> tuple[str, str, Optional[str]]:
-    """Resolve the git source to use based on priority.
+def _sha256_path(path: str) -> str:
+    """Compute the SHA256 of a local file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _sha256_file(file: dagger.File) -> str:
+    """Compute the SHA256 of a Dagger file inside the module runtime.
     
-    Priority order:
-    1. Explicit --git-source parameter (if provided)
-    2. Auto-detected from go.mod module path
-    3. Error (cannot proceed without git_source)
+    The file is exported to a scratch directory and hashed with streaming,
+    chunked reads, so large binaries are never loaded into memory at once.
     
     Args:
-        source: Plugin source directory
-        explicit_git_source: Explicitly provided git_source (None means use auto-detection)
+        file: File to hash
         
     Returns:
-        Tuple of (resolved_value, source_description, error_message)
-        - (value, "explicit", None) if explicit value provided
-        - (value, "gomod", None) if auto-detected from go.mod
-        - ("", "error", error_message) if cannot be determined
+        Hex-encoded SHA256 digest
     """
-    # If explicit git_source provided, use it
-    if explicit_git_source is not None:
-        return explicit_git_source, "explicit", None
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "artifact")
+        await file.export(path)
+        return await asyncio.to_thread(_sha256_path, path)
+
+
+# Installed binary names: packer-plugin-{name}_v{version}_{api}_{os}_{arch}[.exe]
+_INSTALLED_BINARY_PATTERN = re.compile(
+    r"^packer-plugin-(?P<name>[a-z0-9._-]+?)_v(?P<version>[^_]+)_(?P<api>x\d+\.\d+)"
+    r"_(?P<os>[a-z0-9]+)_(?P<arch>[a-z0-9]+)(?:\.exe)?$"
+)
+
+
+def _parse_installed_binary_name(name: str) -> Optional[dict]:
+    """Split an installed binary name into its plugin name, version, API version and platform.
     
-    # Try to detect from go.mod file
-    detected, error_msg = await _detect_git_source_from_gomod(source)
-    if detected:
-        return detected, "gomod", None
+    Args:
+        name: File name (e.g., packer-plugin-docker_v1.0.10_x5.0_linux_amd64)
+        
+    Returns:
+        Dict with name, version, api_version, os and arch, or None if the
+        name is not an installed plugin binary
+    """
+    match = _INSTALLED_BINARY_PATTERN.match(name)
+    if not match:
+        return None
+    return {
+        "name": match.group("name"),
+        "version": match.group("version"),
+        "api_version": match.group("api"),
+        "os": match.group("os"),
+        "arch": match.group("arch"),
+    }
+
+
+def _write_release_archive(binary_path: str, archive_path: str, member_name: str) -> tuple[str, str]:
+    """Zip a plugin binary for release, streaming it in chunks.
     
-    # Cannot determine git_source - return error
-    return "", "error", f"--git-source required (could not auto-detect from go.mod: {error_msg})"
+    The binary is hashed while it is compressed and the archive is hashed
+    afterwards, so neither is ever held in memory. The member gets a fixed
+    timestamp and executable permissions, so identical binaries produce
+    identical archives.
+    
+    Args:
+        binary_path: Local path of the binary
+        archive_path: Local path of the zip file to write
+        member_name: Name of the binary inside the archive
+        
+    Returns:
+        Tuple of (binary_sha256, archive_sha256)
+    """
+    binary_digest = hashlib.sha256()
+    info = zipfile.ZipInfo(member_name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = (0o100755 & 0xFFFF) << 16
+    with zipfile.ZipFile(archive_path, "w") as archive, open(binary_path, "rb") as binary:
+        with archive.open(info, "w", force_zip64=True) as member:
+            for chunk in iter(lambda: binary.read(HASH_CHUNK_SIZE), b""):
+                binary_digest.update(chunk)
+                member.write(chunk)
+    return binary_digest.hexdigest(), _sha256_path(archive_path)
 
 
-async def _resolve_go_version(
-    source: dagger.Directory,
-    explicit_version: Optional[str],
-) -> tuple[str, str]:
-    """Resolve the Go version to use based on priority.
+def _compute_build_cache_key(
+    source_digest: str,
+    go_version: str,
+    ldflags: str,
+    target_os: str,
+    target_arch: str,
+    module_path: str,
+    binary_name: str,
+    rebuild_nonce: Optional[str] = None,
+    build_flags: Optional[list[str]] = None,
+) -> str:
+    """Compute a content-addressed cache key from the inputs that affect the build.
     
-    Priority order:
-    1. Explicit --go-version parameter (if provided and not default sentinel)
-    2. .go-version file in source directory
-    3. Default fallback (1.21)
+    Identical inputs always produce the same key, so Dagger can reuse the cached
+    `go build` and `packer plugins install` layers. A rebuild nonce is only mixed
+    in when the caller explicitly forces a rebuild.
     
     Args:
-        source: Plugin source directory
-        explicit_version: Explicitly provided version (None means use auto-detection)
+        source_digest: Digest of the plugin source directory
+        go_version: Resolved Go version used for the build image
+        ldflags: Complete ldflags string passed to `go build`
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        module_path: Go module path used for the ldflags
+        binary_name: Output binary name
+        rebuild_nonce: Optional nonce to force a cache miss (force_rebuild)
+        build_flags: Additional `go build` flags (e.g., -trimpath)
         
     Returns:
-        Tuple of (resolved_version, source_description)
-        where source_description is one of: "explicit", "file", "default"
+        Hex-encoded SHA256 cache key
     """
-    # If explicit version provided, use it
-    if explicit_version is not None:
-        return explicit_version, "explicit"
+    inputs = {
+        "source_digest": source_digest,
+        "go_version": go_version,
+        "ldflags": ldflags,
+        "goos": target_os,
+        "goarch": target_arch,
+        "module_path": module_path,
+        "binary_name": binary_name,
+    }
+    if rebuild_nonce:
+        inputs["rebuild_nonce"] = rebuild_nonce
+    if build_flags:
+        inputs["build_flags"] = list(build_flags)
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _go_cache_volume_names(go_version: str, target_os: str, target_arch: str) -> tuple[str, str]:
+    """Compute the names of the persistent Go cache volumes.
     
-    # Try to detect from .go-version file
-    detected = await _detect_go_version(source)
-    if detected:
-        return detected, "file"
+    The module cache only depends on the Go version (downloaded modules are
+    platform independent), so all targets share it. The build cache holds
+    compiled packages and is kept separate per Go version and target platform.
     
-    # Fall back to default
-    return DEFAULT_GO_VERSION, "default"
+    Args:
+        go_version: Resolved Go version
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        
+    Returns:
+        Tuple of (module_cache_name, build_cache_name)
+    """
+    return (
+        f"packer-plugin-gomod-{go_version}",
+        f"packer-plugin-gobuild-{go_version}-{target_os}-{target_arch}",
+    )
 
 
-@object_type
-class PackerPlugin:
-    """Automate Packer plugin builds and installations with proper versioning."""
+def _with_go_caches(
+    container: dagger.Container,
+    go_version: str,
+    target_os: str,
+    target_arch: str,
+) -> dagger.Container:
+    """Mount the persistent Go module and build cache volumes into a container.
+    
+    Args:
+        container: golang container to mount the caches into
+        go_version: Resolved Go version
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        
+    Returns:
+        Container with GOMODCACHE and GOCACHE backed by cache volumes and
+        toolchain downloads disabled (GOTOOLCHAIN=local)
+    """
+    mod_cache_name, build_cache_name = _go_cache_volume_names(go_version, target_os, target_arch)
+    return (
+        container
+        .with_mounted_cache(GO_MOD_CACHE_PATH, dag.cache_volume(mod_cache_name))
+        .with_mounted_cache(GO_BUILD_CACHE_PATH, dag.cache_volume(build_cache_name))
+        .with_env_variable("GOMODCACHE", GO_MOD_CACHE_PATH)
+        .with_env_variable("GOCACHE", GO_BUILD_CACHE_PATH)
+        # Always build with the image's toolchain; go.mod toolchain directives
+        # select the image instead of a download at compile time
+        .with_env_variable("GOTOOLCHAIN", "local")
+    )
 
-    # ========================================================================
-    # Version Detection Capability
-    # ========================================================================
 
-    @function
-    async def detect_version(
-        self,
-        source: Annotated[
-            dagger.Directory,
-            Doc("Plugin source directory (use --source=. for your project)")
-        ],
-    ) -> str:
-        """
-        Analyze plugin source code to detect how version information is managed.
+def _parse_platforms(platforms: list[str]) -> tuple[list[tuple[str, str]], Optional[str]]:
+    """Parse `os/arch` platform specifications for matrix builds.
+    
+    Each entry may itself be a comma-separated list, so both
+    `["linux/amd64", "darwin/arm64"]` and `["linux/amd64,darwin/arm64"]` are
+    accepted. Duplicates are removed while preserving order.
+    
+    Args:
+        platforms: Platform specifications (e.g., linux/amd64)
         
-        Returns JSON report with version_source, version_file, current_version,
-        and version_package fields.
+    Returns:
+        Tuple of (targets, error_message)
+        - ([(os, arch), ...], None) on success
+        - ([], error_message) on failure
+    """
+    targets: list[tuple[str, str]] = []
+    for entry in platforms:
+        for spec in entry.split(","):
+            spec = spec.strip().lower()
+            if not spec:
+                continue
+            parts = spec.split("/")
+            if len(parts) != 2 or not parts[0] or not parts[1]:
+                return [], f"Invalid platform '{spec}'. Use format: os/arch (e.g., linux/amd64)"
+            target = (parts[0], parts[1])
+            if target not in targets:
+                targets.append(target)
+    
+    if not targets:
+        return [], "At least one platform is required (e.g., linux/amd64)"
+    return targets, None
+
+
+def _validate_semver(version: str) -> tuple[bool, str]:
+    """Validate a plugin version.
+    
+    The version must be MAJOR.MINOR.PATCH semver without a `v` prefix.
+    
+    Args:
+        version: Version string to validate
         
-        Args:
-            source: Plugin source directory containing Go code
-            
-        Returns:
-            JSON string with detection results
-        """
-        report = {
-            "version_source": "ldflags",  # default if no file or hardcoded found
-            "version_file": None,
-            "current_version": None,
-            "version_package": None,
-            "recommendation": None,
-        }
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    # Check for v prefix
+    if version.startswith("v"):
+        return False, f"Version '{version}' should not have 'v' prefix. Use '{version[1:]}' instead."
+    
+    # Basic semver pattern
+    semver_pattern = r'^(\d+)\.(\d+)\.(\d+)(-[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?(\+[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?$'
+    if not re.match(semver_pattern, version):
+        return False, f"Version '{version}' is not valid semantic versioning. Use format: MAJOR.MINOR.PATCH (e.g., 1.0.0)"
+    
+    return True, ""
+
+
+def _is_dev_version(version: str) -> bool:
+    """Check whether a version is a -dev prerelease (e.g., 1.2.0-dev, 1.2.0-dev.3)."""
+    prerelease = version.split("+", 1)[0].partition("-")[2]
+    return prerelease.split(".")[0] == "dev"
+
+
+def _validate_build_inputs(
+    version: Optional[str] = None,
+    git_source: Optional[str] = None,
+    plugin_name: Optional[str] = None,
+    platforms: Optional[list[tuple[str, str]]] = None,
+    profile: Optional[str] = None,
+    install_mode: Optional[str] = None,
+) -> list[str]:
+    """Check user-provided build inputs without touching the engine.
+    
+    Names are checked after lowercase normalization, which only warns.
+    Inputs that are None are not checked.
+    
+    Args:
+        version: Explicit plugin version
+        git_source: Explicit git import path
+        plugin_name: Explicit plugin name
+        platforms: Target (os, arch) pairs
+        profile: Build profile
+        install_mode: Install mode
         
-        # Check for VERSION file at common locations
-        version_locations = ["version/VERSION", "VERSION"]
-        for loc in version_locations:
-            try:
-                content = await source.file(loc).contents()
-                version = content.strip()
-                if version:
-                    report["version_file"] = loc
-                    report["current_version"] = version
-                    report["version_source"] = "file"
-                    break
-            except Exception:
-                continue
+    Returns:
+        List of problems (empty when all inputs are valid)
+    """
+    problems: list[str] = []
+    if version is not None:
+        is_valid, error_msg = _validate_semver(version)
+        if not is_valid:
+            problems.append(error_msg)
+    if git_source is not None:
+        normalized = git_source.lower()
+        if "://" in normalized or normalized.startswith("git@"):
+            problems.append(f"git-source '{git_source}' must be a Go import path without a scheme (e.g., github.com/org/packer-plugin-name)")
+        elif not re.fullmatch(r"[a-z0-9][a-z0-9.-]*(:\d+)?(/[a-z0-9._~-]+)*", normalized.rstrip("/")):
+            problems.append(f"git-source '{git_source}' is not a valid Go import path (e.g., github.com/org/packer-plugin-name)")
+    if plugin_name is not None and not re.fullmatch(r"[a-z0-9][a-z0-9._-]*", plugin_name.lower()):
+        problems.append(f"plugin-name '{plugin_name}' must start with a letter or digit and contain only letters, digits, '.', '-' and '_'")
+    for target_os, target_arch in platforms or []:
+        if target_os not in KNOWN_GOOS:
+            problems.append(f"Unknown target OS '{target_os}'. Use one of: {', '.join(KNOWN_GOOS)}")
+        if target_arch not in KNOWN_GOARCH:
+            problems.append(f"Unknown target architecture '{target_arch}'. Use one of: {', '.join(KNOWN_GOARCH)}")
+    if profile is not None and profile not in BUILD_PROFILES:
+        problems.append(f"profile must be one of: {', '.join(BUILD_PROFILES)}")
+    if install_mode is not None and install_mode not in INSTALL_MODES:
+        problems.append(f"install mode must be one of: {', '.join(INSTALL_MODES)}")
+    return problems
+
+
+def _go_version_at_least(go_version: str, minimum: tuple[int, int]) -> bool:
+    """Check whether a Go version (image tag) is at least major.minor.
+    
+    Tags without a leading version (e.g., latest) are assumed to be current.
+    
+    Args:
+        go_version: Go version or golang image tag (e.g., 1.23.2, 1.22-alpine)
+        minimum: Minimum (major, minor) version
         
-        # Check for go:embed pattern in version/version.go
-        try:
-            version_go_content = await source.file("version/version.go").contents()
-            
-            # Look for go:embed pattern
-            if "//go:embed VERSION" in version_go_content or "//go:embed version/VERSION" in version_go_content:
-                if report["version_file"]:
-                    report["version_source"] = "file"
-                    report["recommendation"] = "use_version_file"
-            
-            # Extract package path from import or module
-            # Try to find the module path from go.mod
-            try:
-                go_mod_content = await source.file("go.mod").contents()
-                module_match = re.search(r'^module\s+(\S+)', go_mod_content, re.MULTILINE)
-                if module_match:
-                    report["version_package"] = f"{module_match.group(1)}/version"
-            except Exception:
-                pass
-            
-            # Look for hardcoded version pattern
-            hardcoded_match = re.search(r'var\s+Version\s*=\s*["\']([^"\']+)["\']', version_go_content)
-            if hardcoded_match and not report["version_file"]:
-                report["version_source"] = "hardcoded"
-                report["current_version"] = hardcoded_match.group(1)
+    Returns:
+        True if the version is at least the minimum
+    """
+    match = re.match(r"^(\d+)\.(\d+)", go_version)
+    if not match:
+        return True
+    return (int(match.group(1)), int(match.group(2))) >= minimum
+
+
+def _profile_build_args(profile: str, go_version: str, has_pgo_profile: bool) -> tuple[list[str], list[str]]:
+    """Compute the `go build` flags and extra ldflags for a build profile.
+    
+    - default: the Go toolchain defaults
+    - dev: favor compile speed; no optimizations, no inlining, no PGO
+    - release: strip symbol tables and DWARF (-s -w) and apply PGO when a
+      default.pgo profile is present in the source
+    
+    Args:
+        profile: Build profile name (one of BUILD_PROFILES)
+        go_version: Resolved Go version, used to gate -pgo support
+        has_pgo_profile: Whether default.pgo exists at the source root
+        
+    Returns:
+        Tuple of (build_flags, ldflags)
+    """
+    build_flags: list[str] = []
+    ldflags: list[str] = []
+    if profile == "dev":
+        build_flags.append("-gcflags=all=-N -l")
+        # PGO is on by default since Go 1.21; rebuilding with it is slower
+        if _go_version_at_least(go_version, (1, 21)):
+            build_flags.append("-pgo=off")
+    elif profile == "release":
+        ldflags.extend(["-s", "-w"])
+        if has_pgo_profile and _go_version_at_least(go_version, (1, 20)):
+            build_flags.append("-pgo=auto")
+    return build_flags, ldflags
+
+
+def _debug_artifact_name(binary_name: str, version: str, target_os: str, target_arch: str) -> str:
+    """Path of the unstripped debug binary in the artifacts directory.
+    
+    Args:
+        binary_name: Built binary name (packer-plugin-{name}[.exe])
+        version: Plugin version without the leading v
+        target_os: Target operating system
+        target_arch: Target CPU architecture
+        
+    Returns:
+        Relative path, e.g., debug/packer-plugin-docker_v1.0.0_linux_amd64.debug
+    """
+    stem, ext = os.path.splitext(binary_name)
+    return f"debug/{stem}_v{version}_{target_os}_{target_arch}{ext}.debug"
+
+
+async def _with_debug_artifact(artifacts: dagger.Directory, build_container: dagger.Container) -> dagger.Directory:
+    """Add the unstripped debug binary from a release build to the artifacts.
+    
+    Args:
+        artifacts: Installed plugin artifacts
+        build_container: Build container with /work/{binary}.debug
+        
+    Returns:
+        Artifacts directory with the debug binary under debug/
+    """
+    binary_name, version, target_os, target_arch = await asyncio.gather(
+        build_container.env_variable(PLUGIN_BINARY_ENV),
+        build_container.env_variable(PLUGIN_VERSION_ENV),
+        build_container.env_variable("GOOS"),
+        build_container.env_variable("GOARCH"),
+    )
+    return artifacts.with_file(
+        _debug_artifact_name(binary_name, version, target_os, target_arch),
+        build_container.file(f"/work/{binary_name}.debug"),
+    )
+
+
+def _effective_install_mode(
+    install_mode: str,
+    target: tuple[str, str],
+    native_platform: tuple[str, str],
+) -> str:
+    """Return the install mode actually used for a target platform.
+    
+    `packer plugins install` executes the binary, so targets other than the
+    engine's native platform are always installed natively.
+    
+    Args:
+        install_mode: Requested install mode
+        target: Target (os, arch)
+        native_platform: Engine's native (os, arch)
+        
+    Returns:
+        "packer" or "native"
+    """
+    return install_mode if target == native_platform else "native"
+
+
+def _manifest_entry(
+    build_info: dict,
+    install_mode: str,
+    packer_version: str,
+    binary: str,
+    sha256: str,
+) -> dict:
+    """Build the manifest entry describing one platform's artifacts.
+    
+    Args:
+        build_info: Build inputs recorded by _build_plugin_internal
+        install_mode: Install mode actually used for the artifacts (see _effective_install_mode)
+        packer_version: Packer image version used by the packer install mode
+        binary: Installed binary name
+        sha256: Hex SHA256 of the installed binary
+        
+    Returns:
+        Manifest entry
+    """
+    return {
+        "build_key": build_info["build_key"],
+        "source_digest": build_info["source_digest"],
+        "go_version": build_info["go_version"],
+        "ldflags": build_info["ldflags"],
+        "build_flags": list(build_info["build_flags"]),
+        "version": build_info["version"],
+        "install_mode": install_mode,
+        "packer_version": packer_version if install_mode == "packer" else None,
+        "binary": binary,
+        "sha256": sha256,
+    }
+
+
+def _parse_build_manifest(content: Optional[str]) -> dict[str, dict]:
+    """Parse a build manifest into its per-platform entries.
+    
+    Args:
+        content: Manifest file contents, or None if there is no manifest
+        
+    Returns:
+        Entries keyed by os/arch; empty for missing or malformed manifests
+    """
+    if not content:
+        return {}
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    builds = data.get("builds") if isinstance(data, dict) else None
+    if not isinstance(builds, dict):
+        return {}
+    return {platform: entry for platform, entry in builds.items() if isinstance(entry, dict)}
+
+
+def _manifest_mismatch(recorded: Optional[dict], expected: dict) -> Optional[str]:
+    """Compare a recorded manifest entry with the inputs of the requested build.
+    
+    The build key already covers the build context digest, Go version,
+    ldflags, build flags, platform, module path and binary name, so only the
+    install inputs are compared separately.
+    
+    Args:
+        recorded: Manifest entry from the previous output, if any
+        expected: Build key and install inputs of the requested build
+        
+    Returns:
+        Reason the previous output is stale, or None if it matches
+    """
+    if recorded is None:
+        return "no manifest entry for this platform"
+    for key in ("build_key", "install_mode", "packer_version"):
+        if recorded.get(key) != expected.get(key):
+            return f"{key} changed"
+    if not recorded.get("binary") or not recorded.get("sha256"):
+        return "manifest entry has no artifacts"
+    return None
+
+
+async def _installed_artifact(installed: dagger.Directory) -> tuple[str, str]:
+    """Find the installed binary and its checksum in an artifacts directory.
+    
+    Args:
+        installed: Installed plugin artifacts
+        
+    Returns:
+        Tuple of (binary_name, sha256)
+    """
+    for entry in await installed.entries():
+        if entry.endswith("_SHA256SUM"):
+            checksum = await installed.file(entry).contents()
+            return entry[: -len("_SHA256SUM")], checksum.strip().split()[0]
+    return "", ""
+
+
+async def _check_previous_output(
+    previous_output: dagger.Directory,
+    platform: str,
+    expected: dict,
+) -> tuple[Optional[dict], str]:
+    """Check whether a previous output already holds the requested artifacts.
+    
+    The manifest entry must match the requested inputs, and the binary must
+    still be present and hash to the recorded digest.
+    
+    Args:
+        previous_output: Output directory of an earlier build
+        platform: Target platform as os/arch
+        expected: Build key and install inputs of the requested build
+        
+    Returns:
+        Tuple of (recorded_entry, reason) - the entry is None when stale
+    """
+    entries = set(await previous_output.entries())
+    if BUILD_MANIFEST_FILE not in entries:
+        return None, f"no {BUILD_MANIFEST_FILE}"
+    manifest = _parse_build_manifest(await previous_output.file(BUILD_MANIFEST_FILE).contents())
+    recorded = manifest.get(platform)
+    reason = _manifest_mismatch(recorded, expected)
+    if reason:
+        return None, reason
+    
+    binary = recorded["binary"]
+    if binary not in entries or f"{binary}_SHA256SUM" not in entries:
+        return None, f"{binary} is missing"
+    if await _sha256_file(previous_output.file(binary)) != recorded["sha256"]:
+        return None, f"{binary} does not match its recorded digest"
+    return recorded, ""
+
+
+def _previous_artifacts(previous_output: dagger.Directory, recorded: dict) -> dagger.Directory:
+    """Select one platform's up-to-date artifacts from a previous output."""
+    binary = recorded["binary"]
+    return (
+        dag.directory()
+        .with_file(binary, previous_output.file(binary))
+        .with_file(f"{binary}_SHA256SUM", previous_output.file(f"{binary}_SHA256SUM"))
+    )
+
+
+async def _module_cache_key(context: dagger.Directory) -> str:
+    """Key a portable module cache by the digest of the module files.
+    
+    Args:
+        context: Filtered build context (see _build_context)
+        
+    Returns:
+        Hex digest of the go.mod, go.sum and go.work files in the build context
+    """
+    digest = await _go_module_files(context).digest()
+    return digest.split(":", 1)[-1]
+
+
+def _portable_cache_paths(
+    module_key: str,
+    go_version: str,
+    target_os: str,
+    target_arch: str,
+    build_key: str,
+) -> dict[str, str]:
+    """Compute where a build's caches and artifacts live in a portable cache.
+    
+    Module caches are keyed by the module files, build caches (like their
+    volumes) by Go version and platform, and artifacts by the build key.
+    
+    Args:
+        module_key: Digest of the module files
+        go_version: Resolved Go version
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        build_key: Content-addressed build key
+        
+    Returns:
+        Dict with the modules tarball, build cache tarball and artifacts directory paths
+    """
+    return {
+        "modules": f"gomod/{module_key}.tar.gz",
+        "build_cache": f"gobuild/go{go_version}-{target_os}-{target_arch}.tar.gz",
+        "artifacts": f"artifacts/{build_key}",
+    }
+
+
+def _parse_cache_index(content: Optional[str]) -> dict[str, dict]:
+    """Parse a portable cache index, tolerating missing or malformed files.
+    
+    Args:
+        content: Contents of the cache index, if present
+        
+    Returns:
+        Dict with "modules", "build_caches" and "artifacts" sections
+    """
+    index: dict[str, dict] = {"modules": {}, "build_caches": {}, "artifacts": {}}
+    if not content:
+        return index
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return index
+    if not isinstance(data, dict):
+        return index
+    for section in index:
+        entries = data.get(section)
+        if isinstance(entries, dict):
+            index[section] = {key: entry for key, entry in entries.items() if isinstance(entry, dict)}
+    return index
+
+
+def _update_cache_index(
+    index: dict[str, dict],
+    paths: dict[str, str],
+    module_key: Optional[str],
+    entry: dict,
+    target_os: str,
+    target_arch: str,
+) -> dict[str, dict]:
+    """Record an exported build in a portable cache index.
+    
+    Args:
+        index: Parsed existing index
+        paths: Portable cache paths of the build
+        module_key: Module files digest, or None when no module cache was exported
+        entry: Build manifest entry of the exported artifacts
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        
+    Returns:
+        Updated index
+    """
+    go_version = entry["go_version"]
+    updated = {section: dict(entries) for section, entries in index.items()}
+    if module_key:
+        updated["modules"][module_key] = {"path": paths["modules"], "go_version": go_version}
+    updated["build_caches"][f"go{go_version}-{target_os}-{target_arch}"] = {
+        "path": paths["build_cache"],
+        "go_version": go_version,
+        "goos": target_os,
+        "goarch": target_arch,
+    }
+    updated["artifacts"][entry["build_key"]] = {
+        "path": paths["artifacts"],
+        "platform": f"{target_os}/{target_arch}",
+        "binary": entry["binary"],
+        "version": entry["version"],
+    }
+    return updated
+
+
+def _cache_image_ref(ref: str, go_version: str, target_os: str, target_arch: str) -> str:
+    """Add a default tag to a portable cache image reference without one.
+    
+    Args:
+        ref: Image reference (e.g., localhost:5000/plugin-cache)
+        go_version: Resolved Go version
+        target_os: Target operating system (GOOS)
+        target_arch: Target CPU architecture (GOARCH)
+        
+    Returns:
+        Reference tagged go<version>-<os>-<arch> unless it has a tag or digest
+    """
+    if "@" in ref or ":" in ref.rsplit("/", 1)[-1]:
+        return ref
+    return f"{ref}:go{go_version}-{target_os}-{target_arch}"
+
+
+def _resolve_portable_cache(
+    cache_dir: Optional[dagger.Directory],
+    cache_ref: Optional[str],
+) -> Optional[dagger.Directory]:
+    """Select a portable cache from a directory or a published cache image."""
+    if cache_dir is not None:
+        return cache_dir
+    if cache_ref:
+        return dag.container().from_(cache_ref).directory(PORTABLE_CACHE_IMAGE_PATH)
+    return None
+
+
+async def _with_portable_cache(
+    container: dagger.Container,
+    cache: dagger.Directory,
+    tarballs: list[tuple[str, str]],
+    diagnostics: _Diagnostics,
+) -> dagger.Container:
+    """Seed the Go cache volumes from portable cache tarballs.
+    
+    Each extraction is a layer keyed by the tarball contents, so a cold
+    engine seeds its volumes once and a warm engine skips the step. Existing
+    volume entries are kept.
+    
+    Args:
+        container: Build container with the Go cache volumes mounted
+        cache: Portable cache directory
+        tarballs: (tarball path, cache mount path) pairs to extract
+        diagnostics: Collector for the seeding messages
+        
+    Returns:
+        Container with the present tarballs extracted into the volumes
+    """
+    present = set(await cache.glob("go*/*.tar.gz"))
+    for tarball, target in tarballs:
+        if tarball not in present:
+            continue
+        diagnostics.info(f"ℹ Seeding {target} from {tarball} in the build cache")
+        mount = f"/portable-cache/{tarball}"
+        container = (
+            container
+            .with_mounted_file(mount, cache.file(tarball))
+            .with_exec(["tar", "-xzf", mount, "-C", target, "--skip-old-files"])
+            .without_mount(mount)
+        )
+    return container
+
+
+async def _portable_cached_artifacts(
+    cache: dagger.Directory,
+    build_key: str,
+    platform: str,
+    expected: dict,
+) -> Optional[dagger.Directory]:
+    """Find up-to-date artifacts for a build key in a portable cache.
+    
+    Args:
+        cache: Portable cache directory
+        build_key: Content-addressed build key
+        platform: Target platform as os/arch
+        expected: Build key and install inputs of the requested build
+        
+    Returns:
+        The cached artifacts directory, or None on a miss
+    """
+    path = f"artifacts/{build_key}"
+    if not await cache.glob(f"{path}/{BUILD_MANIFEST_FILE}"):
+        return None
+    artifacts = cache.directory(path)
+    recorded, _ = await _check_previous_output(artifacts, platform, expected)
+    return artifacts if recorded is not None else None
+
+
+def _discover_plugin_dirs(go_mod_paths: list[str]) -> list[str]:
+    """Select plugin directories from the go.mod files found in a monorepo.
+    
+    Modules under vendor/, testdata/ or .dagger/ are ignored, as are modules
+    nested inside another plugin (e.g., tool modules). A go.mod at the root is
+    only used when it is the sole module.
+    
+    Args:
+        go_mod_paths: Paths of go.mod files relative to the parent directory
+        
+    Returns:
+        Sorted plugin directory paths ("." for the root)
+    """
+    ignored = {"vendor", "testdata", ".dagger"}
+    dirs: list[str] = []
+    for path in go_mod_paths:
+        parts = path.strip("/").split("/")[:-1]
+        if ignored.intersection(parts):
+            continue
+        dirs.append("/".join(parts) or ".")
+    
+    nested = [d for d in dirs if d != "."]
+    if not nested:
+        return sorted(set(dirs))
+    
+    plugin_dirs: list[str] = []
+    for d in sorted(set(nested)):
+        if not any(d.startswith(f"{parent}/") for parent in plugin_dirs):
+            plugin_dirs.append(d)
+    return plugin_dirs
+
+
+def _discover_templates(template_paths: list[str]) -> list[str]:
+    """Select the Packer templates to validate from the files in a directory.
+    
+    A directory holding *.pkr.hcl files is one template (Packer loads all of
+    them together); files at the root are separate templates, and so is each
+    *.pkr.json file.
+    
+    Args:
+        template_paths: Paths of *.pkr.hcl and *.pkr.json files relative to the templates directory
+        
+    Returns:
+        Sorted template paths (files or directories)
+    """
+    templates: set[str] = set()
+    for path in template_paths:
+        path = path.strip("/")
+        parent = posixpath.dirname(path)
+        if path.endswith(".pkr.json") or not parent:
+            templates.add(path)
+        else:
+            templates.add(parent)
+    return sorted(templates)
+
+
+def _installed_plugin_files(plugin_paths: list[str]) -> list[str]:
+    """Select the installed plugin binaries and their checksums in a directory.
+    
+    Installed plugins sit at the root (build_artifacts, build_matrix) or
+    under their install source path (dev_install, build_many), so binaries
+    are taken from any depth. Only binaries with a _SHA256SUM file next to
+    them count, which skips debug binaries.
+    
+    Args:
+        plugin_paths: Paths of packer-plugin-* files relative to the directory
+        
+    Returns:
+        Sorted binary paths, each followed by its _SHA256SUM path
+    """
+    found = {path.strip("/") for path in plugin_paths}
+    binaries = sorted(path for path in found if f"{path}_SHA256SUM" in found)
+    return [file for binary in binaries for file in (binary, f"{binary}_SHA256SUM")]
+
+
+def _summarize_build_error(error: Exception) -> str:
+    """Extract a one-line failure reason from a failed build.
+    
+    Prefers the module's own `✗ Error:` message, then the last line of the
+    failing command's stderr.
+    
+    Args:
+        error: Exception raised while evaluating the build
+        
+    Returns:
+        Failure reason
+    """
+    if isinstance(error, PluginValidationError):
+        return "; ".join(error.problems)
+    stdout = getattr(error, "stdout", "") or ""
+    stderr = getattr(error, "stderr", "") or ""
+    for line in (stdout + "\n" + stderr).splitlines():
+        if "✗ Error:" in line:
+            return line.split("✗ Error:", 1)[1].strip()
+    lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+    if lines:
+        return lines[-1]
+    return str(error).strip() or type(error).__name__
+
+
+def _package_durations(content: Optional[str]) -> dict[str, float]:
+    """Read per-package test durations from previous `go test -json` output.
+    
+    Only the final pass/fail event of each package carries its elapsed time;
+    lines that are not JSON events are ignored.
+    
+    Args:
+        content: Previous test output (JSON lines), if any
+        
+    Returns:
+        Mapping of import path to elapsed seconds
+    """
+    durations: dict[str, float] = {}
+    for line in (content or "").splitlines():
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(event, dict) or event.get("Test") or not event.get("Package"):
+            continue
+        if event.get("Action") in ("pass", "fail") and isinstance(event.get("Elapsed"), (int, float)):
+            durations[event["Package"]] = float(event["Elapsed"])
+    return durations
+
+
+def _shard_packages(packages: list[str], durations: dict[str, float], shards: int) -> list[list[str]]:
+    """Split test packages across shards with balanced expected durations.
+    
+    Packages are assigned longest first to the shard with the least total
+    duration. Packages without a recorded duration are assumed to take the
+    mean of the known ones (1s when nothing is known).
+    
+    Args:
+        packages: Import paths of the packages to test
+        durations: Historical durations by import path
+        shards: Maximum number of shards
+        
+    Returns:
+        Non-empty shards, each a sorted list of import paths
+    """
+    known = [durations[p] for p in packages if p in durations]
+    default = sum(known) / len(known) if known else 1.0
+    bins: list[tuple[float, list[str]]] = [(0.0, []) for _ in range(min(shards, len(packages)))]
+    for package in sorted(packages, key=lambda p: (-durations.get(p, default), p)):
+        index = min(range(len(bins)), key=lambda i: (bins[i][0], i))
+        total, assigned = bins[index]
+        bins[index] = (total + durations.get(package, default), assigned + [package])
+    return [sorted(assigned) for _, assigned in bins]
+
+
+def _merge_test_events(outputs: list[str]) -> tuple[list[str], dict[str, dict]]:
+    """Merge the `go test -json` output of several shards.
+    
+    Events keep their order within each shard, so every package's events stay
+    in sequence. Non-JSON lines (e.g., build errors of older Go versions) are
+    dropped from the merged stream.
+    
+    Args:
+        outputs: Stdout of each shard
+        
+    Returns:
+        Tuple of (event_lines, package_results) - results map import paths to
+        their final action ("pass", "fail" or "skip") and elapsed seconds
+    """
+    lines: list[str] = []
+    results: dict[str, dict] = {}
+    for output in outputs:
+        for line in output.splitlines():
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            lines.append(line)
+            if event.get("Package") and not event.get("Test") and event.get("Action") in ("pass", "fail", "skip"):
+                results[event["Package"]] = {
+                    "status": event["Action"],
+                    "elapsed": event.get("Elapsed", 0.0),
+                }
+    return lines, results
+
+
+# Metadata files read by the single-pass source probe, relative to the source root
+_PROBE_ROOT_FILES = ("go.mod", ".go-version", "VERSION", "version.go", ".gitignore", IMAGE_LOCK_FILE)
+_PROBE_VERSION_DIR_FILES = ("version/VERSION", "version/version.go")
+
+
+# Maximum number of source directories whose probed metadata is memoized
+METADATA_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class _SourceMetadata:
+    """Metadata files found in a plugin source directory by a single probe.
+    
+    Values derived from the files (go.mod module path, .go-version, version
+    report and plugin name) are computed once per instance and memoized along
+    with it.
+    
+    Attributes:
+        files: Contents of the probed files that exist, keyed by relative path
+        entries: Names of the entries at the root of the source directory
+        digest: Digest of the probed source directory
+    """
+    files: dict[str, str] = field(default_factory=dict)
+    entries: tuple[str, ...] = ()
+    digest: str = ""
+    
+    def read(self, path: str) -> Optional[str]:
+        """Return the contents of a probed file, or None if it does not exist."""
+        return self.files.get(path)
+    
+    def has_entry(self, name: str) -> bool:
+        """Check whether a file or directory exists at the source root."""
+        return name in self.entries
+    
+    @cached_property
+    def gomod(self) -> Optional["_GoMod"]:
+        """Parsed go.mod, if present."""
+        content = self.read("go.mod")
+        return _parse_go_mod(content) if content is not None else None
+    
+    @cached_property
+    def gomod_module(self) -> tuple[Optional[str], Optional[str]]:
+        """Module path detected from go.mod as (module_path, error_message)."""
+        return _detect_git_source_from_gomod(self)
+    
+    @cached_property
+    def go_version_file(self) -> Optional[str]:
+        """Go version from the .go-version file, if present."""
+        return _detect_go_version(self)
+    
+    @cached_property
+    def gomod_go_versions(self) -> tuple[Optional[str], Optional[str]]:
+        """Go versions declared in go.mod as (go_directive, toolchain_directive)."""
+        return _detect_gomod_go_versions(self)
+    
+    @cached_property
+    def version_report(self) -> dict:
+        """Version detection report (see detect_version)."""
+        return _build_version_report(self)
+    
+    @cached_property
+    def plugin_name(self) -> Optional[str]:
+        """Plugin name auto-detected from the go.mod module path."""
+        module_path, _ = self.gomod_module
+        if not module_path:
+            return None
+        name, _ = _plugin_name_from_dirname(module_path.rstrip("/").split("/")[-1])
+        return name
+
+
+def _lru_get(cache: OrderedDict, key: str):
+    """Look up a memoized value and mark it as most recently used."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key: str, value) -> None:
+    """Memoize a value, evicting the least recently used entries beyond METADATA_CACHE_SIZE."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > METADATA_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+# LRU memo of probed metadata keyed by source directory digest
+_metadata_cache: "OrderedDict[str, _SourceMetadata]" = OrderedDict()
+
+
+async def _get_source_metadata(source: dagger.Directory) -> _SourceMetadata:
+    """Return probed metadata for a source directory, memoized by its digest.
+    
+    Repeated resolution of the same source within one module run (matrix
+    builds, monorepo batches, error fallbacks) reuses the earlier probe instead
+    of re-reading the files. The memo holds at most METADATA_CACHE_SIZE entries
+    and evicts the least recently used one.
+    
+    Args:
+        source: Plugin source directory
+        
+    Returns:
+        Probed (possibly memoized) source metadata
+    """
+    digest = await source.digest()
+    cached = _lru_get(_metadata_cache, digest)
+    if cached is not None:
+        return cached
+    
+    metadata = await _probe_source_metadata(source, digest)
+    _lru_put(_metadata_cache, digest, metadata)
+    return metadata
+
+
+async def _probe_source_metadata(source: dagger.Directory, digest: str = "") -> _SourceMetadata:
+    """Read all metadata files needed for resolution in a single pass.
+    
+    Lists the source root and the `version/` directory concurrently, then
+    fetches every metadata file that exists concurrently, instead of probing
+    each candidate path with a sequential (and possibly failing) read.
+    
+    Args:
+        source: Plugin source directory
+        digest: Digest of the source directory, recorded in the result
+        
+    Returns:
+        Probed metadata shared by build, install and prep_gitignore
+    """
+    root_entries, version_entries = await asyncio.gather(
+        source.entries(),
+        source.glob("version/*"),
+    )
+    entries = tuple(entry.rstrip("/") for entry in root_entries)
+    present = set(entries) | {entry.rstrip("/") for entry in version_entries}
+    
+    paths = [path for path in _PROBE_ROOT_FILES + _PROBE_VERSION_DIR_FILES if path in present]
+    contents = await asyncio.gather(*(source.file(path).contents() for path in paths))
+    return _SourceMetadata(files=dict(zip(paths, contents)), entries=entries, digest=digest)
+
+
+async def _native_platform() -> tuple[str, str]:
+    """Return the engine's native (os, arch), where built binaries can be executed."""
+    native_os, native_arch = str(await dag.default_platform()).split("/")[:2]
+    return native_os, native_arch
+
+
+def _parse_plugin_description(output: str) -> Optional[dict]:
+    """Parse the JSON printed by a plugin's `describe` command.
+    
+    Args:
+        output: Stdout of `packer-plugin-{name} describe`
+        
+    Returns:
+        Dict with api_version and components (builders, provisioners,
+        post_processors, datasources), or None if the output is not a
+        plugin description
+    """
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not re.fullmatch(r"x\d+\.\d+", str(data.get("api_version", ""))):
+        return None
+    components = {
+        kind: sorted(data.get(kind) or [])
+        for kind in ("builders", "provisioners", "post_processors", "datasources")
+    }
+    return {"api_version": data["api_version"], "components": components}
+
+
+# LRU memo of plugin descriptions keyed by build context digest; holds the
+# pending describe task so concurrent matrix targets share one run
+_description_cache: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+
+
+async def _get_plugin_description(source_digest: str, describe: Callable[[], Awaitable[dict]]) -> dict:
+    """Return the description of a plugin source, running describe at most once.
+    
+    The API version and components do not depend on the target platform or
+    the version ldflags, so every build of the same source shares them.
+    
+    Args:
+        source_digest: Digest of the build context
+        describe: Coroutine factory that builds natively and runs describe
+        
+    Returns:
+        Plugin description (see _parse_plugin_description)
+    """
+    task = _lru_get(_description_cache, source_digest)
+    if task is None:
+        task = asyncio.ensure_future(describe())
+        _lru_put(_description_cache, source_digest, task)
+    try:
+        return await task
+    except BaseException:
+        # Don't memoize failures; the next build retries
+        if _description_cache.get(source_digest) is task:
+            del _description_cache[source_digest]
+        raise
+
+
+# Go-relevant inputs mounted into the build container by default
+DEFAULT_BUILD_INCLUDE = [
+    "**/*.go",
+    "**/*.s",
+    "**/*.syso",
+    "**/go.mod",
+    "**/go.sum",
+    "**/VERSION",
+    ".go-version",
+    PGO_PROFILE_FILE,
+    "vendor/**",
+]
+
+# Test files and fixtures: excluded from builds, kept for go test
+TEST_CONTEXT_PATTERNS = [
+    "**/*_test.go",
+    "**/testdata/**",
+]
+
+# Paths never needed to compile the plugin
+DEFAULT_BUILD_EXCLUDE = [
+    ".git",
+    ".dagger",
+    *TEST_CONTEXT_PATTERNS,
+]
+
+
+def _parse_embed_patterns(go_file: str, content: str) -> list[str]:
+    """Extract `//go:embed` patterns from a Go file as source-relative paths.
+    
+    Args:
+        go_file: Path of the Go file relative to the source root
+        content: Contents of the Go file
+        
+    Returns:
+        Include patterns for the embedded files and directories
+    """
+    package_dir = go_file.rsplit("/", 1)[0] if "/" in go_file else ""
+    patterns: list[str] = []
+    for match in re.finditer(r'^//go:embed\s+(.+)$', content, re.MULTILINE):
+        for token in re.findall(r'"([^"]+)"|`([^`]+)`|(\S+)', match.group(1)):
+            pattern = next(part for part in token if part)
+            if pattern.startswith("all:"):
+                pattern = pattern[len("all:"):]
+            path = f"{package_dir}/{pattern}" if package_dir else pattern
+            # Embedded directories are included recursively
+            for include in (path, f"{path}/**"):
+                if include not in patterns:
+                    patterns.append(include)
+    return patterns
+
+
+# LRU memo of embed patterns keyed by source directory digest
+_embed_cache: "OrderedDict[str, list[str]]" = OrderedDict()
+
+
+async def _detect_embed_patterns(source: dagger.Directory, digest: str) -> list[str]:
+    """Detect files embedded with `//go:embed` anywhere in the source tree.
+    
+    Args:
+        source: Plugin source directory
+        digest: Digest of the source directory (memo key)
+        
+    Returns:
+        Include patterns for all embed targets
+    """
+    cached = _lru_get(_embed_cache, digest)
+    if cached is not None:
+        return cached
+    
+    go_files = [
+        path for path in await source.glob("**/*.go")
+        if not path.startswith("vendor/") and not path.endswith("_test.go")
+    ]
+    contents = await asyncio.gather(*(source.file(path).contents() for path in go_files))
+    
+    patterns: list[str] = []
+    for path, content in zip(go_files, contents):
+        if "//go:embed" not in content:
+            continue
+        for pattern in _parse_embed_patterns(path, content):
+            if pattern not in patterns:
+                patterns.append(pattern)
+    
+    _lru_put(_embed_cache, digest, patterns)
+    return patterns
+
+
+async def _build_context(
+    source: dagger.Directory,
+    metadata: _SourceMetadata,
+    include: Optional[list[str]],
+    exclude: Optional[list[str]],
+    tests: bool = False,
+) -> dagger.Directory:
+    """Assemble the minimal build context mounted into the build container.
+    
+    Only Go-relevant inputs (Go and assembly files, go.mod/go.sum, VERSION
+    files, vendor/ and `//go:embed` targets) are kept, so unrelated changes
+    (docs, .git, previous build outputs) do not invalidate the build cache.
+    
+    Args:
+        source: Plugin source directory
+        metadata: Probed source metadata
+        include: Include patterns replacing the defaults (embed targets are always kept)
+        exclude: Additional exclude patterns
+        tests: Keep test files and testdata/ (for go test)
+        
+    Returns:
+        Filtered source directory
+    """
+    include_patterns = list(include) if include else list(DEFAULT_BUILD_INCLUDE)
+    for pattern in await _detect_embed_patterns(source, metadata.digest):
+        if pattern not in include_patterns:
+            include_patterns.append(pattern)
+    exclude_patterns = DEFAULT_BUILD_EXCLUDE + list(exclude or [])
+    if tests:
+        include_patterns.extend(p for p in TEST_CONTEXT_PATTERNS if p not in include_patterns)
+        exclude_patterns = [p for p in exclude_patterns if p not in TEST_CONTEXT_PATTERNS]
+    
+    return dag.directory().with_directory(
+        ".",
+        source,
+        include=include_patterns,
+        exclude=exclude_patterns,
+    )
+
+
+def _go_module_files(context: dagger.Directory) -> dagger.Directory:
+    """Select only the module definition files from a build context.
+    
+    Used to mount a dependency download stage whose cache key only changes
+    when go.mod, go.sum or go.work files change.
+    
+    Args:
+        context: Build context directory
+        
+    Returns:
+        Directory containing only go.mod, go.sum and go.work files
+    """
+    return dag.directory().with_directory(
+        ".",
+        context,
+        include=["**/go.mod", "**/go.sum", "go.work", "go.work.sum"],
+    )
+
+
+# Mount point of a multi-module build context (the plugin is a subdirectory)
+WORKSPACE_MOUNT_PATH = "/workspace"
+
+
+def _split_workspace(
+    source: dagger.Directory,
+    plugin_dir: Optional[str],
+) -> tuple[Optional[dagger.Directory], Optional[str], dagger.Directory]:
+    """Split a repository root source into (workspace, plugin_dir, plugin_source).
+    
+    Without plugin_dir, the source is the plugin itself and there is no workspace.
+    """
+    if not plugin_dir:
+        return None, None, source
+    plugin_dir = posixpath.normpath(plugin_dir.strip("/") or ".")
+    return source, plugin_dir, source.directory(plugin_dir)
+
+
+async def _read_optional(directory: dagger.Directory, path: str) -> Optional[str]:
+    """Read a file from a directory, or None if it does not exist."""
+    if not await directory.glob(path):
+        return None
+    return await directory.file(path).contents()
+
+
+async def _local_modules(
+    workspace: dagger.Directory,
+    plugin_dir: str,
+) -> tuple[list[str], Optional[str], Optional[str]]:
+    """Find the local modules a plugin needs inside a repository.
+    
+    Starting from the plugin module, follows replace directives that point at
+    directories and, when a go.work at the repository root uses the plugin,
+    the workspace modules it requires. Only these modules end up in the build
+    context; a go.work is rewritten to use just them.
+    
+    Args:
+        workspace: Repository root containing the plugin
+        plugin_dir: Plugin directory relative to the repository root
+        
+    Returns:
+        Tuple of (module_dirs, go_work, error_message): module directories
+        relative to the root (plugin first), trimmed go.work contents or None
+    """
+    work_content = await _read_optional(workspace, "go.work")
+    work = _parse_go_mod(work_content) if work_content is not None else None
+    work_modules: dict[str, str] = {}
+    if work is not None:
+        use_dirs = [posixpath.normpath(use) for use in work.use]
+        if plugin_dir not in use_dirs:
+            work = None
+        else:
+            contents = await asyncio.gather(*(_read_optional(workspace, f"{d}/go.mod") for d in use_dirs))
+            for use_dir, content in zip(use_dirs, contents):
+                module = _parse_go_mod(content).module if content is not None else None
+                if module:
+                    work_modules[module] = use_dir
+    
+    modules: dict[str, _GoMod] = {}
+    pending = [plugin_dir]
+    if work is not None:
+        pending.extend(posixpath.normpath(path) for path in work.local_replacements)
+    while pending:
+        module_dir = pending.pop(0)
+        if module_dir in modules:
+            continue
+        if module_dir.startswith("../") or module_dir == ".." or posixpath.isabs(module_dir):
+            return [], None, f"local module {module_dir} is outside the source directory"
+        content = await _read_optional(workspace, posixpath.join(module_dir, "go.mod"))
+        if content is None:
+            return [], None, f"local module {module_dir} has no go.mod"
+        gomod = _parse_go_mod(content)
+        modules[module_dir] = gomod
+        for target in gomod.local_replacements:
+            pending.append(posixpath.normpath(posixpath.join(module_dir, target)))
+        for requirement in gomod.require:
+            if requirement.path in work_modules:
+                pending.append(work_modules[requirement.path])
+    
+    module_dirs = list(modules)
+    go_work = _format_go_work(work, [d for d in module_dirs if d in work_modules.values()]) if work else None
+    return module_dirs, go_work, None
+
+
+async def _workspace_build_context(
+    workspace: dagger.Directory,
+    plugin_dir: str,
+    include: Optional[list[str]],
+    exclude: Optional[list[str]],
+    tests: bool = False,
+) -> tuple[Optional[dagger.Directory], list[str], Optional[str]]:
+    """Assemble a build context with a plugin and the local modules it uses.
+    
+    Each module is filtered like a single-plugin build context and placed at
+    its path in the repository, so relative replace directives and go.work
+    entries resolve as they do on disk.
+    
+    Args:
+        workspace: Repository root containing the plugin
+        plugin_dir: Plugin directory relative to the repository root
+        include: Include patterns replacing the defaults (per module)
+        exclude: Additional exclude patterns (per module)
+        tests: Keep the plugin's test files and testdata/ (for go test)
+        
+    Returns:
+        Tuple of (context, module_dirs, error_message)
+    """
+    module_dirs, go_work, error = await _local_modules(workspace, plugin_dir)
+    if error:
+        return None, [], error
+    
+    context = dag.directory()
+    for module_dir in module_dirs:
+        module_source = workspace.directory(module_dir)
+        module_metadata = await _get_source_metadata(module_source)
+        context = context.with_directory(
+            module_dir,
+            await _build_context(
+                module_source, module_metadata, include, exclude, tests=tests and module_dir == plugin_dir
+            ),
+        )
+    if go_work is not None:
+        context = context.with_new_file("go.work", go_work)
+        if await workspace.glob("go.work.sum"):
+            context = context.with_file("go.work.sum", workspace.file("go.work.sum"))
+    return context, module_dirs, None
+
+
+@dataclass(frozen=True)
+class _ImagePins:
+    """Digest-pinned base image references and an optional registry mirror.
+    
+    Attributes:
+        images: Map of image tag (e.g., golang:1.23.2) to digest reference
+        mirror: Registry host that replaces the original registry (air-gapped runs)
+    """
+    images: dict[str, str] = field(default_factory=dict)
+    mirror: Optional[str] = None
+    
+    def ref(self, tag: str) -> str:
+        """Return the address to pull for an image tag, pinned and mirrored if configured."""
+        ref = self.images.get(tag, tag)
+        if self.mirror:
+            ref = _mirror_image_ref(ref, self.mirror)
+        return ref
+
+
+def _split_image_registry(ref: str) -> tuple[str, str]:
+    """Split an image reference into (registry, repository path).
+    
+    Docker Hub references are qualified, e.g. `golang:1.21` becomes
+    (`docker.io`, `library/golang:1.21`).
+    """
+    first, _, rest = ref.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        return first, rest
+    if not rest:
+        return "docker.io", f"library/{ref}"
+    return "docker.io", ref
+
+
+def _mirror_image_ref(ref: str, mirror: str) -> str:
+    """Rewrite an image reference to pull from a registry mirror.
+    
+    Example: docker.io/library/golang:1.21@sha256:abc with mirror
+    localhost:5000 becomes localhost:5000/library/golang:1.21@sha256:abc
+    """
+    _, path = _split_image_registry(ref)
+    return f"{mirror.rstrip('/')}/{path}"
+
+
+def _parse_image_lock(content: Optional[str]) -> tuple[dict[str, str], Optional[str]]:
+    """Parse an image lockfile.
+    
+    Args:
+        content: Lockfile contents (None if no lockfile exists)
+        
+    Returns:
+        Tuple of (images, error_message)
+        - ({tag: digest_ref}, None) on success (empty if no lockfile)
+        - ({}, error_message) if the lockfile is invalid
+    """
+    if content is None:
+        return {}, None
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        return {}, f"{IMAGE_LOCK_FILE} is not valid JSON: {e.msg}"
+    images = data.get("images") if isinstance(data, dict) else None
+    if not isinstance(images, dict) or not all(
+        isinstance(tag, str) and isinstance(ref, str) and "@sha256:" in ref
+        for tag, ref in images.items()
+    ):
+        return {}, f"{IMAGE_LOCK_FILE} must map image tags to digest references under 'images'"
+    return images, None
+
+
+# Digest references resolved during this module run, keyed by (tag, mirror)
+_image_digest_cache: dict[tuple[str, Optional[str]], str] = {}
+
+
+async def _resolve_image_digest(tag: str, mirror: Optional[str]) -> str:
+    """Resolve an image tag to a digest reference for the lockfile.
+    
+    Args:
+        tag: Image tag (e.g., golang:1.23.2)
+        mirror: Optional registry mirror to resolve against
+        
+    Returns:
+        Fully qualified reference with digest (e.g., docker.io/library/golang:1.23.2@sha256:...)
+    """
+    cached = _image_digest_cache.get((tag, mirror))
+    if cached is not None:
+        return cached
+    
+    address = _mirror_image_ref(tag, mirror) if mirror else tag
+    resolved = await dag.container().from_(address).image_ref()
+    digest = resolved.rsplit("@", 1)[-1]
+    registry, path = _split_image_registry(tag)
+    pinned = f"{registry}/{path}@{digest}"
+    _image_digest_cache[(tag, mirror)] = pinned
+    return pinned
+
+
+async def _load_image_pins(
+    metadata: Optional[_SourceMetadata],
+    image_lock: Optional[dagger.File],
+    registry_mirror: Optional[str],
+) -> tuple[_ImagePins, Optional[str]]:
+    """Load image pins from an explicit lockfile or the one in the source tree.
+    
+    Args:
+        metadata: Probed source metadata (may contain the lockfile)
+        image_lock: Explicitly provided lockfile (takes precedence)
+        registry_mirror: Optional registry mirror host
+        
+    Returns:
+        Tuple of (pins, error_message)
+    """
+    if image_lock is not None:
+        content: Optional[str] = await image_lock.contents()
+    else:
+        content = metadata.read(IMAGE_LOCK_FILE) if metadata else None
+    images, error = _parse_image_lock(content)
+    return _ImagePins(images=images, mirror=registry_mirror), error
+
+
+def _detect_go_version(metadata: _SourceMetadata) -> Optional[str]:
+    """Detect Go version from .go-version file in source directory.
+    
+    Args:
+        metadata: Probed source metadata
+        
+    Returns:
+        Go version string if .go-version file exists and is valid, None otherwise
+    """
+    content = metadata.read(".go-version")
+    if content is None:
+        return None
+    version = content.strip()
+    if version:
+        return version
+    return None
+
+
+# Tokens of a go.mod/go.work line: interpreted string, raw string or bare word
+_GO_MOD_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|`[^`]*`|\S+')
+
+
+@dataclass(frozen=True)
+class _GoModRequire:
+    """A require directive of a go.mod file."""
+    path: str
+    version: str
+    indirect: bool = False
+
+
+@dataclass(frozen=True)
+class _GoModReplace:
+    """A replace directive of a go.mod or go.work file."""
+    old_path: str
+    old_version: Optional[str]
+    new_path: str
+    new_version: Optional[str]
+    
+    @property
+    def is_local(self) -> bool:
+        """Whether the replacement is a directory (./x, ../x or an absolute path)."""
+        return self.new_version is None and (
+            self.new_path in (".", "..") or self.new_path.startswith(("./", "../", "/"))
+        )
+    
+    def format(self) -> str:
+        """Render the directive as it appears in a go.mod or go.work file."""
+        old = f"{self.old_path} {self.old_version}" if self.old_version else self.old_path
+        new = f"{self.new_path} {self.new_version}" if self.new_version else self.new_path
+        return f"{old} => {new}"
+
+
+@dataclass(frozen=True)
+class _GoMod:
+    """Parsed directives of a go.mod or go.work file.
+    
+    Attributes:
+        module: Module path (go.mod only)
+        go: Version of the go directive
+        toolchain: Name of the toolchain directive (e.g., go1.23.2 or default)
+        require: Required modules
+        replace: Replaced modules
+        use: Module directories of a workspace (go.work only)
+    """
+    module: Optional[str] = None
+    go: Optional[str] = None
+    toolchain: Optional[str] = None
+    require: tuple[_GoModRequire, ...] = ()
+    replace: tuple[_GoModReplace, ...] = ()
+    use: tuple[str, ...] = ()
+    
+    @property
+    def local_replacements(self) -> list[str]:
+        """Directories that replace modules, relative to this file's directory."""
+        return [r.new_path for r in self.replace if r.is_local]
+
+
+def _go_mod_unquote(token: str) -> str:
+    """Unquote an interpreted or raw Go string token."""
+    if token.startswith('"'):
+        return json.loads(token)
+    if token.startswith("`"):
+        return token[1:-1]
+    return token
+
+
+def _parse_go_mod(content: str) -> _GoMod:
+    """Parse the directives of a go.mod or go.work file.
+    
+    Handles single-line and block (`require (...)`) directives, quoted
+    paths, comments and `// indirect` markers. Unknown directives (exclude,
+    retract, godebug) are skipped.
+    
+    Args:
+        content: File contents
+        
+    Returns:
+        Parsed module file
+    """
+    fields: dict = {"require": [], "replace": [], "use": []}
+    block: Optional[str] = None
+    for raw_line in content.splitlines():
+        line, _, comment = raw_line.partition("//")
+        if line.count('"') % 2:
+            # "//" inside a quoted path is not a comment
+            line, comment = raw_line, ""
+        tokens = [_go_mod_unquote(token) for token in _GO_MOD_TOKEN.findall(line)]
+        if not tokens:
+            continue
+        if block is not None:
+            if tokens == [")"]:
+                block = None
+                continue
+            verb, args = block, tokens
+        else:
+            verb, args = tokens[0], tokens[1:]
+            if args == ["("]:
+                block = verb
+                continue
+        
+        if verb in ("module", "go", "toolchain") and args:
+            fields[verb] = args[0]
+        elif verb == "require" and len(args) >= 2:
+            fields["require"].append(_GoModRequire(args[0], args[1], comment.strip() == "indirect"))
+        elif verb == "use" and args:
+            fields["use"].append(args[0])
+        elif verb == "replace" and "=>" in args:
+            arrow = args.index("=>")
+            old, new = args[:arrow], args[arrow + 1:]
+            if old and new:
+                fields["replace"].append(_GoModReplace(
+                    old_path=old[0],
+                    old_version=old[1] if len(old) > 1 else None,
+                    new_path=new[0],
+                    new_version=new[1] if len(new) > 1 else None,
+                ))
+    
+    return _GoMod(
+        module=fields.get("module"),
+        go=fields.get("go"),
+        toolchain=fields.get("toolchain"),
+        require=tuple(fields["require"]),
+        replace=tuple(fields["replace"]),
+        use=tuple(fields["use"]),
+    )
+
+
+def _format_go_work(work: _GoMod, use: list[str]) -> str:
+    """Render a go.work file that keeps only some of its module directories.
+    
+    Args:
+        work: Parsed go.work file
+        use: Module directories to keep, relative to the workspace root
+        
+    Returns:
+        go.work contents
+    """
+    lines = []
+    if work.go:
+        lines.append(f"go {work.go}")
+    if work.toolchain:
+        lines.append(f"toolchain {work.toolchain}")
+    lines.append("")
+    lines.append("use (")
+    lines.extend(f"\t{'./' + path if path != '.' else '.'}" for path in use)
+    lines.append(")")
+    if work.replace:
+        lines.append("")
+        lines.append("replace (")
+        lines.extend(f"\t{r.format()}" for r in work.replace)
+        lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+# Go version in go.mod go/toolchain directives (e.g., 1.22, 1.23.2, 1.24rc1)
+_GO_DIRECTIVE_VERSION = r"(\d+\.\d+(?:\.\d+)?(?:(?:rc|beta)\d+)?)"
+
+
+def _detect_gomod_go_versions(metadata: _SourceMetadata) -> tuple[Optional[str], Optional[str]]:
+    """Detect the Go versions declared by the go and toolchain directives in go.mod.
+    
+    The go directive is the minimum Go version of the module; the toolchain
+    directive (e.g., `toolchain go1.23.2`) names the toolchain it should be
+    built with. `toolchain default` and toolchains older than the go
+    directive are ignored.
+    
+    Args:
+        metadata: Probed source metadata
+        
+    Returns:
+        Tuple of (go_version, toolchain_version), None where not declared
+    """
+    gomod = metadata.gomod
+    if gomod is None:
+        return None, None
+    go_version = gomod.go if gomod.go and re.fullmatch(_GO_DIRECTIVE_VERSION, gomod.go) else None
+    toolchain = None
+    if gomod.toolchain:
+        match = re.fullmatch(rf"go{_GO_DIRECTIVE_VERSION}", gomod.toolchain)
+        toolchain = match.group(1) if match else None
+    if toolchain and go_version and _go_version_below(toolchain, go_version):
+        toolchain = None
+    return go_version, toolchain
+
+
+def _go_version_below(go_version: str, minimum: str) -> bool:
+    """Check whether a Go version (image tag) is older than a go.mod minimum.
+    
+    A tag without a patch release (e.g., 1.22) selects the latest patch, so
+    it only has to match the minimum's major.minor. Unparseable tags (e.g.,
+    latest) are assumed to be current.
+    
+    Args:
+        go_version: Go version or golang image tag
+        minimum: Minimum Go version from go.mod
+        
+    Returns:
+        True if the version cannot build a module requiring the minimum
+    """
+    pattern = r"^(\d+)\.(\d+)(?:\.(\d+))?"
+    version_match = re.match(pattern, go_version)
+    minimum_match = re.match(pattern, minimum)
+    if not version_match or not minimum_match:
+        return False
+    version = (int(version_match.group(1)), int(version_match.group(2)))
+    required = (int(minimum_match.group(1)), int(minimum_match.group(2)))
+    if version != required or version_match.group(3) is None:
+        return version < required
+    return int(version_match.group(3)) < int(minimum_match.group(3) or 0)
+
+
+def _detect_git_source_from_gomod(metadata: _SourceMetadata) -> tuple[Optional[str], Optional[str]]:
+    """Detect git source from go.mod module declaration.
+    
+    Args:
+        metadata: Probed source metadata
+        
+    Returns:
+        Tuple of (module_path, error_message)
+        - (module_path, None) on success
+        - (None, error_message) on failure
+    """
+    gomod = metadata.gomod
+    if gomod is None:
+        return None, "file not found"
+    if gomod.module:
+        return gomod.module, None
+    return None, "no module declaration found"
+
+
+def _resolve_git_source(
+    metadata: _SourceMetadata,
+    explicit_git_source: Optional[str],
+) -> tuple[str, str, Optional[str]]:
+    """Resolve the git source to use based on priority.
+    
+    Priority order:
+    1. Explicit --git-source parameter (if provided)
+    2. Auto-detected from go.mod module path
+    3. Error (cannot proceed without git_source)
+    
+    Args:
+        metadata: Probed source metadata
+        explicit_git_source: Explicitly provided git_source (None means use auto-detection)
+        
+    Returns:
+        Tuple of (resolved_value, source_description, error_message)
+        - (value, "explicit", None) if explicit value provided
+        - (value, "gomod", None) if auto-detected from go.mod
+        - ("", "error", error_message) if cannot be determined
+    """
+    # If explicit git_source provided, use it
+    if explicit_git_source is not None:
+        return explicit_git_source, "explicit", None
+    
+    # Try to detect from go.mod file
+    detected, error_msg = metadata.gomod_module
+    if detected:
+        return detected, "gomod", None
+    
+    # Cannot determine git_source - return error
+    return "", "error", f"--git-source required (could not auto-detect from go.mod: {error_msg})"
+
+
+def _resolve_go_version(
+    metadata: _SourceMetadata,
+    explicit_version: Optional[str],
+) -> tuple[str, str]:
+    """Resolve the Go version to use based on priority.
+    
+    Priority order:
+    1. Explicit --go-version parameter (if provided and not default sentinel)
+    2. .go-version file in source directory
+    3. toolchain directive in go.mod
+    4. go directive in go.mod
+    5. Default fallback (1.21)
+    
+    Args:
+        metadata: Probed source metadata
+        explicit_version: Explicitly provided version (None means use auto-detection)
+        
+    Returns:
+        Tuple of (resolved_version, source_description)
+        where source_description is one of: "explicit", "file", "toolchain", "gomod", "default"
+    """
+    # If explicit version provided, use it
+    if explicit_version is not None:
+        return explicit_version, "explicit"
+    
+    # Try to detect from .go-version file
+    detected = metadata.go_version_file
+    if detected:
+        return detected, "file"
+    
+    # Then from the go.mod toolchain and go directives
+    go_directive, toolchain = metadata.gomod_go_versions
+    if toolchain:
+        return toolchain, "toolchain"
+    if go_directive:
+        return go_directive, "gomod"
+    
+    # Fall back to default
+    return DEFAULT_GO_VERSION, "default"
+
+
+def _resolve_plugin_version(
+    metadata: _SourceMetadata,
+    version: Optional[str],
+    use_version_file: bool,
+) -> tuple[Optional[str], list[str]]:
+    """Resolve the plugin version from --version or the VERSION file.
+    
+    An explicit version takes precedence over the VERSION file. Explicit
+    versions are validated with the other inputs; a version read from the
+    file is validated here.
+    
+    Args:
+        metadata: Probed source metadata
+        version: Explicit version, if provided
+        use_version_file: Fall back to the VERSION file
+        
+    Returns:
+        Tuple of (version, problems) - version is None when it cannot be resolved
+    """
+    if version:
+        return version, []
+    if not use_version_file:
+        return None, ["version is required. Provide --version or use --use-version-file"]
+    detection = metadata.version_report
+    if not (detection["version_file"] and detection["current_version"]):
+        return None, ["use_version_file is true but no VERSION file found"]
+    file_version = detection["current_version"]
+    is_valid, error_msg = _validate_semver(file_version)
+    if not is_valid:
+        return None, [f"{detection['version_file']}: {error_msg}"]
+    return file_version, []
+
+
+def _source_problems(
+    metadata: _SourceMetadata,
+    git_source: Optional[str],
+    version: Optional[str],
+    use_version_file: bool,
+    lock_error: Optional[str] = None,
+) -> list[str]:
+    """Collect the problems that need the probed source metadata to find.
+    
+    Args:
+        metadata: Probed source metadata
+        git_source: Explicit git source, if provided
+        version: Explicit version, if provided
+        use_version_file: Fall back to the VERSION file
+        lock_error: Error from loading the image lockfile, if any
+        
+    Returns:
+        List of problems (empty when the source can be built)
+    """
+    problems = [lock_error] if lock_error else []
+    _, _, git_source_error = _resolve_git_source(metadata, git_source)
+    if git_source_error:
+        problems.append(git_source_error)
+    problems.extend(_resolve_plugin_version(metadata, version, use_version_file)[1])
+    return problems
+
+
+def _report_go_version(
+    diagnostics: _Diagnostics,
+    metadata: _SourceMetadata,
+    go_version: str,
+    go_version_source: str,
+) -> None:
+    """Record where the Go version came from and whether go.mod accepts it.
+    
+    Builds run with GOTOOLCHAIN=local, so a Go version older than the go.mod
+    go directive fails instead of downloading a newer toolchain.
+    
+    Args:
+        diagnostics: Collector for the messages
+        metadata: Probed source metadata
+        go_version: Resolved Go version
+        go_version_source: Source description from _resolve_go_version
+    """
+    if go_version_source == "file":
+        diagnostics.info(f"ℹ Using Go {go_version} from .go-version file")
+    elif go_version_source == "toolchain":
+        diagnostics.info(f"ℹ Using Go {go_version} from go.mod toolchain directive")
+    elif go_version_source == "gomod":
+        diagnostics.info(f"ℹ Using Go {go_version} from go.mod go directive")
+    
+    go_directive, _ = metadata.gomod_go_versions
+    if go_directive and _go_version_below(go_version, go_directive):
+        diagnostics.warning(
+            f"⚠ Warning: go.mod requires Go {go_directive} but Go {go_version} is used; "
+            "toolchain downloads are disabled (GOTOOLCHAIN=local), so the build will fail"
+        )
+
+
+def _build_version_report(metadata: _SourceMetadata) -> dict:
+    """Analyze probed source metadata to detect how version information is managed.
+    
+    Args:
+        metadata: Probed source metadata
+        
+    Returns:
+        Report dict with version_source, version_file, current_version,
+        version_package and recommendation fields
+    """
+    report = {
+        "version_source": "ldflags",  # default if no file or hardcoded found
+        "version_file": None,
+        "current_version": None,
+        "version_package": None,
+        "recommendation": None,
+    }
+    
+    # Check for VERSION file at common locations
+    version_locations = ["version/VERSION", "VERSION"]
+    for loc in version_locations:
+        content = metadata.read(loc)
+        if content is None:
+            continue
+        version = content.strip()
+        if version:
+            report["version_file"] = loc
+            report["current_version"] = version
+            report["version_source"] = "file"
+            break
+    
+    version_go_content = metadata.read("version/version.go")
+    if version_go_content is not None:
+        # Look for go:embed pattern
+        if "//go:embed VERSION" in version_go_content or "//go:embed version/VERSION" in version_go_content:
+            if report["version_file"]:
+                report["version_source"] = "file"
+                report["recommendation"] = "use_version_file"
+        
+        # Extract package path from the module path in go.mod
+        module_path, _ = metadata.gomod_module
+        if module_path:
+            report["version_package"] = f"{module_path}/version"
+        
+        # Look for hardcoded version pattern
+        hardcoded_match = re.search(r'var\s+Version\s*=\s*["\']([^"\']+)["\']', version_go_content)
+        if hardcoded_match and not report["version_file"]:
+            report["version_source"] = "hardcoded"
+            report["current_version"] = hardcoded_match.group(1)
+        
+        # Check for ldflags pattern (var Version string without initialization)
+        ldflags_match = re.search(r'var\s+Version\s+string\s*$', version_go_content, re.MULTILINE)
+        if ldflags_match and not report["version_file"] and not hardcoded_match:
+            report["version_source"] = "ldflags"
+    else:
+        # version/version.go doesn't exist, check root for version.go
+        root_version_go = metadata.read("version.go")
+        if root_version_go is not None:
+            hardcoded_match = re.search(r'var\s+Version\s*=\s*["\']([^"\']+)["\']', root_version_go)
+            if hardcoded_match and not report["version_file"]:
+                report["version_source"] = "hardcoded"
+                report["current_version"] = hardcoded_match.group(1)
+    
+    # If we have a VERSION file and detected embed, recommend using it
+    if report["version_file"] and report["version_source"] == "file":
+        report["recommendation"] = "use_version_file"
+    
+    return report
+
+
+@dataclass(frozen=True)
+class _BuildOptions:
+    """Options of a single plugin build, shared by every target of a call.
+    
+    Public functions build one instance from their arguments and pass it to
+    _build_plugin_internal; per-run variations (e.g., a rebuild nonce) use
+    dataclasses.replace.
+    
+    Attributes:
+        git_source: Explicit git import path (auto-detected from go.mod if None)
+        version: Explicit plugin version
+        plugin_name: Explicit plugin name
+        use_version_file: Fall back to the VERSION file for the version
+        update_version_file: Write the version to the VERSION file before building
+        go_version: Explicit Go version
+        skip_normalization: git_source and plugin_name are already lowercase
+        resolved_go_version: Go version already resolved by the caller
+        resolved_git_source: Git source already resolved by the caller
+        force_rebuild: Mix a timestamp nonce into the build key
+        include: Include patterns replacing the default build context
+        exclude: Additional exclude patterns for the build context
+        vendored: Build from vendor/ (auto-detected if None)
+        images: Digest-pinned base images (loaded from the source lockfile if None)
+        reproducible: Remove all sources of nondeterminism from the build
+        rebuild_all: Pass -a to ignore the Go build cache
+        rebuild_nonce: Nonce overriding the force_rebuild timestamp
+        profile: Build profile (one of BUILD_PROFILES)
+        debug_symbols: Also link an unstripped debug binary (release profile)
+        workspace: Repository root holding the plugin and its local modules
+        plugin_dir: Plugin directory inside workspace
+    """
+    git_source: Optional[str] = None
+    version: Optional[str] = None
+    plugin_name: Optional[str] = None
+    use_version_file: bool = False
+    update_version_file: bool = False
+    go_version: Optional[str] = None
+    skip_normalization: bool = False
+    resolved_go_version: Optional[str] = None
+    resolved_git_source: Optional[str] = None
+    force_rebuild: bool = False
+    include: Optional[list[str]] = None
+    exclude: Optional[list[str]] = None
+    vendored: Optional[bool] = None
+    images: Optional[_ImagePins] = None
+    reproducible: bool = False
+    rebuild_all: bool = False
+    rebuild_nonce: Optional[str] = None
+    profile: str = "default"
+    debug_symbols: bool = False
+    workspace: Optional[dagger.Directory] = None
+    plugin_dir: Optional[str] = None
+
+
+async def _resolve_build_options(
+    source: dagger.Directory,
+    options: _BuildOptions,
+    image_lock: Optional[dagger.File] = None,
+    registry_mirror: Optional[str] = None,
+    tracer: Optional[_Tracer] = None,
+    require_version: bool = True,
+) -> tuple[dagger.Directory, _SourceMetadata, _BuildOptions, _Diagnostics]:
+    """Resolve the inputs shared by the build entry points once.
+    
+    Splits a repository root source into workspace and plugin directory,
+    probes the plugin's metadata, loads the image pins and raises the
+    problems only the source reveals. The git source (explicit or from
+    go.mod) and plugin name are normalized to lowercase with a warning, and
+    the Go version is resolved and reported. The returned options carry
+    these pre-resolved values, so builds skip their own resolution.
+    
+    Args:
+        source: Source directory passed to the entry point
+        options: Options holding the user inputs, with plugin_dir relative to source
+        image_lock: Explicitly provided image lockfile
+        registry_mirror: Optional registry mirror host
+        tracer: Tracer for the metadata and image lockfile spans
+        require_version: Also report a missing or invalid version
+        
+    Returns:
+        Tuple of (plugin source, metadata, resolved options, diagnostics)
+    """
+    if tracer is None:
+        tracer = _Tracer()
+    workspace, plugin_dir, source = _split_workspace(source, options.plugin_dir)
+    with tracer.span("metadata"):
+        metadata = await _get_source_metadata(source)
+    resolved_git_source, git_source_source, git_source_error = _resolve_git_source(metadata, options.git_source)
+    
+    with tracer.span("image.lock"):
+        images, lock_error = await _load_image_pins(metadata, image_lock, registry_mirror)
+    if require_version:
+        problems = _source_problems(metadata, options.git_source, options.version, options.use_version_file, lock_error)
+    else:
+        problems = [error for error in (lock_error, git_source_error) if error]
+    _raise_for_problems(problems)
+    
+    diagnostics = _Diagnostics()
+    if git_source_source == "gomod":
+        diagnostics.info(f"ℹ Using git-source from go.mod: {resolved_git_source}")
+    
+    # Normalize inputs once at the entry point to avoid duplicate warnings
+    normalized_git_source, git_source_changed = _normalize_to_lowercase(resolved_git_source)
+    if git_source_changed:
+        diagnostics.warning(_log_normalization_warning("git-source", resolved_git_source, normalized_git_source))
+    
+    normalized_plugin_name: Optional[str] = None
+    if options.plugin_name:
+        normalized_plugin_name, plugin_name_changed = _normalize_to_lowercase(options.plugin_name)
+        if plugin_name_changed:
+            diagnostics.warning(_log_normalization_warning("plugin-name", options.plugin_name, normalized_plugin_name))
+    
+    resolved_go_version, go_version_source = _resolve_go_version(metadata, options.go_version)
+    _report_go_version(diagnostics, metadata, resolved_go_version, go_version_source)
+    
+    options = replace(
+        options,
+        git_source=normalized_git_source,
+        plugin_name=normalized_plugin_name,
+        skip_normalization=True,
+        resolved_go_version=resolved_go_version,
+        resolved_git_source=normalized_git_source,
+        images=images,
+        workspace=workspace,
+        plugin_dir=plugin_dir,
+    )
+    return source, metadata, options, diagnostics
+
+
+@object_type
+class PackerPlugin:
+    """Automate Packer plugin builds and installations with proper versioning."""
+
+    # ========================================================================
+    # Version Detection Capability
+    # ========================================================================
+
+    @function
+    async def detect_version(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory (use --source=. for your project)")
+        ],
+    ) -> str:
+        """
+        Analyze plugin source code to detect how version information is managed.
+        
+        Returns JSON report with version_source, version_file, current_version,
+        and version_package fields.
+        
+        Args:
+            source: Plugin source directory containing Go code
+            
+        Returns:
+            JSON string with detection results
+        """
+        metadata = await _get_source_metadata(source)
+        return json.dumps(metadata.version_report, indent=2)
+
+    def _validate_version(self, version: str) -> tuple[bool, str]:
+        """Validate semantic version format.
+        
+        Args:
+            version: Version string to validate
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        return _validate_semver(version)
+
+    def _extract_plugin_name(self, dirname: str) -> tuple[str, bool]:
+        """Extract plugin name from directory name, normalized to lowercase.
+        
+        Args:
+            dirname: Directory name to parse
+            
+        Returns:
+            Tuple of (plugin_name, was_normalized) where plugin_name is lowercase
+            and was_normalized indicates if the original contained uppercase
+        """
+        return _plugin_name_from_dirname(dirname)
+
+    # ========================================================================
+    # Build Plugin Capability
+    # ========================================================================
+
+    async def _build_plugin_internal(
+        self,
+        source: dagger.Directory,
+        options: _BuildOptions,
+        target_os: str = "linux",
+        target_arch: str = "amd64",
+        metadata: Optional[_SourceMetadata] = None,
+        diagnostics: Optional[_Diagnostics] = None,
+        tracer: Optional[_Tracer] = None,
+        build_info: Optional[dict] = None,
+        portable_cache: Optional[dagger.Directory] = None,
+    ) -> dagger.Container:
+        """Internal build plugin implementation with pre-resolved values support and cross-compilation.
+        
+        The build itself is described by options (see _BuildOptions); the
+        remaining arguments select the target and carry per-call state.
+        Messages are recorded on the caller's diagnostics; when none are passed,
+        they are collected and emitted before returning. With an enabled tracer,
+        each container stage is evaluated inside its own span and compilation
+        is split from linking by a dependency-only compile step. rebuild_all passes `-a`
+        to ignore the Go build cache, and rebuild_nonce overrides the
+        force_rebuild timestamp (used to run independent builds concurrently).
+        With debug_symbols on the release profile, an unstripped copy of the
+        binary is also linked to /work/{binary}.debug. When build_info is
+        passed, the resolved build inputs are recorded in it for the build
+        manifest. A portable_cache seeds the Go cache volumes from its
+        tarballs before dependencies are downloaded. With a workspace, source
+        is its plugin_dir subdirectory and the build context also holds the
+        local modules the plugin uses, mounted at /workspace.
+        """
+        # Input-only problems are raised before any engine work. The one
+        # exception is the problems that need the probed source (git source
+        # from go.mod, VERSION file, derived plugin name, image lockfile):
+        # they are collected after the metadata probe and raised together
+        # before the build context is assembled or any container is started.
+        _raise_for_problems(_validate_build_inputs(
+            version=options.version,
+            git_source=options.git_source,
+            plugin_name=options.plugin_name,
+            platforms=[(target_os, target_arch)],
+            profile=options.profile,
+        ))
+        problems: list[str] = []
+        
+        emit_diagnostics = diagnostics is None
+        if diagnostics is None:
+            diagnostics = _Diagnostics()
+        if tracer is None:
+            tracer = _Tracer()
+        resolve_span = tracer.start("resolve", **{"goos": target_os, "goarch": target_arch})
+        
+        # Probe source metadata once (reuse the caller's probe if provided)
+        if metadata is None:
+            metadata = await _get_source_metadata(source)
+        
+        # Use digest-pinned base images from the source lockfile unless provided
+        images = options.images
+        if images is None:
+            images, lock_error = await _load_image_pins(metadata, None, None)
+            if lock_error:
+                problems.append(lock_error)
+        
+        # Resolve git_source (use pre-resolved if provided by build_and_install)
+        actual_git_source: Optional[str] = None
+        if options.resolved_git_source:
+            actual_git_source = options.resolved_git_source
+        else:
+            resolved_git_source_val, git_source_source, git_source_error = _resolve_git_source(metadata, options.git_source)
+            if git_source_error:
+                problems.append(git_source_error)
+            else:
+                actual_git_source = resolved_git_source_val
+                if git_source_source == "gomod":
+                    diagnostics.info(f"ℹ Using git-source from go.mod: {actual_git_source}")
+        
+        # Normalize git_source to lowercase (unless called from build_and_install with pre-normalized values)
+        if actual_git_source and not options.skip_normalization:
+            normalized_git_source, git_source_changed = _normalize_to_lowercase(actual_git_source)
+            if git_source_changed:
+                diagnostics.warning(_log_normalization_warning("git-source", actual_git_source, normalized_git_source))
+            actual_git_source = normalized_git_source
+        
+        # Resolve Go version (use pre-resolved if provided by build_and_install)
+        if options.resolved_go_version:
+            actual_go_version = options.resolved_go_version
+        else:
+            actual_go_version, version_source = _resolve_go_version(metadata, options.go_version)
+            _report_go_version(diagnostics, metadata, actual_go_version, version_source)
+        
+        # Detect version info
+        detection = metadata.version_report
+        
+        # Determine actual version to use; an explicit version takes precedence
+        actual_version, version_problems = _resolve_plugin_version(
+            metadata, options.version, options.use_version_file
+        )
+        problems.extend(version_problems)
+        
+        # Normalize and auto-detect plugin name
+        actual_plugin_name = ""
+        if options.plugin_name:
+            if not options.skip_normalization:
+                normalized_name, name_changed = _normalize_to_lowercase(options.plugin_name)
+                if name_changed:
+                    diagnostics.warning(_log_normalization_warning("plugin-name", options.plugin_name, normalized_name))
+                actual_plugin_name = normalized_name
+            else:
+                actual_plugin_name = options.plugin_name
+        elif actual_git_source:
+            # Auto-detect from git_source path (last segment)
+            git_parts = actual_git_source.rstrip("/").split("/")
+            dirname = git_parts[-1] if git_parts else "plugin"
+            actual_plugin_name, name_changed = self._extract_plugin_name(dirname)
+            # Note: warning for auto-detected names is suppressed since they come from normalized git_source
+            problems.extend(_validate_build_inputs(plugin_name=actual_plugin_name))
+        
+        _raise_for_problems(problems)
+        
+        # Determine binary name with Windows .exe extension handling
+        binary_name = f"packer-plugin-{actual_plugin_name}"
+        if target_os == "windows":
+            binary_name += ".exe"
+        
+        # Construct ldflags
+        # Always include VersionPrerelease= (empty to avoid -dev)
+        # Also set Version if explicitly provided
+        ldflags_parts = [
+            f"-X {actual_git_source}/version.Version={actual_version}",
+            f"-X {actual_git_source}/version.VersionPrerelease=",
+        ]
+        profile = options.profile
+        build_flags, profile_ldflags = _profile_build_args(
+            profile, actual_go_version, metadata.has_entry(PGO_PROFILE_FILE)
+        )
+        if "-pgo=auto" in build_flags:
+            diagnostics.info(f"ℹ Using profile-guided optimization from {PGO_PROFILE_FILE}")
+        # Debug binaries keep the symbol tables that release builds strip
+        debug_ldflags = " ".join(ldflags_parts + (REPRODUCIBLE_LDFLAGS if options.reproducible else []))
+        debug_symbols = options.debug_symbols
+        if debug_symbols and not profile_ldflags:
+            diagnostics.warning(f"⚠ Warning: debug symbols are only split out for the release profile; the {profile} binary keeps them")
+            debug_symbols = False
+        ldflags_parts.extend(profile_ldflags)
+        if options.reproducible:
+            # Pin every source of nondeterminism so identical inputs yield identical binaries
+            ldflags_parts.extend(REPRODUCIBLE_LDFLAGS)
+            build_flags.extend(REPRODUCIBLE_BUILD_FLAGS)
+        if options.rebuild_all:
+            build_flags.append("-a")
+        ldflags = " ".join(ldflags_parts)
+        
+        # Mount only Go-relevant inputs so unrelated changes don't bust the cache
+        workspace, plugin_dir = options.workspace, options.plugin_dir
+        if workspace is not None:
+            context, module_dirs, context_error = await _workspace_build_context(
+                workspace, plugin_dir, options.include, options.exclude
+            )
+            if context_error:
+                raise PluginValidationError([context_error])
+            if len(module_dirs) > 1:
+                diagnostics.info(f"ℹ Including local modules: {', '.join(module_dirs[1:])}")
+            context_mount = WORKSPACE_MOUNT_PATH
+            work_dir = posixpath.normpath(posixpath.join(WORKSPACE_MOUNT_PATH, plugin_dir))
+            binary_path = f"/work/{binary_name}"
+        else:
+            context = await _build_context(source, metadata, options.include, options.exclude)
+            outside = [path for path in (metadata.gomod.local_replacements if metadata.gomod else []) if path.startswith("..")]
+            if outside:
+                diagnostics.warning(
+                    f"⚠ Warning: go.mod replaces modules with directories outside the source ({', '.join(outside)}); "
+                    "pass the repository root as --source and the plugin directory as --plugin-dir"
+                )
+            context_mount = work_dir = "/work"
+            binary_path = binary_name
+        
+        # Content-addressed build key: unchanged inputs reuse the cached layers,
+        # force_rebuild mixes in a timestamp nonce to guarantee a fresh build
+        rebuild_nonce = options.rebuild_nonce
+        if options.force_rebuild and rebuild_nonce is None:
+            rebuild_nonce = str(int(time.time() * 1000))
+        source_digest = await context.digest()
+        cache_key = _compute_build_cache_key(
+            source_digest=source_digest,
+            go_version=actual_go_version,
+            ldflags=ldflags,
+            target_os=target_os,
+            target_arch=target_arch,
+            module_path=actual_git_source,
+            binary_name=binary_name,
+            rebuild_nonce=rebuild_nonce,
+            build_flags=build_flags,
+        )
+        if build_info is not None:
+            build_info.update({
+                "build_key": cache_key,
+                "source_digest": source_digest,
+                "go_version": actual_go_version,
+                "ldflags": ldflags,
+                "build_flags": build_flags,
+                "version": actual_version,
+            })
+        tracer.end(resolve_span, **{
+            "plugin.binary": binary_name,
+            "plugin.version": actual_version,
+            "go.version": actual_go_version,
+            "build.key": cache_key,
+        })
+        
+        golang_image = images.ref(f"golang:{actual_go_version}")
+        build_container = _with_go_caches(
+            dag.container().from_(golang_image),
+            actual_go_version,
+            target_os,
+            target_arch,
+        ).with_workdir(work_dir)
+        if workspace is not None:
+            # Artifacts are written to /work, next to the mounted workspace
+            build_container = build_container.with_directory("/work", dag.directory())
+        build_container = await tracer.stage("image.pull", build_container, image=golang_image)
+        
+        # Dependency stage: download modules with only go.mod/go.sum mounted, so
+        # this layer stays cached until dependencies change. Vendored builds
+        # compile against vendor/ and skip the download entirely.
+        vendored = options.vendored
+        if vendored is None:
+            vendored = metadata.has_entry("vendor")
+        if portable_cache is not None:
+            paths = _portable_cache_paths(
+                await _module_cache_key(context), actual_go_version, target_os, target_arch, cache_key
+            )
+            tarballs = [(paths["build_cache"], GO_BUILD_CACHE_PATH)]
+            if not vendored:
+                tarballs.insert(0, (paths["modules"], GO_MOD_CACHE_PATH))
+            build_container = await _with_portable_cache(build_container, portable_cache, tarballs, diagnostics)
+        if vendored:
+            build_container = build_container.with_env_variable("GOFLAGS", "-mod=vendor")
+        else:
+            build_container = (
+                build_container
+                .with_mounted_directory(context_mount, _go_module_files(context))
+                .with_exec(["go", "mod", "download"])
+            )
+            build_container = await tracer.stage("go.mod.download", build_container)
+        
+        # Compile stage on top of the dependency stage
+        build_container = (
+            build_container
+            .with_mounted_directory(context_mount, context)
+            .with_env_variable("CGO_ENABLED", "0")
+            .with_env_variable("GOOS", target_os)
+            .with_env_variable("GOARCH", target_arch)
+            .with_env_variable(BUILD_KEY_ENV, cache_key)
+            .with_env_variable(PLUGIN_VERSION_ENV, actual_version)
+            .with_env_variable(PLUGIN_BINARY_ENV, binary_name)
+        )
+        
+        # Update VERSION file if requested
+        if options.update_version_file and detection["version_file"]:
+            version_file_path = detection["version_file"]
+            build_container = build_container.with_exec([
+                "sh", "-c", f"echo '{actual_version}' > {version_file_path}"
+            ])
+        
+        if tracer.enabled:
+            # Compile every non-main dependency first so the go build below
+            # is (nearly) link-only and both phases can be timed separately
+            compile_flags = " ".join(shlex.quote(flag) for flag in build_flags)
+            build_container = await tracer.stage("go.compile", build_container.with_exec([
+                "sh", "-c",
+                "pkgs=$(go list -deps -f '{{if ne .Name \"main\"}}{{.ImportPath}}{{end}}' .) && "
+                f"{{ [ -z \"$pkgs\" ] || go build {compile_flags} $pkgs; }}",
+            ]))
+        
+        # Run go build
+        build_command = [
+            "go", "build",
+            *build_flags,
+            f"-ldflags={ldflags}",
+            "-o", binary_path,
+            ".",
+        ]
+        if (target_os, target_arch) == await _native_platform():
+            # The binary can run here: describe it in the same exec (see
+            # _describe_native); a failing describe leaves the file empty
+            build_command = [
+                "sh", "-c",
+                f'"$@" && {{ {shlex.quote(f"/work/{binary_name}")} describe > {PLUGIN_DESCRIPTION_PATH} || true; }}',
+                "sh", *build_command,
+            ]
+        build_container = build_container.with_exec(build_command)
+        build_container = await tracer.stage("go.link", build_container, profile=profile)
+        if debug_symbols:
+            # Relink without -s -w; packages come from the build cache
+            build_container = build_container.with_exec([
+                "go", "build",
+                *build_flags,
+                f"-ldflags={debug_ldflags}",
+                "-o", f"{binary_path}.debug",
+                ".",
+            ])
+            build_container = await tracer.stage("go.link.debug", build_container)
+        
+        if emit_diagnostics:
+            diagnostics.emit()
+        
+        return build_container
+
+    @function
+    async def build_binary(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory containing Go code (use --source=. for your project)")
+        ],
+        git_source: Annotated[
+            Optional[str],
+            Doc("Git path for the plugin. Auto-detected from go.mod if not provided. Automatically normalized to lowercase.")
+        ] = None,
+        version: Annotated[
+            Optional[str],
+            Doc("Semantic version (e.g., 1.0.10). Required unless use_version_file is true")
+        ] = None,
+        plugin_name: Annotated[
+            Optional[str],
+            Doc("Plugin name override (auto-detected from directory name if not provided). Automatically normalized to lowercase.")
+        ] = None,
+        use_version_file: Annotated[
+            bool,
+            Doc("Use VERSION file from source as version (default: false)")
+        ] = False,
+        update_version_file: Annotated[
+            bool,
+            Doc("Update VERSION file with provided version before build (default: false)")
+        ] = False,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for building. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
+        ] = None,
+        target_os: Annotated[
+            str,
+            Doc("Target operating system for cross-compilation (default: linux)")
+        ] = "linux",
+        target_arch: Annotated[
+            str,
+            Doc("Target CPU architecture for cross-compilation (default: amd64)")
+        ] = "amd64",
+        force_rebuild: Annotated[
+            bool,
+            Doc("Ignore cached build layers and rebuild from scratch (default: false)")
+        ] = False,
+        include: Annotated[
+            Optional[list[str]],
+            Doc("Source include patterns replacing the Go-relevant defaults (go:embed targets are always included)")
+        ] = None,
+        exclude: Annotated[
+            Optional[list[str]],
+            Doc("Additional source exclude patterns for the build context")
+        ] = None,
+        vendored: Annotated[
+            Optional[bool],
+            Doc("Build from vendor/ with -mod=vendor instead of downloading modules (auto-detected if not provided)")
+        ] = None,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Image lockfile pinning base images to digests (default: {IMAGE_LOCK_FILE} in source, if present)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+        reproducible: Annotated[
+            bool,
+            Doc("Build bit-identical binaries with -trimpath, -buildvcs=false and an empty build ID (default: false)")
+        ] = False,
+        profile: Annotated[
+            str,
+            Doc("Build profile: default, dev (fast compiles) or release (-s -w, PGO from default.pgo) (default: default)")
+        ] = "default",
+        debug_symbols: Annotated[
+            bool,
+            Doc("With the release profile, also produce an unstripped debug binary (default: false)")
+        ] = False,
+        trace: Annotated[
+            bool,
+            Doc(f"Record per-stage timing spans and write them as OTLP/JSON to {TRACE_FILE} in the output (default: false)")
+        ] = False,
+        otlp_endpoint: Annotated[
+            Optional[str],
+            Doc("OTLP/HTTP collector to send the timing spans to (e.g., http://localhost:4318)")
+        ] = None,
+        plugin_dir: Annotated[
+            Optional[str],
+            Doc("Plugin directory inside source when source is a repository root; only the plugin and the local modules it uses are mounted")
+        ] = None,
+    ) -> dagger.Container:
+        """
+        Build only the raw Go binary for a Packer plugin (intermediate/development use).
+        
+        This function compiles the plugin binary with proper ldflags that clear VersionPrerelease
+        to avoid -dev suffixes. It returns a container with only the compiled binary - no checksums
+        or metadata files. This is useful for development workflows or when you need just the binary.
+        
+        For production use, consider using build_artifacts() instead, which creates the complete
+        plugin package (binary + checksum + metadata) ready for distribution or installation.
+        
+        Supports cross-compilation by setting GOOS and GOARCH environment variables.
+        When building for Windows (target_os=windows), the binary will have .exe extension.
+        
+        Git source is determined by priority:
+        1. Explicit --git-source parameter
+        2. Auto-detected from go.mod module path
+        3. Error (git-source is required)
+        
+        Go version is determined by priority:
+        1. Explicit --go-version parameter
+        2. .go-version file in source directory
+        3. toolchain directive in go.mod
+        4. go directive in go.mod
+        5. Default fallback (1.21)
+        
+        Note: git_source and plugin_name are automatically normalized to lowercase
+        per HashiCorp Packer's requirements. A warning is output if normalization occurs.
+        
+        Args:
+            source: Plugin source directory
+            git_source: Git import path for ldflags (auto-detected from go.mod if not provided)
+            version: Semantic version string
+            plugin_name: Override auto-detected plugin name
+            use_version_file: Read version from VERSION file
+            update_version_file: Update VERSION file before build
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            target_os: Target OS for cross-compilation (linux, darwin, windows)
+            target_arch: Target architecture for cross-compilation (amd64, arm64, 386)
+            force_rebuild: Bypass the content-addressed build cache
+            include: Include patterns for the build context (default: Go-relevant files)
+            exclude: Additional exclude patterns for the build context
+            vendored: Use vendor/ instead of the module download stage
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            reproducible: Remove all sources of nondeterminism from the build
+            profile: Build profile (default, dev, release)
+            debug_symbols: Produce a separate unstripped debug binary (release profile)
+            trace: Write per-stage timing spans to the output
+            otlp_endpoint: OTLP/HTTP collector for the timing spans
+            plugin_dir: Plugin directory inside a repository root source
             
-            # Check for ldflags pattern (var Version string without initialization)
-            ldflags_match = re.search(r'var\s+Version\s+string\s*$', version_go_content, re.MULTILINE)
-            if ldflags_match and not report["version_file"] and not hardcoded_match:
-                report["version_source"] = "ldflags"
-                
-        except Exception:
-            # version/version.go doesn't exist, check root for version.go
-            try:
-                root_version_go = await source.file("version.go").contents()
-                hardcoded_match = re.search(r'var\s+Version\s*=\s*["\']([^"\']+)["\']', root_version_go)
-                if hardcoded_match and not report["version_file"]:
-                    report["version_source"] = "hardcoded"
-                    report["current_version"] = hardcoded_match.group(1)
-            except Exception:
-                pass
+        Returns:
+            Container with built plugin binary at /work/packer-plugin-{name}[.exe]
+            (and the trace at /trace.json when tracing)
+        """
+        _raise_for_problems(_validate_build_inputs(
+            version=version,
+            git_source=git_source,
+            plugin_name=plugin_name,
+            platforms=[(target_os, target_arch)],
+            profile=profile,
+        ))
+        workspace, plugin_dir, source = _split_workspace(source, plugin_dir)
+        tracer = _Tracer(enabled=trace or bool(otlp_endpoint))
+        with tracer.span("build_binary", goos=target_os, goarch=target_arch):
+            with tracer.span("metadata"):
+                metadata = await _get_source_metadata(source)
+                images, lock_error = await _load_image_pins(metadata, image_lock, registry_mirror)
+            _raise_for_problems(_source_problems(metadata, git_source, version, use_version_file, lock_error))
+            
+            options = _BuildOptions(
+                git_source=git_source,
+                version=version,
+                plugin_name=plugin_name,
+                use_version_file=use_version_file,
+                update_version_file=update_version_file,
+                go_version=go_version,
+                force_rebuild=force_rebuild,
+                include=include,
+                exclude=exclude,
+                vendored=vendored,
+                images=images,
+                reproducible=reproducible,
+                profile=profile,
+                debug_symbols=debug_symbols,
+                workspace=workspace,
+                plugin_dir=plugin_dir,
+            )
+            build_container = await self._build_plugin_internal(
+                source=source,
+                options=options,
+                target_os=target_os,
+                target_arch=target_arch,
+                metadata=metadata,
+                tracer=tracer,
+            )
+        if not tracer.enabled:
+            return build_container
+        
+        diagnostics = _Diagnostics()
+        payload = await _finish_trace(tracer, otlp_endpoint, diagnostics)
+        diagnostics.emit()
+        if trace:
+            build_container = build_container.with_new_file(f"/{TRACE_FILE}", payload)
+        return build_container
+
+    @function
+    async def verify_reproducible(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory")
+        ],
+        git_source: Annotated[
+            Optional[str],
+            Doc("Git import path for ldflags (auto-detected from go.mod if not provided)")
+        ] = None,
+        version: Annotated[
+            Optional[str],
+            Doc("Semantic version (e.g., 1.0.10). Required unless use_version_file is true")
+        ] = None,
+        plugin_name: Annotated[
+            Optional[str],
+            Doc("Plugin name override (auto-detected from directory name if not provided)")
+        ] = None,
+        use_version_file: Annotated[
+            bool,
+            Doc("Use VERSION file from source as version (default: false)")
+        ] = False,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for building. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
+        ] = None,
+        target_os: Annotated[
+            str,
+            Doc("Target operating system for cross-compilation (default: linux)")
+        ] = "linux",
+        target_arch: Annotated[
+            str,
+            Doc("Target CPU architecture for cross-compilation (default: amd64)")
+        ] = "amd64",
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Image lockfile pinning base images to digests (default: {IMAGE_LOCK_FILE} in source, if present)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+    ) -> str:
+        """
+        Verify that reproducible builds of a plugin are bit-identical.
+        
+        Builds the plugin twice in parallel in reproducible mode. Both builds
+        bypass the build cache and pass `-a` so every package is recompiled,
+        then the SHA256 digests of the two binaries are compared.
+        
+        Args:
+            source: Plugin source directory
+            git_source: Git import path for ldflags (auto-detected from go.mod if not provided)
+            version: Semantic version string
+            plugin_name: Override auto-detected plugin name
+            use_version_file: Read version from VERSION file
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            target_os: Target OS for cross-compilation (linux, darwin, windows)
+            target_arch: Target architecture for cross-compilation (amd64, arm64, 386)
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            
+        Returns:
+            JSON report with the binary name, both digests and whether they match
+        """
+        _raise_for_problems(_validate_build_inputs(
+            version=version,
+            git_source=git_source,
+            plugin_name=plugin_name,
+            platforms=[(target_os, target_arch)],
+        ))
+        metadata = await _get_source_metadata(source)
+        images, lock_error = await _load_image_pins(metadata, image_lock, registry_mirror)
+        _raise_for_problems(_source_problems(metadata, git_source, version, use_version_file, lock_error))
+        
+        diagnostics = _Diagnostics()
+        nonce = str(int(time.time() * 1000))
+        options = _BuildOptions(
+            git_source=git_source,
+            version=version,
+            plugin_name=plugin_name,
+            use_version_file=use_version_file,
+            go_version=go_version,
+            force_rebuild=True,
+            images=images,
+            reproducible=True,
+            rebuild_all=True,
+        )
+        
+        async def build_once(run: int) -> tuple[str, str]:
+            container = await self._build_plugin_internal(
+                source=source,
+                # Distinct nonces keep the two builds from being deduplicated
+                options=replace(options, rebuild_nonce=f"{nonce}-{run}"),
+                target_os=target_os,
+                target_arch=target_arch,
+                metadata=metadata,
+                diagnostics=diagnostics,
+            )
+            binary_name = await container.env_variable(PLUGIN_BINARY_ENV)
+            digest = await _sha256_file(container.file(f"/work/{binary_name}"))
+            return binary_name, digest
+        
+        (binary_name, first), (_, second) = await asyncio.gather(build_once(1), build_once(2))
+        if first == second:
+            diagnostics.info(f"ℹ Reproducible: {binary_name} sha256 {first}")
+        else:
+            diagnostics.warning(f"⚠ Warning: {binary_name} is not reproducible ({first} != {second})")
+        diagnostics.emit()
+        
+        return json.dumps({
+            "reproducible": first == second,
+            "binary": binary_name,
+            "sha256": [first, second],
+        }, indent=2)
+
+    @function
+    async def test_plugin(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory")
+        ],
+        shards: Annotated[
+            int,
+            Doc("Number of parallel go test containers (default: 4)")
+        ] = DEFAULT_TEST_SHARDS,
+        packages: Annotated[
+            Optional[list[str]],
+            Doc("Package patterns to test (default: ./...)")
+        ] = None,
+        test_flags: Annotated[
+            Optional[list[str]],
+            Doc("Additional go test flags (e.g., -short, -run=TestBuilder)")
+        ] = None,
+        timings: Annotated[
+            Optional[dagger.File],
+            Doc("Previous test-output.json used to balance shards by package duration")
+        ] = None,
+        git_source: Annotated[
+            Optional[str],
+            Doc("Git import path of the plugin module. Auto-detected from go.mod if not provided.")
+        ] = None,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for the container image. Auto-detected from .go-version or go.mod if not provided.")
+        ] = None,
+        include: Annotated[
+            Optional[list[str]],
+            Doc("Include patterns for the test context, replacing the Go-relevant defaults")
+        ] = None,
+        exclude: Annotated[
+            Optional[list[str]],
+            Doc("Additional exclude patterns for the test context")
+        ] = None,
+        vendored: Annotated[
+            Optional[bool],
+            Doc("Use vendor/ instead of downloading modules (default: auto-detect vendor/)")
+        ] = None,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Lockfile with digest-pinned base images (default: {IMAGE_LOCK_FILE} in the source)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry mirror host to pull base images through (e.g., mirror.example.com)")
+        ] = None,
+        plugin_dir: Annotated[
+            Optional[str],
+            Doc("Plugin directory inside --source, which is then the repository root with local modules")
+        ] = None,
+    ) -> dagger.Directory:
+        """
+        Run the plugin's Go tests in parallel shards.
+        
+        Tests run on the engine's native platform with the same Go version,
+        module cache and build cache volumes as the plugin build, so packages
+        compiled for the build are reused and Go's test result cache skips
+        unchanged packages. Packages with tests are split across shards by
+        their duration in a previous run (--timings), longest first. The
+        output directory holds:
+        
+            test-output.json  merged `go test -json` events of every shard
+            test-report.json  per-package status and the shard assignment
+        
+        Failing tests do not fail the call; check `failed` in test-report.json.
+        
+        Args:
+            source: Plugin source directory
+            shards: Maximum number of parallel test containers
+            packages: Package patterns passed to go list and go test
+            test_flags: Additional go test flags
+            timings: Previous test-output.json for duration-based sharding
+            git_source: Git import path (auto-detected from go.mod if not provided)
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            include: Include patterns for the test context (default: Go-relevant files and testdata/)
+            exclude: Additional exclude patterns for the test context
+            vendored: Use vendor/ instead of the module download stage
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            plugin_dir: Plugin directory inside a repository root source
+            
+        Returns:
+            Directory with test-output.json and test-report.json
+            
+        Example:
+            dagger call test-plugin \\
+              --source=. \\
+              --shards=8 \\
+              --timings=./dist/test-output.json \\
+              export --path=./dist
+        """
+        problems = _validate_build_inputs(git_source=git_source)
+        if shards < 1:
+            problems.append("shards must be at least 1")
+        _raise_for_problems(problems)
+        
+        source, metadata, options, diagnostics = await _resolve_build_options(
+            source,
+            _BuildOptions(
+                git_source=git_source,
+                go_version=go_version,
+                include=include,
+                exclude=exclude,
+                vendored=vendored,
+                plugin_dir=plugin_dir,
+            ),
+            image_lock=image_lock,
+            registry_mirror=registry_mirror,
+            require_version=False,
+        )
+        workspace, plugin_dir = options.workspace, options.plugin_dir
+        resolved_go_version, images = options.resolved_go_version, options.images
+        
+        # Test context: the build context plus test files and testdata/
+        if workspace is not None:
+            context, _, context_error = await _workspace_build_context(
+                workspace, plugin_dir, include, exclude, tests=True
+            )
+            if context_error:
+                raise PluginValidationError([context_error])
+            context_mount = WORKSPACE_MOUNT_PATH
+            work_dir = posixpath.normpath(posixpath.join(WORKSPACE_MOUNT_PATH, plugin_dir))
+        else:
+            context = await _build_context(source, metadata, include, exclude, tests=True)
+            context_mount = work_dir = "/work"
+        
+        # Tests execute, so they run natively and share the native build's cache volumes
+        native_os, native_arch = await _native_platform()
+        container = _with_go_caches(
+            dag.container().from_(images.ref(f"golang:{resolved_go_version}")),
+            resolved_go_version,
+            native_os,
+            native_arch,
+        ).with_workdir(work_dir)
+        if vendored is None:
+            vendored = metadata.has_entry("vendor")
+        if vendored:
+            container = container.with_env_variable("GOFLAGS", "-mod=vendor")
+        else:
+            container = (
+                container
+                .with_mounted_directory(context_mount, _go_module_files(context))
+                .with_exec(["go", "mod", "download"])
+            )
+        # Same cgo setting as the build, so its compiled packages are reused
+        container = (
+            container
+            .with_mounted_directory(context_mount, context)
+            .with_env_variable("CGO_ENABLED", "0")
+        )
+        
+        patterns = list(packages or ["./..."])
+        listed = await container.with_exec([
+            "go", "list", "-e", "-f", "{{if or .TestGoFiles .XTestGoFiles}}{{.ImportPath}}{{end}}", *patterns,
+        ]).stdout()
+        test_packages = [line.strip() for line in listed.splitlines() if line.strip()]
+        
+        durations = _package_durations(await timings.contents() if timings else None)
+        assignment = _shard_packages(test_packages, durations, shards) if test_packages else []
+        
+        async def run_shard(shard: list[str]) -> tuple[str, str, int]:
+            # Test failures exit non-zero; keep the output and merge it
+            shard_container = container.with_exec(
+                ["go", "test", "-json", *(test_flags or []), *shard],
+                expect=dagger.ReturnType.ANY,
+            )
+            stdout, stderr, exit_code = await asyncio.gather(
+                shard_container.stdout(), shard_container.stderr(), shard_container.exit_code()
+            )
+            return stdout, stderr, exit_code
+        
+        shard_results = await asyncio.gather(*(run_shard(shard) for shard in assignment))
+        events, results = _merge_test_events([stdout for stdout, _, _ in shard_results])
+        
+        shard_report = []
+        for index, (shard, (_, stderr, exit_code)) in enumerate(zip(assignment, shard_results)):
+            for package in shard:
+                if package not in results and exit_code != 0:
+                    # No final event: the package failed to build
+                    results[package] = {"status": "fail", "elapsed": 0.0}
+            entry = {"index": index, "packages": shard, "exit_code": exit_code}
+            if exit_code != 0 and stderr.strip():
+                entry["stderr"] = stderr.strip().splitlines()[-1]
+            shard_report.append(entry)
+        
+        failed = sorted(p for p, result in results.items() if result["status"] == "fail")
+        passed = sum(1 for result in results.values() if result["status"] == "pass")
+        skipped = sum(1 for result in results.values() if result["status"] == "skip")
+        for package in failed:
+            diagnostics.warning(f"⚠ Warning: tests failed in {package}")
+        diagnostics.info(
+            f"ℹ Tests: {passed} passed, {len(failed)} failed, {skipped} skipped "
+            f"in {len(assignment)} shard(s)"
+        )
+        diagnostics.emit()
+        
+        report = {
+            "module": options.git_source,
+            "go_version": resolved_go_version,
+            "platform": f"{native_os}/{native_arch}",
+            "passed": not failed and all(entry["exit_code"] == 0 for entry in shard_report),
+            "failed": failed,
+            "packages": dict(sorted(results.items())),
+            "shards": shard_report,
+        }
+        return (
+            dag.directory()
+            .with_new_file(TEST_OUTPUT_FILE, "".join(f"{line}\n" for line in events))
+            .with_new_file(TEST_REPORT_FILE, json.dumps(report, indent=2) + "\n")
+        )
+
+    @function
+    async def validate_templates(
+        self,
+        plugins: Annotated[
+            dagger.Directory,
+            Doc("Installed plugin directory (from build_artifacts, build_matrix, dev_install or install_plugin)")
+        ],
+        templates: Annotated[
+            dagger.Directory,
+            Doc("Directory of Packer templates (*.pkr.hcl directories or files, *.pkr.json files)")
+        ],
+        git_source: Annotated[
+            str,
+            Doc("Git path the plugin is installed under (e.g., github.com/user/packer-plugin-example). Automatically normalized to lowercase.")
+        ],
+        build: Annotated[
+            bool,
+            Doc("Also run packer build (for templates with null or local sources) (default: false)")
+        ] = False,
+        variables: Annotated[
+            Optional[list[str]],
+            Doc("Template variables as name=value, passed with -var")
+        ] = None,
+        concurrency: Annotated[
+            int,
+            Doc(f"Maximum number of templates checked at once (default: {DEFAULT_BATCH_CONCURRENCY})")
+        ] = DEFAULT_BATCH_CONCURRENCY,
+        packer_version: Annotated[
+            str,
+            Doc("Packer image version to use (default: latest)")
+        ] = "latest",
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc("Image lockfile pinning the Packer image to a digest")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull the Packer image from instead of its original registry (e.g., localhost:5000)")
+        ] = None,
+    ) -> str:
+        """
+        Validate Packer templates against an installed plugin, concurrently.
+        
+        The installed plugin is placed in the Packer plugin directory of a
+        Packer container, where `packer init` finds it instead of downloading
+        a release. Each template then runs `packer init` and `packer validate`
+        (and `packer build` with --build) in its own container, with at most
+        --concurrency templates at once. Failing templates do not stop the
+        others.
+        
+        The plugins directory must contain a binary for the engine's native
+        platform, since Packer executes it. Binaries are found at any depth,
+        so the output of build_artifacts, build_matrix and dev_install can be
+        passed as is.
+        
+        Args:
+            plugins: Installed plugin directory
+            templates: Directory of Packer templates
+            git_source: Git path the plugin is installed under
+            build: Also run packer build
+            variables: Template variables (name=value)
+            concurrency: Maximum number of concurrent templates
+            packer_version: Packer container image version
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            
+        Returns:
+            JSON report with each template's status, failing phase and duration
+            
+        Example:
+            dagger call validate-templates \\
+              --plugins=./dist \\
+              --templates=./example \\
+              --git-source=github.com/user/packer-plugin-example
+        """
+        problems = _validate_build_inputs(git_source=git_source)
+        if concurrency < 1:
+            problems.append("concurrency must be at least 1")
+        _raise_for_problems(problems)
+        
+        git_source, _ = _normalize_to_lowercase(git_source)
+        install_source = _strip_plugin_prefix_from_source(git_source)
+        native_os, native_arch = await _native_platform()
+        
+        plugin_paths, hcl_paths, json_paths = await asyncio.gather(
+            plugins.glob("**/packer-plugin-*"),
+            templates.glob("**/*.pkr.hcl"),
+            templates.glob("**/*.pkr.json"),
+        )
+        plugin_files = _installed_plugin_files(plugin_paths)
+        if not any(path.endswith(f"_{native_os}_{native_arch}") for path in plugin_files):
+            problems.append(f"no installed plugin binary for {native_os}/{native_arch} in --plugins")
+        template_list = _discover_templates(hcl_paths + json_paths)
+        if not template_list:
+            problems.append("no Packer templates (*.pkr.hcl, *.pkr.json) found in --templates")
+        images, lock_error = await _load_image_pins(None, image_lock, registry_mirror)
+        if lock_error:
+            problems.append(lock_error)
+        _raise_for_problems(problems)
+        
+        # Flatten nested layouts into the directory Packer reads for the source
+        installed = dag.directory()
+        for path in plugin_files:
+            installed = installed.with_file(posixpath.basename(path), plugins.file(path))
+        
+        packer_image = images.ref(f"hashicorp/packer:{packer_version}")
+        base = (
+            dag.container().from_(packer_image)
+            .with_directory(f"/root/.config/packer/plugins/{install_source}", installed)
+            .with_directory("/templates", templates)
+            .with_env_variable("CHECKPOINT_DISABLE", "1")
+        )
+        var_args = [arg for variable in variables or [] for arg in ("-var", variable)]
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def check(template: str) -> dict:
+            # Directories hold a multi-file template; files are checked on their own
+            if template.endswith((".pkr.hcl", ".pkr.json")):
+                work_dir, target = posixpath.dirname(template), posixpath.basename(template)
+            else:
+                work_dir, target = template, "."
+            phases = list(TEMPLATE_PHASES) + (["build"] if build else [])
+            if target.endswith(".pkr.json"):
+                # packer init only reads HCL2 templates
+                phases.remove("init")
+            
+            async with semaphore:
+                started = time.monotonic()
+                container = base.with_workdir(posixpath.join("/templates", work_dir))
+                status = {"template": template, "status": "passed", "phases": {}}
+                for phase in phases:
+                    phase_started = time.monotonic()
+                    args = ["packer", phase] + (var_args if phase != "init" else []) + [target]
+                    container = container.with_exec(args, expect=dagger.ReturnType.ANY)
+                    exit_code = await container.exit_code()
+                    status["phases"][phase] = round(time.monotonic() - phase_started, 3)
+                    if exit_code != 0:
+                        output = await container.stderr() or await container.stdout()
+                        lines = [line.strip() for line in output.splitlines() if line.strip()]
+                        status.update({
+                            "status": "failed",
+                            "phase": phase,
+                            "error": lines[-1] if lines else f"packer {phase} exited with {exit_code}",
+                        })
+                        break
+                status["duration_seconds"] = round(time.monotonic() - started, 3)
+                return status
+        
+        report = await asyncio.gather(*(check(template) for template in template_list))
+        failed = [status for status in report if status["status"] == "failed"]
+        diagnostics = _Diagnostics()
+        for status in failed:
+            diagnostics.warning(f"⚠ Warning: {status['template']} failed packer {status['phase']}: {status['error']}")
+        diagnostics.info(f"ℹ Validated {len(report) - len(failed)}/{len(report)} templates")
+        diagnostics.emit()
+        
+        return json.dumps({
+            "plugin": install_source,
+            "packer_image": packer_image,
+            "passed": len(report) - len(failed),
+            "failed": len(failed),
+            "templates": report,
+        }, indent=2)
+
+    @function
+    async def package_release(
+        self,
+        binaries: Annotated[
+            dagger.Directory,
+            Doc("Installed plugin binaries (output of build_artifacts or build_matrix)")
+        ],
+    ) -> dagger.Directory:
+        """
+        Package installed plugin binaries as release archives.
+        
+        Produces the layout HashiCorp release tooling (and GoReleaser-based
+        plugin releases) use: one zip per platform holding the binary, a
+        combined SHA256SUMS file over the zips and a manifest.json
+        describing every archive.
         
-        # If we have a VERSION file and detected embed, recommend using it
-        if report["version_file"] and report["version_source"] == "file":
-            report["recommendation"] = "use_version_file"
+            packer-plugin-{name}_v{version}_x5.0_{os}_{arch}.zip
+            packer-plugin-{name}_v{version}_SHA256SUMS
+            manifest.json
         
-        return json.dumps(report, indent=2)
-
-    def _validate_version(self, version: str) -> tuple[bool, str]:
-        """Validate semantic version format.
+        Binaries are exported, zipped and hashed concurrently in the module
+        runtime with streaming, chunked reads and writes, so memory use does
+        not grow with binary size.
         
         Args:
-            version: Version string to validate
+            binaries: Directory with installed plugin binaries
             
         Returns:
-            Tuple of (is_valid, error_message)
+            Directory with the release archives, SHA256SUMS and manifest.json
+            
+        Example:
+            dagger call package-release \\
+              --binaries=./dist \\
+              export --path=./release
         """
-        # Check for v prefix
-        if version.startswith("v"):
-            return False, f"Version '{version}' should not have 'v' prefix. Use '{version[1:]}' instead."
-        
-        # Basic semver pattern
-        semver_pattern = r'^(\d+)\.(\d+)\.(\d+)(-[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?(\+[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?$'
-        if not re.match(semver_pattern, version):
-            return False, f"Version '{version}' is not valid semantic versioning. Use format: MAJOR.MINOR.PATCH (e.g., 1.0.0)"
+        names = [name for name in await binaries.entries() if not name.endswith("/")]
+        artifacts = {name: info for name in names if (info := _parse_installed_binary_name(name))}
+        if not artifacts:
+            raise PluginValidationError(["no installed plugin binaries (packer-plugin-{name}_v{version}_x5.0_{os}_{arch}) found"])
+        releases = {(info["name"], info["version"], info["api_version"]) for info in artifacts.values()}
+        if len(releases) > 1:
+            found = ", ".join(f"{n} v{v} ({a})" for n, v, a in sorted(releases))
+            raise PluginValidationError([f"binaries belong to more than one release: {found}"])
+        plugin_name, version, api_version = releases.pop()
         
-        return True, ""
-
-    def _extract_plugin_name(self, dirname: str) -> tuple[str, bool]:
-        """Extract plugin name from directory name, normalized to lowercase.
-        
-        Args:
-            dirname: Directory name to parse
+        with tempfile.TemporaryDirectory() as scratch:
+            async def package(binary_name: str) -> dict:
+                info = artifacts[binary_name]
+                archive_name = f"packer-plugin-{plugin_name}_v{version}_{api_version}_{info['os']}_{info['arch']}.zip"
+                binary_path = os.path.join(scratch, binary_name)
+                await binaries.file(binary_name).export(binary_path)
+                binary_sha256, archive_sha256 = await asyncio.to_thread(
+                    _write_release_archive, binary_path, os.path.join(scratch, archive_name), binary_name
+                )
+                os.remove(binary_path)
+                return {
+                    "os": info["os"],
+                    "arch": info["arch"],
+                    "filename": archive_name,
+                    "sha256": archive_sha256,
+                    "binary": binary_name,
+                    "binary_sha256": binary_sha256,
+                }
             
-        Returns:
-            Tuple of (plugin_name, was_normalized) where plugin_name is lowercase
-            and was_normalized indicates if the original contained uppercase
-        """
-        # Strip packer-plugin- prefix if present (case-insensitive check)
-        dirname_lower = dirname.lower()
-        if dirname_lower.startswith("packer-plugin-"):
-            name = dirname[14:]  # len("packer-plugin-") == 14
-        else:
-            name = dirname
+            entries = sorted(
+                await asyncio.gather(*(package(name) for name in artifacts)),
+                key=lambda entry: entry["filename"],
+            )
+            sums_name = f"packer-plugin-{plugin_name}_v{version}_SHA256SUMS"
+            manifest = {
+                "name": plugin_name,
+                "version": version,
+                "protocol_version": api_version,
+                "checksums": sums_name,
+                "archives": entries,
+            }
+            # The engine only loads runtime files from the module's working
+            # directory, so the finished archives (and nothing else) are staged
+            # there under unique names until they have been loaded
+            workdir = dag.current_module()
+            staged: list[str] = []
+            release = dag.directory()
+            try:
+                for entry in entries:
+                    staged_name = f".{os.path.basename(scratch)}-{entry['filename']}"
+                    shutil.move(os.path.join(scratch, entry["filename"]), staged_name)
+                    staged.append(staged_name)
+                    release = release.with_file(entry["filename"], workdir.workdir_file(staged_name))
+                release = (
+                    release
+                    .with_new_file(sums_name, "".join(f"{e['sha256']}  {e['filename']}\n" for e in entries))
+                    .with_new_file(RELEASE_MANIFEST_FILE, json.dumps(manifest, indent=2) + "\n")
+                )
+                release = await release.sync()
+            finally:
+                for staged_name in staged:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(staged_name)
         
-        # Normalize to lowercase
-        normalized, was_changed = _normalize_to_lowercase(name)
-        return normalized, was_changed
-
-    # ========================================================================
-    # Build Plugin Capability
-    # ========================================================================
+        diagnostics = _Diagnostics()
+        diagnostics.info(f"ℹ Packaged {len(entries)} archives for packer-plugin-{plugin_name} v{version}")
+        diagnostics.emit()
+        return release
 
-    async def _build_plugin_internal(
+    @function
+    async def go_cache(
         self,
-        source: dagger.Directory,
-        git_source: Optional[str],
-        version: Optional[str],
-        plugin_name: Optional[str],
-        use_version_file: bool,
-        update_version_file: bool,
-        go_version: Optional[str],
-        skip_normalization: bool,
-        resolved_go_version: Optional[str],
-        resolved_git_source: Optional[str],
-        target_os: str = "linux",
-        target_arch: str = "amd64",
-    ) -> dagger.Container:
-        """Internal build plugin implementation with pre-resolved values support and cross-compilation."""
-        warnings: list[str] = []
-        
-        # Resolve git_source (use pre-resolved if provided by build_and_install)
-        if resolved_git_source:
-            actual_git_source = resolved_git_source
-        else:
-            resolved_git_source_val, git_source_source, git_source_error = await _resolve_git_source(source, git_source)
-            if git_source_error:
-                return dag.container().from_("alpine:latest").with_exec([
-                    "sh", "-c",
-                    f"echo '✗ Error: {git_source_error}' && exit 1"
-                ])
-            actual_git_source = resolved_git_source_val
-            if git_source_source == "gomod":
-                warnings.append(f"ℹ Using git-source from go.mod: {actual_git_source}")
-        
-        # Normalize git_source to lowercase (unless called from build_and_install with pre-normalized values)
-        if not skip_normalization:
-            normalized_git_source, git_source_changed = _normalize_to_lowercase(actual_git_source)
-            if git_source_changed:
-                warnings.append(_log_normalization_warning("git-source", actual_git_source, normalized_git_source))
-            actual_git_source = normalized_git_source
-        
-        # Resolve Go version (use pre-resolved if provided by build_and_install)
-        if resolved_go_version:
-            actual_go_version = resolved_go_version
-        else:
-            actual_go_version, version_source = await _resolve_go_version(source, go_version)
-            if version_source == "file":
-                warnings.append(f"ℹ Using Go {actual_go_version} from .go-version file")
+        source: Annotated[
+            Optional[dagger.Directory],
+            Doc("Plugin source directory whose builds' cache volumes to inspect (Go version resolved as for builds)")
+        ] = None,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version whose cache volumes to inspect. Auto-detected from .go-version or go.mod in source if not provided (default: 1.21)")
+        ] = None,
+        target_os: Annotated[
+            str,
+            Doc("Target operating system of the build cache (default: linux)")
+        ] = "linux",
+        target_arch: Annotated[
+            str,
+            Doc("Target CPU architecture of the build cache (default: amd64)")
+        ] = "amd64",
+        prune: Annotated[
+            bool,
+            Doc("Empty the module and build cache volumes (default: false)")
+        ] = False,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc("Image lockfile pinning the golang image to a digest")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+    ) -> str:
+        """
+        Inspect or prune the persistent Go module and build cache volumes.
         
-        # Detect version info
-        detection_json = await self.detect_version(source)
-        detection = json.loads(detection_json)
-        
-        # Determine actual version to use
-        actual_version = version
-        if use_version_file:
-            if detection["version_file"] and detection["current_version"]:
-                if not actual_version:
-                    actual_version = detection["current_version"]
-                # If explicit version provided, it takes precedence
-            else:
-                if not actual_version:
-                    return dag.container().from_("alpine:latest").with_exec([
-                        "sh", "-c",
-                        "echo '✗ Error: use_version_file is true but no VERSION file found' && exit 1"
-                    ])
-        
-        if not actual_version:
-            return dag.container().from_("alpine:latest").with_exec([
-                "sh", "-c",
-                "echo '✗ Error: version is required. Provide --version or use --use-version-file' && exit 1"
-            ])
+        Builds mount a module cache (GOMODCACHE) shared by all targets of a Go
+        version and a build cache (GOCACHE) per Go version and target platform.
+        This function reports their size, or empties them when prune is set.
         
-        # Validate version format
-        is_valid, error_msg = self._validate_version(actual_version)
-        if not is_valid:
-            return dag.container().from_("alpine:latest").with_exec([
-                "sh", "-c",
-                f"echo '✗ Error: {error_msg}' && exit 1"
-            ])
+        With a source, the Go version is resolved like the builds of that
+        source do (.go-version, then the go.mod toolchain and go directives),
+        so the volumes are the ones its builds mount; --go-version still takes
+        precedence. The source's image lockfile pins the golang image.
         
-        # Normalize and auto-detect plugin name
-        actual_plugin_name: str
-        if plugin_name:
-            if not skip_normalization:
-                normalized_name, name_changed = _normalize_to_lowercase(plugin_name)
-                if name_changed:
-                    warnings.append(_log_normalization_warning("plugin-name", plugin_name, normalized_name))
-                actual_plugin_name = normalized_name
-            else:
-                actual_plugin_name = plugin_name
+        Args:
+            source: Plugin source directory
+            go_version: Go version of the cache volumes
+            target_os: Target OS of the build cache volume
+            target_arch: Target architecture of the build cache volume
+            prune: Remove all cached modules and build outputs
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            
+        Returns:
+            Report with the cache volume names and their sizes
+        """
+        diagnostics = _Diagnostics()
+        metadata: Optional[_SourceMetadata] = None
+        if source is not None:
+            metadata = await _get_source_metadata(source)
+            actual_go_version, go_version_source = _resolve_go_version(metadata, go_version)
+            _report_go_version(diagnostics, metadata, actual_go_version, go_version_source)
         else:
-            # Auto-detect from git_source path (last segment)
-            git_parts = actual_git_source.rstrip("/").split("/")
-            dirname = git_parts[-1] if git_parts else "plugin"
-            actual_plugin_name, name_changed = self._extract_plugin_name(dirname)
-            # Note: warning for auto-detected names is suppressed since they come from normalized git_source
-        
-        # Determine binary name with Windows .exe extension handling
-        binary_name = f"packer-plugin-{actual_plugin_name}"
-        if target_os == "windows":
-            binary_name += ".exe"
-        
-        # Construct ldflags
-        # Always include VersionPrerelease= (empty to avoid -dev)
-        # Also set Version if explicitly provided
-        ldflags_parts = [
-            f"-X {actual_git_source}/version.Version={actual_version}",
-            f"-X {actual_git_source}/version.VersionPrerelease=",
-        ]
-        ldflags = " ".join(ldflags_parts)
+            actual_go_version = go_version or DEFAULT_GO_VERSION
+        mod_cache_name, build_cache_name = _go_cache_volume_names(actual_go_version, target_os, target_arch)
+        images, lock_error = await _load_image_pins(metadata, image_lock, registry_mirror)
+        if lock_error:
+            raise PluginValidationError([lock_error])
+        diagnostics.emit()
         
-        # Build the container with cache-busting for consistent exports
-        cache_bust = str(int(time.time() * 1000))  # Milliseconds for uniqueness
-        build_container = (
-            dag.container()
-            .from_(f"golang:{actual_go_version}")
-            .with_mounted_directory("/work", source)
-            .with_workdir("/work")
-            .with_env_variable("CGO_ENABLED", "0")
-            .with_env_variable("GOOS", target_os)
-            .with_env_variable("GOARCH", target_arch)
-            .with_env_variable("DAGGER_CACHE_BUST", cache_bust)
+        container = _with_go_caches(
+            dag.container().from_(images.ref(f"golang:{actual_go_version}")),
+            actual_go_version,
+            target_os,
+            target_arch,
         )
+        # Cache volume contents change outside the layer cache, so always re-run
+        container = container.with_env_variable("PACKER_PLUGIN_CACHE_QUERY", str(int(time.time() * 1000)))
         
-        # Output warnings if any
-        if warnings:
-            for warning in warnings:
-                build_container = build_container.with_exec([
-                    "sh", "-c", f"echo '{warning}'"
-                ])
-        
-        # Update VERSION file if requested
-        if update_version_file and detection["version_file"]:
-            version_file_path = detection["version_file"]
-            build_container = build_container.with_exec([
-                "sh", "-c", f"echo '{actual_version}' > {version_file_path}"
-            ])
-        
-        # Run go build
-        build_container = build_container.with_exec([
-            "go", "build",
-            f"-ldflags={ldflags}",
-            "-o", binary_name,
-            ".",
-        ])
+        if prune:
+            container = container.with_exec(["go", "clean", "-cache", "-modcache"])
         
-        return build_container
+        return await container.with_exec([
+            "sh", "-c",
+            f"echo \"Go module cache ({mod_cache_name}): $(du -sh {GO_MOD_CACHE_PATH} | cut -f1)\" && "
+            f"echo \"Go build cache ({build_cache_name}): $(du -sh {GO_BUILD_CACHE_PATH} | cut -f1)\"",
+        ]).stdout()
 
     @function
-    async def build_binary(
+    async def export_cache(
         self,
         source: Annotated[
             dagger.Directory,
@@ -493,22 +3877,22 @@ class PackerPlugin:
             Optional[str],
             Doc("Semantic version (e.g., 1.0.10). Required unless use_version_file is true")
         ] = None,
-        plugin_name: Annotated[
-            Optional[str],
-            Doc("Plugin name override (auto-detected from directory name if not provided). Automatically normalized to lowercase.")
-        ] = None,
         use_version_file: Annotated[
             bool,
             Doc("Use VERSION file from source as version (default: false)")
         ] = False,
-        update_version_file: Annotated[
-            bool,
-            Doc("Update VERSION file with provided version before build (default: false)")
-        ] = False,
         go_version: Annotated[
             Optional[str],
-            Doc("Go version for building. Auto-detected from .go-version file if not provided, defaults to 1.21")
+            Doc("Go version for building. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
         ] = None,
+        packer_version: Annotated[
+            str,
+            Doc("Packer image version for installation (default: latest)")
+        ] = "latest",
+        install_mode: Annotated[
+            str,
+            Doc("Install with 'packer' (packer plugins install in the Packer image) or 'native' (no Packer image) (default: packer)")
+        ] = "packer",
         target_os: Annotated[
             str,
             Doc("Target operating system for cross-compilation (default: linux)")
@@ -517,66 +3901,319 @@ class PackerPlugin:
             str,
             Doc("Target CPU architecture for cross-compilation (default: amd64)")
         ] = "amd64",
-    ) -> dagger.Container:
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Image lockfile pinning base images to digests (default: {IMAGE_LOCK_FILE} in source, if present)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+        reproducible: Annotated[
+            bool,
+            Doc("Build bit-identical binaries with -trimpath, -buildvcs=false and an empty build ID (default: false)")
+        ] = False,
+        profile: Annotated[
+            str,
+            Doc("Build profile: default, dev (fast compiles) or release (-s -w, PGO from default.pgo) (default: default)")
+        ] = "default",
+        into: Annotated[
+            Optional[dagger.Directory],
+            Doc("Existing portable cache to add this build to (default: start an empty cache)")
+        ] = None,
+        publish: Annotated[
+            Optional[str],
+            Doc("Also push the cache as an OCI image to this reference (e.g., localhost:5000/plugin-cache)")
+        ] = None,
+    ) -> dagger.Directory:
         """
-        Build only the raw Go binary for a Packer plugin (intermediate/development use).
-        
-        This function compiles the plugin binary with proper ldflags that clear VersionPrerelease
-        to avoid -dev suffixes. It returns a container with only the compiled binary - no checksums
-        or metadata files. This is useful for development workflows or when you need just the binary.
-        
-        For production use, consider using build_artifacts() instead, which creates the complete
-        plugin package (binary + checksum + metadata) ready for distribution or installation.
-        
-        Supports cross-compilation by setting GOOS and GOARCH environment variables.
-        When building for Windows (target_os=windows), the binary will have .exe extension.
+        Export the Go caches and artifacts of a build as a portable cache.
         
-        Git source is determined by priority:
-        1. Explicit --git-source parameter
-        2. Auto-detected from go.mod module path
-        3. Error (git-source is required)
+        Cache volumes and layers live inside one Dagger engine, so ephemeral CI
+        runners start cold. This builds the plugin with build_artifacts and
+        writes a cache directory that a later build_artifacts call can take as
+        --build-cache (or --build-cache-ref once published):
         
-        Go version is determined by priority:
-        1. Explicit --go-version parameter
-        2. .go-version file in source directory
-        3. Default fallback (1.21)
+        - gomod/<module-key>.tar.gz: the modules of this plugin, keyed by the
+          digest of the go.mod/go.sum/go.work files in its build context
+          (skipped for vendored plugins)
+        - gobuild/go<version>-<os>-<arch>.tar.gz: the Go build cache volume
+        - artifacts/<build-key>/: the build output, keyed by the build key
+        - cache-index.json: index of the entries above, used by import_cache
         
-        Note: git_source and plugin_name are automatically normalized to lowercase
-        per HashiCorp Packer's requirements. A warning is output if normalization occurs.
+        A build whose build key is in the cache returns the cached artifacts
+        without compiling; otherwise the tarballs seed the Go cache volumes.
         
         Args:
             source: Plugin source directory
-            git_source: Git import path for ldflags (auto-detected from go.mod if not provided)
+            git_source: Git import path (auto-detected from go.mod if not provided)
             version: Semantic version string
-            plugin_name: Override auto-detected plugin name
             use_version_file: Read version from VERSION file
-            update_version_file: Update VERSION file before build
-            go_version: Go container image version (auto-detected from .go-version if not provided)
-            target_os: Target OS for cross-compilation (linux, darwin, windows)
-            target_arch: Target architecture for cross-compilation (amd64, arm64, 386)
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            packer_version: Packer container image version
+            install_mode: Install via the Packer image ('packer') or natively ('native')
+            target_os: Target OS for cross-compilation
+            target_arch: Target architecture for cross-compilation
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            reproducible: Remove all sources of nondeterminism from the build
+            profile: Build profile (default, dev, release)
+            into: Existing portable cache directory to extend
+            publish: Image reference to publish the cache to
             
         Returns:
-            Container with built plugin binary at /work/packer-plugin-{name}[.exe]
+            Portable cache directory
+            
+        Example:
+            dagger call export-cache \\
+              --source=. \\
+              --use-version-file \\
+              export --path=./.plugin-cache
         """
-        return await self._build_plugin_internal(
+        artifacts = await self.build_artifacts(
             source=source,
             git_source=git_source,
             version=version,
-            plugin_name=plugin_name,
             use_version_file=use_version_file,
-            update_version_file=update_version_file,
             go_version=go_version,
-            skip_normalization=False,
-            resolved_go_version=None,
-            resolved_git_source=None,
+            packer_version=packer_version,
+            install_mode=install_mode,
             target_os=target_os,
             target_arch=target_arch,
+            image_lock=image_lock,
+            registry_mirror=registry_mirror,
+            reproducible=reproducible,
+            profile=profile,
+        )
+        # Reading the manifest runs the build, so the cache volumes are warm below
+        manifest = _parse_build_manifest(await artifacts.file(BUILD_MANIFEST_FILE).contents())
+        entry = manifest[f"{target_os}/{target_arch}"]
+        go = entry["go_version"]
+        
+        metadata = await _get_source_metadata(source)
+        context = await _build_context(source, metadata, None, None)
+        module_key = None if metadata.has_entry("vendor") else await _module_cache_key(context)
+        paths = _portable_cache_paths(module_key or "", go, target_os, target_arch, entry["build_key"])
+        
+        # Re-download only this plugin's modules into a fresh module cache, with
+        # the module cache volume as the only proxy, so the tarball holds no
+        # modules of other plugins and nothing is fetched from the network
+        script = [f"tar -czf /export/gobuild.tar.gz -C {GO_BUILD_CACHE_PATH} ."]
+        if module_key:
+            script.insert(0, (
+                f"GOMODCACHE=/export/gomod GOPROXY=file://{GO_MOD_CACHE_PATH}/cache/download,off "
+                "GOSUMDB=off GOFLAGS='-mod=mod -modcacherw' go mod download && "
+                "tar -czf /export/gomod.tar.gz -C /export/gomod ."
+            ))
+        images, lock_error = await _load_image_pins(metadata, image_lock, registry_mirror)
+        if lock_error:
+            raise PluginValidationError([lock_error])
+        exporter = (
+            _with_go_caches(dag.container().from_(images.ref(f"golang:{go}")), go, target_os, target_arch)
+            .with_mounted_directory("/work", _go_module_files(context))
+            .with_workdir("/work")
+            # Cache volume contents change outside the layer cache, so always re-run
+            .with_env_variable("PACKER_PLUGIN_CACHE_EXPORT", str(int(time.time() * 1000)))
+            .with_exec(["sh", "-c", "mkdir -p /export && " + " && ".join(script)])
+        )
+        
+        cache = into if into is not None else dag.directory()
+        index = _parse_cache_index(
+            await cache.file(PORTABLE_CACHE_INDEX).contents()
+            if PORTABLE_CACHE_INDEX in await cache.entries() else None
+        )
+        if module_key:
+            cache = cache.with_file(paths["modules"], exporter.file("/export/gomod.tar.gz"))
+        cache = (
+            cache
+            .with_file(paths["build_cache"], exporter.file("/export/gobuild.tar.gz"))
+            .with_directory(paths["artifacts"], artifacts)
+            .with_new_file(
+                PORTABLE_CACHE_INDEX,
+                json.dumps(_update_cache_index(index, paths, module_key, entry, target_os, target_arch), indent=2) + "\n",
+            )
         )
+        
+        if publish:
+            ref = _cache_image_ref(publish, go, target_os, target_arch)
+            published = await dag.container().with_directory(PORTABLE_CACHE_IMAGE_PATH, cache).publish(ref)
+            diagnostics = _Diagnostics()
+            diagnostics.info(f"ℹ Published build cache to {published}")
+            diagnostics.emit()
+        return cache
+
+    @function
+    async def import_cache(
+        self,
+        cache: Annotated[
+            Optional[dagger.Directory],
+            Doc("Portable cache directory written by export-cache")
+        ] = None,
+        cache_ref: Annotated[
+            Optional[str],
+            Doc("Image reference of a portable cache published by export-cache")
+        ] = None,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc("Image lockfile pinning the golang images to digests")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+    ) -> str:
+        """
+        Load a portable cache into this engine's Go cache volumes.
+        
+        Extracts every module and build cache tarball listed in the cache index
+        into the matching cache volumes, keeping existing entries. Builds that
+        pass --build-cache seed the volumes themselves; this warms them ahead
+        of builds that don't (e.g., build-matrix or build-many).
+        
+        Args:
+            cache: Portable cache directory
+            cache_ref: Published portable cache image
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            
+        Returns:
+            Report of the imported tarballs and their cache volumes
+        """
+        portable_cache = _resolve_portable_cache(cache, cache_ref)
+        if portable_cache is None:
+            raise PluginValidationError(["provide --cache or --cache-ref"])
+        if PORTABLE_CACHE_INDEX not in await portable_cache.entries():
+            raise PluginValidationError([f"{PORTABLE_CACHE_INDEX} not found in the cache"])
+        index = _parse_cache_index(await portable_cache.file(PORTABLE_CACHE_INDEX).contents())
+        images, lock_error = await _load_image_pins(None, image_lock, registry_mirror)
+        if lock_error:
+            raise PluginValidationError([lock_error])
+        nonce = str(int(time.time() * 1000))
+        
+        async def extract(tarball: str, target: str, go: str, goos: str, goarch: str) -> str:
+            mod_cache_name, build_cache_name = _go_cache_volume_names(go, goos, goarch)
+            volume = mod_cache_name if target == GO_MOD_CACHE_PATH else build_cache_name
+            mount = f"/portable-cache/{tarball}"
+            await (
+                _with_go_caches(dag.container().from_(images.ref(f"golang:{go}")), go, goos, goarch)
+                .with_mounted_file(mount, portable_cache.file(tarball))
+                # Cache volume contents change outside the layer cache, so always re-run
+                .with_env_variable("PACKER_PLUGIN_CACHE_IMPORT", nonce)
+                .with_exec(["tar", "-xzf", mount, "-C", target, "--skip-old-files"])
+                .sync()
+            )
+            return f"✓ Imported {tarball} into {volume}"
+        
+        jobs = [
+            # The module cache volume is shared by all platforms of a Go version
+            extract(entry["path"], GO_MOD_CACHE_PATH, entry["go_version"], "linux", "amd64")
+            for entry in index["modules"].values()
+        ] + [
+            extract(entry["path"], GO_BUILD_CACHE_PATH, entry["go_version"], entry["goos"], entry["goarch"])
+            for entry in index["build_caches"].values()
+        ]
+        if not jobs:
+            return "ℹ The cache has no module or build cache tarballs"
+        return "\n".join(await asyncio.gather(*jobs))
+
+    @function
+    async def lock_images(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory (use --source=. for your project)")
+        ],
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version to pin. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
+        ] = None,
+        packer_version: Annotated[
+            str,
+            Doc("Packer image version to pin (default: latest)")
+        ] = "latest",
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to resolve digests against instead of the original registry (e.g., localhost:5000)")
+        ] = None,
+    ) -> dagger.File:
+        """
+        Resolve base image tags to digests and write them to an image lockfile.
+        
+        The golang and Packer images are resolved once and recorded as
+        image@sha256 references. Builds read the lockfile from the source root
+        (or from --image-lock) and pull the pinned digests instead of floating
+        tags, giving reproducible builds without per-run registry lookups.
+        Existing entries for other tags are preserved.
+        
+        Args:
+            source: Plugin source directory (existing lockfile is merged)
+            go_version: Go version whose golang image to pin
+            packer_version: Packer image version to pin
+            registry_mirror: Registry mirror host for air-gapped resolution
+            
+        Returns:
+            Updated packer-plugin-images.lock.json file
+            
+        Example:
+            dagger call lock-images \\
+              --source=. \\
+              export --path=packer-plugin-images.lock.json
+        """
+        metadata = await _get_source_metadata(source)
+        existing, lock_error = _parse_image_lock(metadata.read(IMAGE_LOCK_FILE))
+        if lock_error:
+            raise PluginValidationError([lock_error])
+        
+        resolved_go_version, _ = _resolve_go_version(metadata, go_version)
+        tags = [f"golang:{resolved_go_version}", f"hashicorp/packer:{packer_version}"]
+        refs = await asyncio.gather(*(_resolve_image_digest(tag, registry_mirror) for tag in tags))
+        
+        images = dict(existing)
+        images.update(zip(tags, refs))
+        content = json.dumps({"images": dict(sorted(images.items()))}, indent=2) + "\n"
+        return dag.directory().with_new_file(IMAGE_LOCK_FILE, content).file(IMAGE_LOCK_FILE)
 
     # ========================================================================
     # Install Plugin Capability
     # ========================================================================
 
+    async def _describe_native(
+        self,
+        build_plugin: partial,
+        source_digest: str,
+        diagnostics: _Diagnostics,
+        native_build: Optional[dagger.Container] = None,
+    ) -> dict:
+        """Describe a plugin from its build for the engine's platform.
+        
+        A build for the engine's platform runs describe in its own build exec
+        and leaves the output at PLUGIN_DESCRIPTION_PATH, so no extra
+        container runs. native_build is the caller's build when it already
+        targets the engine's platform; otherwise build_plugin (the caller's
+        _build_plugin_internal partial) is rebuilt for it, sharing the
+        dependency stage with the other targets. The description is memoized
+        by build context digest, so a matrix describes once. Unparseable
+        output falls back to the default API version with a warning.
+        """
+        native_os, native_arch = await _native_platform()
+        
+        async def describe() -> dict:
+            container = native_build
+            if container is None:
+                container = await build_plugin(target_os=native_os, target_arch=native_arch, diagnostics=_Diagnostics())
+            output = await container.file(PLUGIN_DESCRIPTION_PATH).contents()
+            return _parse_plugin_description(output) or {}
+        
+        description = await _get_plugin_description(source_digest, describe)
+        if not description:
+            diagnostics.warning(f"⚠ Warning: plugin describe output was not recognized; assuming API version {DEFAULT_PLUGIN_API_VERSION}")
+            return {"api_version": DEFAULT_PLUGIN_API_VERSION, "components": {}}
+        components = ", ".join(
+            f"{len(names)} {kind.replace('_', '-')}" for kind, names in description["components"].items() if names
+        )
+        diagnostics.info(f"ℹ Plugin API version {description['api_version']} ({components or 'no components'}) from describe on {native_os}/{native_arch}")
+        return description
+
     async def _install_plugin_internal(
         self,
         build_container: dagger.Container,
@@ -585,15 +4222,37 @@ class PackerPlugin:
         packer_version: str,
         skip_normalization: bool,
         target_os: str = "linux",
-    ) -> dagger.Directory:
-        """Internal install plugin implementation with skip_normalization and cross-compilation support."""
-        warnings: list[str] = []
+        diagnostics: Optional[_Diagnostics] = None,
+        install_mode: str = "packer",
+        images: Optional[_ImagePins] = None,
+        tracer: Optional[_Tracer] = None,
+        description: Optional[dict] = None,
+    ) -> tuple[dagger.Directory, str]:
+        """Internal install plugin implementation with skip_normalization and cross-compilation support.
+        
+        Messages are recorded on the caller's diagnostics; when none are passed,
+        they are collected and emitted before returning. With an enabled tracer,
+        the install stages are evaluated inside their own spans. With a plugin
+        description (from _describe_native), the binary is never executed: it
+        is installed natively and named with the described API version, so
+        binaries for other platforms install without emulation. The install
+        mode actually used is returned with the installed directory, so callers
+        record it instead of the requested one.
+        """
+        if install_mode not in INSTALL_MODES:
+            raise PluginValidationError([f"install mode must be one of: {', '.join(INSTALL_MODES)}"])
+        
+        emit_diagnostics = diagnostics is None
+        if diagnostics is None:
+            diagnostics = _Diagnostics()
+        if tracer is None:
+            tracer = _Tracer()
         
         # Normalize git_source to lowercase (unless called from build_and_install with pre-normalized values)
         if not skip_normalization:
             normalized_git_source, git_source_changed = _normalize_to_lowercase(git_source)
             if git_source_changed:
-                warnings.append(_log_normalization_warning("git-source", git_source, normalized_git_source))
+                diagnostics.warning(_log_normalization_warning("git-source", git_source, normalized_git_source))
             git_source = normalized_git_source
         
         # Transform git_source for packer plugins install command
@@ -607,7 +4266,7 @@ class PackerPlugin:
             if not skip_normalization:
                 normalized_name, name_changed = _normalize_to_lowercase(plugin_name)
                 if name_changed:
-                    warnings.append(_log_normalization_warning("plugin-name", plugin_name, normalized_name))
+                    diagnostics.warning(_log_normalization_warning("plugin-name", plugin_name, normalized_name))
                 actual_plugin_name = normalized_name
             else:
                 actual_plugin_name = plugin_name
@@ -625,20 +4284,44 @@ class PackerPlugin:
         # Get the binary from build container
         built_binary = build_container.file(f"/work/{binary_name}")
         
+        api_version = description["api_version"] if description else DEFAULT_PLUGIN_API_VERSION
+        if install_mode == "packer" and description is not None:
+            # packer plugins install would execute the binary to read its API version
+            diagnostics.info(
+                f"ℹ packer plugins install cannot run the {target_os} binary; installing {binary_name} "
+                f"natively with API version {api_version} from describe (recorded as install mode native)"
+            )
+            install_mode = "native"
+        
+        if install_mode == "native":
+            with tracer.span("native.install", binary=binary_name):
+                installed = await self._install_plugin_native(
+                    build_container, built_binary, actual_plugin_name, api_version
+                )
+            if emit_diagnostics:
+                diagnostics.emit()
+            return installed, install_mode
+        
+        # packer plugins install refuses -dev binaries; the native install takes them
+        plugin_version = await build_container.env_variable(PLUGIN_VERSION_ENV)
+        if plugin_version and _is_dev_version(plugin_version):
+            raise PluginValidationError([
+                f"Version '{plugin_version}' is a -dev prerelease, which packer plugins install rejects. "
+                f"Use --install-mode=native or a release version (e.g., {plugin_version.split('-', 1)[0]})"
+            ])
+        
         # Install using Packer container
-        packer_container = (
-            dag.container()
-            .from_(f"hashicorp/packer:{packer_version}")
-            .with_file(f"/{binary_name}", built_binary)
-            .with_workdir("/")
+        packer_image = (images or _ImagePins()).ref(f"hashicorp/packer:{packer_version}")
+        packer_container = await tracer.stage(
+            "packer.image.pull", dag.container().from_(packer_image), image=packer_image
         )
+        packer_container = packer_container.with_file(f"/{binary_name}", built_binary).with_workdir("/")
         
-        # Output warnings if any
-        if warnings:
-            for warning in warnings:
-                packer_container = packer_container.with_exec([
-                    "sh", "-c", f"echo '{warning}'"
-                ])
+        # Carry the build key over so the install layer is invalidated exactly
+        # when the build is (including force_rebuild)
+        build_key = await build_container.env_variable(BUILD_KEY_ENV)
+        if build_key:
+            packer_container = packer_container.with_env_variable(BUILD_KEY_ENV, build_key)
         
         # Run packer plugins install with transformed source (without packer-plugin- prefix)
         packer_container = packer_container.with_exec([
@@ -646,13 +4329,52 @@ class PackerPlugin:
             "--path", binary_name,
             install_source,
         ])
+        packer_container = await tracer.stage("packer.plugins.install", packer_container, source=install_source)
         
         # Packer stores plugins at /root/.config/packer/plugins/ using the install_source path
         # (the stripped version without packer-plugin- prefix)
         plugin_path = f"/root/.config/packer/plugins/{install_source}"
         
+        if emit_diagnostics:
+            diagnostics.emit()
+        
         # Return the directory containing the installed plugins
-        return packer_container.directory(plugin_path)
+        return packer_container.directory(plugin_path), install_mode
+
+    async def _install_plugin_native(
+        self,
+        build_container: dagger.Container,
+        built_binary: dagger.File,
+        plugin_name: str,
+        api_version: str = DEFAULT_PLUGIN_API_VERSION,
+    ) -> dagger.Directory:
+        """Install a built plugin without the Packer image.
+        
+        Produces the same files as `packer plugins install --path`: the binary
+        renamed to packer-plugin-{name}_v{version}_{api_version}_{os}_{arch}[.exe]
+        and a matching _SHA256SUM file, with the checksum computed in the module.
+        """
+        plugin_version, goos, goarch = await asyncio.gather(
+            build_container.env_variable(PLUGIN_VERSION_ENV),
+            build_container.env_variable("GOOS"),
+            build_container.env_variable("GOARCH"),
+        )
+        if not plugin_version:
+            raise PluginValidationError(["native install requires a container from build_binary (plugin version unknown)"])
+        
+        installed_name = _installed_binary_name(
+            plugin_name,
+            plugin_version,
+            api_version,
+            goos or "linux",
+            goarch or "amd64",
+        )
+        checksum = await _sha256_file(built_binary)
+        return (
+            dag.directory()
+            .with_file(installed_name, built_binary, permissions=0o755)
+            .with_new_file(f"{installed_name}_SHA256SUM", checksum)
+        )
 
     @function
     async def install_plugin(
@@ -673,6 +4395,18 @@ class PackerPlugin:
             str,
             Doc("Packer image version to use (default: latest)")
         ] = "latest",
+        install_mode: Annotated[
+            str,
+            Doc("Install with 'packer' (packer plugins install in the Packer image) or 'native' (no Packer image) (default: packer)")
+        ] = "packer",
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc("Image lockfile pinning the Packer image to a digest")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull the Packer image from instead of its original registry (e.g., localhost:5000)")
+        ] = None,
     ) -> dagger.Directory:
         """
         Install a built Packer plugin using HashiCorp Packer container.
@@ -688,17 +4422,27 @@ class PackerPlugin:
             git_source: Git path for plugin registration
             plugin_name: Plugin name override
             packer_version: Packer container image version
+            install_mode: Install via the Packer image ('packer') or natively ('native')
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
             
         Returns:
             Directory containing installation artifacts (binary + checksum)
         """
-        return await self._install_plugin_internal(
+        images, lock_error = await _load_image_pins(None, image_lock, registry_mirror)
+        if lock_error:
+            raise PluginValidationError([lock_error])
+        
+        installed, _ = await self._install_plugin_internal(
             build_container=build_container,
             git_source=git_source,
             plugin_name=plugin_name,
             packer_version=packer_version,
             skip_normalization=False,
+            install_mode=install_mode,
+            images=images,
         )
+        return installed
 
     # ========================================================================
     # Gitignore Prep Capability
@@ -738,29 +4482,27 @@ class PackerPlugin:
         Returns:
             Updated .gitignore file
         """
-        warnings: list[str] = []
+        diagnostics = _Diagnostics()
         actual_plugin_name: Optional[str] = None
         
+        # Probe go.mod and .gitignore in a single pass
+        metadata = await _get_source_metadata(source)
+        
         # Normalize provided plugin_name or auto-detect
         if plugin_name:
             normalized_name, name_changed = _normalize_to_lowercase(plugin_name)
             if name_changed:
-                warnings.append(_log_normalization_warning("plugin-name", plugin_name, normalized_name))
+                diagnostics.warning(_log_normalization_warning("plugin-name", plugin_name, normalized_name))
             actual_plugin_name = normalized_name
         else:
             # Auto-detect plugin name from go.mod
-            try:
-                go_mod_content = await source.file("go.mod").contents()
-                module_match = re.search(r'^module\s+(\S+)', go_mod_content, re.MULTILINE)
-                if module_match:
-                    module_path = module_match.group(1)
-                    # Extract the last segment as the repo name
-                    dirname = module_path.rstrip("/").split("/")[-1]
-                    actual_plugin_name, name_changed = self._extract_plugin_name(dirname)
-                    if name_changed:
-                        warnings.append(_log_normalization_warning("plugin-name (auto-detected)", dirname, actual_plugin_name))
-            except Exception:
-                pass
+            module_path, _ = metadata.gomod_module
+            if module_path:
+                # Extract the last segment as the repo name
+                dirname = module_path.rstrip("/").split("/")[-1]
+                actual_plugin_name, name_changed = self._extract_plugin_name(dirname)
+                if name_changed:
+                    diagnostics.warning(_log_normalization_warning("plugin-name (auto-detected)", dirname, actual_plugin_name))
             
             if not actual_plugin_name:
                 # Return error if we can't detect plugin name
@@ -769,17 +4511,14 @@ class PackerPlugin:
                     "# Error: Could not auto-detect plugin name. Please provide --plugin-name\n"
                 ).file(".gitignore")
         
+        diagnostics.emit()
+        
         binary_name = f"packer-plugin-{actual_plugin_name}"
         versioned_pattern = f"packer-plugin-{actual_plugin_name}_v*"
         checksum_pattern = "*_SHA256SUM"
         
-        # Try to read existing .gitignore
-        existing_content = ""
-        try:
-            existing_content = await source.file(".gitignore").contents()
-        except Exception:
-            # .gitignore doesn't exist, we'll create it
-            pass
+        # Use existing .gitignore if present, otherwise we'll create it
+        existing_content = metadata.read(".gitignore") or ""
         
         # Check which entries already exist (idempotent)
         lines = existing_content.split("\n")
@@ -797,6 +4536,7 @@ class PackerPlugin:
             new_content += "\n"
         
         # Add warnings as comments if any
+        warnings = diagnostics.warnings()
         if warnings:
             new_content += "\n"
             for warning in warnings:
@@ -854,12 +4594,16 @@ class PackerPlugin:
         ] = False,
         go_version: Annotated[
             Optional[str],
-            Doc("Go version for building. Auto-detected from .go-version file if not provided, defaults to 1.21")
+            Doc("Go version for building. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
         ] = None,
         packer_version: Annotated[
             str,
             Doc("Packer image version for installation (default: latest)")
         ] = "latest",
+        install_mode: Annotated[
+            str,
+            Doc("Install with 'packer' (packer plugins install in the Packer image) or 'native' (no Packer image) (default: packer)")
+        ] = "packer",
         target_os: Annotated[
             str,
             Doc("Target operating system for cross-compilation (default: linux)")
@@ -868,6 +4612,66 @@ class PackerPlugin:
             str,
             Doc("Target CPU architecture for cross-compilation (default: amd64)")
         ] = "amd64",
+        force_rebuild: Annotated[
+            bool,
+            Doc("Ignore cached build and install layers and rebuild from scratch (default: false)")
+        ] = False,
+        include: Annotated[
+            Optional[list[str]],
+            Doc("Source include patterns replacing the Go-relevant defaults (go:embed targets are always included)")
+        ] = None,
+        exclude: Annotated[
+            Optional[list[str]],
+            Doc("Additional source exclude patterns for the build context")
+        ] = None,
+        vendored: Annotated[
+            Optional[bool],
+            Doc("Build from vendor/ with -mod=vendor instead of downloading modules (auto-detected if not provided)")
+        ] = None,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Image lockfile pinning base images to digests (default: {IMAGE_LOCK_FILE} in source, if present)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+        reproducible: Annotated[
+            bool,
+            Doc("Build bit-identical binaries with -trimpath, -buildvcs=false and an empty build ID (default: false)")
+        ] = False,
+        profile: Annotated[
+            str,
+            Doc("Build profile: default, dev (fast compiles) or release (-s -w, PGO from default.pgo) (default: default)")
+        ] = "default",
+        debug_symbols: Annotated[
+            bool,
+            Doc("With the release profile, also produce an unstripped debug binary (default: false)")
+        ] = False,
+        trace: Annotated[
+            bool,
+            Doc(f"Record per-stage timing spans and write them as OTLP/JSON to {TRACE_FILE} in the output (default: false)")
+        ] = False,
+        otlp_endpoint: Annotated[
+            Optional[str],
+            Doc("OTLP/HTTP collector to send the timing spans to (e.g., http://localhost:4318)")
+        ] = None,
+        previous_output: Annotated[
+            Optional[dagger.Directory],
+            Doc(f"Output of an earlier build; returned unchanged if its {BUILD_MANIFEST_FILE} matches the inputs")
+        ] = None,
+        build_cache: Annotated[
+            Optional[dagger.Directory],
+            Doc("Portable build cache from export-cache; checked for artifacts and used to seed the Go caches")
+        ] = None,
+        build_cache_ref: Annotated[
+            Optional[str],
+            Doc("Image reference of a portable build cache published by export-cache (e.g., localhost:5000/plugin-cache:tag)")
+        ] = None,
+        plugin_dir: Annotated[
+            Optional[str],
+            Doc("Plugin directory inside source when source is a repository root; only the plugin and the local modules it uses are mounted")
+        ] = None,
     ) -> dagger.Directory:
         """
         Build complete production-ready plugin artifacts (binary + checksum + metadata).
@@ -891,7 +4695,9 @@ class PackerPlugin:
         Go version is determined by priority:
         1. Explicit --go-version parameter
         2. .go-version file in source directory
-        3. Default fallback (1.21)
+        3. toolchain directive in go.mod
+        4. go directive in go.mod
+        5. Default fallback (1.21)
         
         Note: git_source and plugin_name are automatically normalized to lowercase
         per HashiCorp Packer's requirements. A warning is output if normalization occurs.
@@ -903,10 +4709,26 @@ class PackerPlugin:
             plugin_name: Override auto-detected plugin name
             use_version_file: Read version from VERSION file
             update_version_file: Update VERSION file before build
-            go_version: Go container image version (auto-detected from .go-version if not provided)
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
             packer_version: Packer container image version
+            install_mode: Install via the Packer image ('packer') or natively ('native')
             target_os: Target OS for cross-compilation (linux, darwin, windows)
             target_arch: Target architecture for cross-compilation (amd64, arm64, 386)
+            force_rebuild: Bypass the content-addressed build cache
+            include: Include patterns for the build context (default: Go-relevant files)
+            exclude: Additional exclude patterns for the build context
+            vendored: Use vendor/ instead of the module download stage
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            reproducible: Remove all sources of nondeterminism from the build
+            profile: Build profile (default, dev, release)
+            debug_symbols: Produce a separate unstripped debug binary (release profile)
+            trace: Write per-stage timing spans to the output
+            otlp_endpoint: OTLP/HTTP collector for the timing spans
+            previous_output: Previous output directory to check for up-to-date artifacts
+            build_cache: Portable build cache directory
+            build_cache_ref: Published portable build cache image
+            plugin_dir: Plugin directory inside a repository root source
             
         Returns:
             Directory with complete plugin artifacts (binary + checksum + metadata) ready for distribution
@@ -917,72 +4739,707 @@ class PackerPlugin:
               --use-version-file \\
               export --path=.
         """
-        # Resolve git_source once at entry point to avoid duplicate detection
-        resolved_git_source, git_source_source, git_source_error = await _resolve_git_source(source, git_source)
-        if git_source_error:
-            # Return error container - let build_binary handle error display
-            return await self.build_binary(
+        _raise_for_problems(_validate_build_inputs(
+            version=version,
+            git_source=git_source,
+            plugin_name=plugin_name,
+            platforms=[(target_os, target_arch)],
+            profile=profile,
+            install_mode=install_mode,
+        ))
+        tracer = _Tracer(enabled=trace or bool(otlp_endpoint))
+        with tracer.span("build_artifacts", goos=target_os, goarch=target_arch, install_mode=install_mode):
+            # Resolve git source, plugin name and Go version once at the entry point
+            source, metadata, options, diagnostics = await _resolve_build_options(
+                source,
+                _BuildOptions(
+                    git_source=git_source,
+                    version=version,
+                    plugin_name=plugin_name,
+                    use_version_file=use_version_file,
+                    update_version_file=update_version_file,
+                    go_version=go_version,
+                    force_rebuild=force_rebuild,
+                    include=include,
+                    exclude=exclude,
+                    vendored=vendored,
+                    reproducible=reproducible,
+                    profile=profile,
+                    debug_symbols=debug_symbols,
+                    plugin_dir=plugin_dir,
+                ),
+                image_lock=image_lock,
+                registry_mirror=registry_mirror,
+                tracer=tracer,
+            )
+            
+            # Build the plugin (pass normalized and pre-resolved values using internal method)
+            build_plugin = partial(
+                self._build_plugin_internal,
                 source=source,
-                git_source=None,
-                version=version,
-                plugin_name=plugin_name,
-                use_version_file=use_version_file,
-                update_version_file=update_version_file,
-                go_version=go_version,
+                options=options,
+                target_os=target_os,
+                target_arch=target_arch,
+                metadata=metadata,
+                diagnostics=diagnostics,
+            )
+            build_info: dict = {}
+            portable_cache = _resolve_portable_cache(build_cache, build_cache_ref)
+            native_platform = await _native_platform()
+            effective_mode = _effective_install_mode(install_mode, (target_os, target_arch), native_platform)
+            if previous_output is None and portable_cache is None:
+                build_container = await build_plugin(tracer=tracer, build_info=build_info)
+            else:
+                # Resolve the build lazily (nothing is evaluated yet) to compare
+                # its build key against the previous output and the build cache
+                build_container = await build_plugin(build_info=build_info)
+                if build_info:
+                    platform = f"{target_os}/{target_arch}"
+                    expected = {
+                        "build_key": build_info["build_key"],
+                        "install_mode": effective_mode,
+                        "packer_version": packer_version if effective_mode == "packer" else None,
+                    }
+                    if previous_output is not None:
+                        with tracer.span("up_to_date_check"):
+                            recorded, reason = await _check_previous_output(previous_output, platform, expected)
+                        if recorded is not None:
+                            diagnostics.info(f"ℹ {recorded['binary']} is up to date; skipping build and install")
+                            diagnostics.emit()
+                            return previous_output
+                        diagnostics.info(f"ℹ Previous output is out of date ({reason}); rebuilding")
+                    if portable_cache is not None:
+                        with tracer.span("build_cache.lookup"):
+                            cached = await _portable_cached_artifacts(
+                                portable_cache, build_info["build_key"], platform, expected
+                            )
+                        if cached is not None:
+                            diagnostics.info(f"ℹ Using artifacts for build key {build_info['build_key'][:12]} from the build cache")
+                            diagnostics.emit()
+                            return cached
+                if tracer.enabled or portable_cache is not None:
+                    build_container = await build_plugin(tracer=tracer, portable_cache=portable_cache)
+            
+            # Only a native binary can be executed to read its API version;
+            # other targets (and native installs) use the native build's describe
+            description: Optional[dict] = None
+            if effective_mode == "native":
+                native_build = build_container if (target_os, target_arch) == native_platform else None
+                with tracer.span("describe"):
+                    description = await self._describe_native(
+                        build_plugin, build_info["source_digest"], diagnostics, native_build
+                    )
+            
+            # Install the plugin (pass normalized values, skip internal normalization)
+            installed, effective_mode = await self._install_plugin_internal(
+                build_container=build_container,
+                git_source=options.git_source,
+                plugin_name=options.plugin_name,
+                packer_version=packer_version,
+                skip_normalization=True,
+                target_os=target_os,
+                diagnostics=diagnostics,
+                install_mode=install_mode,
+                images=options.images,
+                tracer=tracer,
+                description=description,
             )
+            if debug_symbols and profile == "release":
+                installed = await _with_debug_artifact(installed, build_container)
+            
+            # Record the inputs next to the artifacts for later up-to-date checks
+            if build_info:
+                binary, sha256 = await _installed_artifact(installed)
+                entry = _manifest_entry(build_info, effective_mode, packer_version, binary, sha256)
+                installed = installed.with_new_file(
+                    BUILD_MANIFEST_FILE,
+                    json.dumps({"builds": {f"{target_os}/{target_arch}": entry}}, indent=2) + "\n",
+                )
         
-        git_source_info: Optional[str] = None
-        if git_source_source == "gomod":
-            git_source_info = f"ℹ Using git-source from go.mod: {resolved_git_source}"
+        if tracer.enabled:
+            payload = await _finish_trace(tracer, otlp_endpoint, diagnostics)
+            if trace:
+                installed = installed.with_new_file(TRACE_FILE, payload)
         
-        # Normalize inputs once at the entry point to avoid duplicate warnings
-        normalized_git_source, git_source_changed = _normalize_to_lowercase(resolved_git_source)
-        normalized_plugin_name: Optional[str] = None
-        plugin_name_changed = False
+        # Surface all info/warnings once, outside the build and install layers
+        diagnostics.emit()
+        return installed
+
+    @function
+    async def dev_install(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory")
+        ],
+        version: Annotated[
+            Optional[str],
+            Doc(f"Plugin version, -dev prereleases allowed (default: VERSION file, else {DEFAULT_DEV_VERSION})")
+        ] = None,
+        git_source: Annotated[
+            Optional[str],
+            Doc("Git repository path (e.g., github.com/user/packer-plugin-example). Auto-detected from go.mod if not provided. Automatically normalized to lowercase.")
+        ] = None,
+        plugin_name: Annotated[
+            Optional[str],
+            Doc("Plugin name override (auto-detected if not provided). Automatically normalized to lowercase.")
+        ] = None,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for the container image. Auto-detected from .go-version or go.mod if not provided.")
+        ] = None,
+        include: Annotated[
+            Optional[list[str]],
+            Doc("Include patterns for the build context, replacing the Go-relevant defaults")
+        ] = None,
+        exclude: Annotated[
+            Optional[list[str]],
+            Doc("Additional exclude patterns for the build context")
+        ] = None,
+        vendored: Annotated[
+            Optional[bool],
+            Doc("Use vendor/ instead of downloading modules (default: auto-detect vendor/)")
+        ] = None,
+        plugin_dir: Annotated[
+            Optional[str],
+            Doc("Plugin directory inside --source, which is then the repository root with local modules")
+        ] = None,
+    ) -> dagger.Directory:
+        """
+        Build the plugin for this machine and lay it out for Packer's plugin directory.
         
-        if plugin_name:
-            normalized_plugin_name, plugin_name_changed = _normalize_to_lowercase(plugin_name)
+        The fast path for the edit-build-test loop: a single build for the
+        engine's platform with the dev profile (no optimizations or inlining),
+        a native install without the Packer image, so -dev prerelease
+        versions install too. The result mirrors ~/.config/packer/plugins:
         
-        # Resolve Go version once at entry point
-        resolved_go_version, go_version_source = await _resolve_go_version(source, go_version)
-        go_version_info: Optional[str] = None
-        if go_version_source == "file":
-            go_version_info = f"ℹ Using Go {resolved_go_version} from .go-version file"
+            {source}/packer-plugin-{name}_v{version}_x5.0_{os}_{arch}
+            {source}/packer-plugin-{name}_v{version}_x5.0_{os}_{arch}_SHA256SUM
         
-        # Build the plugin (pass normalized and pre-resolved values using internal method)
-        build_container = await self._build_plugin_internal(
-            source=source,
-            git_source=normalized_git_source,
+        where {source} is the git source without the packer-plugin- prefix,
+        as `packer plugins install` would use. Exporting it over the plugin
+        directory adds the build next to the installed plugins.
+        
+        Args:
+            source: Plugin source directory
+            version: Plugin version (-dev allowed)
+            git_source: Git import path (auto-detected from go.mod if not provided)
+            plugin_name: Override auto-detected plugin name
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            include: Include patterns for the build context (default: Go-relevant files)
+            exclude: Additional exclude patterns for the build context
+            vendored: Use vendor/ instead of the module download stage
+            plugin_dir: Plugin directory inside a repository root source
+            
+        Returns:
+            Directory in the Packer plugin directory layout
+            
+        Example:
+            dagger call dev-install \\
+              --source=. \\
+              export --path=$HOME/.config/packer/plugins
+        """
+        _raise_for_problems(_validate_build_inputs(
             version=version,
-            plugin_name=normalized_plugin_name,
-            use_version_file=use_version_file,
-            update_version_file=update_version_file,
-            go_version=None,  # Don't pass explicit, use resolved
-            skip_normalization=True,
-            resolved_go_version=resolved_go_version,
-            resolved_git_source=normalized_git_source,
-            target_os=target_os,
-            target_arch=target_arch,
+            git_source=git_source,
+            plugin_name=plugin_name,
+        ))
+        (source, metadata, options, diagnostics), (native_os, native_arch) = await asyncio.gather(
+            _resolve_build_options(
+                source,
+                _BuildOptions(
+                    git_source=git_source,
+                    version=version,
+                    plugin_name=plugin_name,
+                    go_version=go_version,
+                    include=include,
+                    exclude=exclude,
+                    vendored=vendored,
+                    profile="dev",
+                    plugin_dir=plugin_dir,
+                ),
+                require_version=False,
+            ),
+            _native_platform(),
         )
         
-        # Add warnings/info to the build container
-        if git_source_info:
-            build_container = build_container.with_exec(["sh", "-c", f"echo '{git_source_info}'"])
-        if go_version_info:
-            build_container = build_container.with_exec(["sh", "-c", f"echo '{go_version_info}'"])
-        if git_source_changed:
-            warning = _log_normalization_warning("git-source", resolved_git_source, normalized_git_source)
-            build_container = build_container.with_exec(["sh", "-c", f"echo '{warning}'"])
-        if plugin_name_changed:
-            warning = _log_normalization_warning("plugin-name", plugin_name, normalized_plugin_name)
-            build_container = build_container.with_exec(["sh", "-c", f"echo '{warning}'"])
+        # Without a version or VERSION file, fall back to a dev version
+        use_version_file = version is None and bool(metadata.version_report["version_file"])
+        if version is None and not use_version_file:
+            version = DEFAULT_DEV_VERSION
+            diagnostics.info(f"ℹ No version given and no VERSION file found; using {DEFAULT_DEV_VERSION}")
+        options = replace(options, version=version, use_version_file=use_version_file)
         
-        # Install the plugin (pass normalized values, skip internal normalization)
-        return await self._install_plugin_internal(
+        build_plugin = partial(
+            self._build_plugin_internal,
+            source=source,
+            options=options,
+            target_os=native_os,
+            target_arch=native_arch,
+            metadata=metadata,
+            diagnostics=diagnostics,
+        )
+        build_info: dict = {}
+        build_container = await build_plugin(build_info=build_info)
+        description = await self._describe_native(
+            build_plugin, build_info["source_digest"], diagnostics, build_container
+        )
+        installed, _ = await self._install_plugin_internal(
             build_container=build_container,
-            git_source=normalized_git_source,
-            plugin_name=normalized_plugin_name,
-            packer_version=packer_version,
+            git_source=options.git_source,
+            plugin_name=options.plugin_name,
+            packer_version="latest",
             skip_normalization=True,
-            target_os=target_os,
+            target_os=native_os,
+            diagnostics=diagnostics,
+            install_mode="native",
+            images=options.images,
+            description=description,
+        )
+        
+        diagnostics.emit()
+        return dag.directory().with_directory(_strip_plugin_prefix_from_source(options.git_source), installed)
+
+    @function
+    async def build_matrix(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Plugin source directory containing Go code (use --source=. for your project)")
+        ],
+        platforms: Annotated[
+            list[str],
+            Doc("Target platforms as os/arch (e.g., linux/amd64,linux/arm64,darwin/arm64,windows/amd64)")
+        ],
+        git_source: Annotated[
+            Optional[str],
+            Doc("Git path for the plugin. Auto-detected from go.mod if not provided. Automatically normalized to lowercase.")
+        ] = None,
+        version: Annotated[
+            Optional[str],
+            Doc("Semantic version (e.g., 1.0.10). Required unless use_version_file is true")
+        ] = None,
+        plugin_name: Annotated[
+            Optional[str],
+            Doc("Plugin name override (auto-detected from git_source if not provided). Automatically normalized to lowercase.")
+        ] = None,
+        use_version_file: Annotated[
+            bool,
+            Doc("Use VERSION file from source as version (default: false)")
+        ] = False,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for building. Auto-detected from .go-version or go.mod if not provided, defaults to 1.21")
+        ] = None,
+        packer_version: Annotated[
+            str,
+            Doc("Packer image version for installation (default: latest)")
+        ] = "latest",
+        install_mode: Annotated[
+            str,
+            Doc("Install with 'packer' (packer plugins install in the Packer image) or 'native' (no Packer image) (default: packer)")
+        ] = "packer",
+        force_rebuild: Annotated[
+            bool,
+            Doc("Ignore cached build and install layers and rebuild from scratch (default: false)")
+        ] = False,
+        include: Annotated[
+            Optional[list[str]],
+            Doc("Source include patterns replacing the Go-relevant defaults (go:embed targets are always included)")
+        ] = None,
+        exclude: Annotated[
+            Optional[list[str]],
+            Doc("Additional source exclude patterns for the build context")
+        ] = None,
+        vendored: Annotated[
+            Optional[bool],
+            Doc("Build from vendor/ with -mod=vendor instead of downloading modules (auto-detected if not provided)")
+        ] = None,
+        image_lock: Annotated[
+            Optional[dagger.File],
+            Doc(f"Image lockfile pinning base images to digests (default: {IMAGE_LOCK_FILE} in source, if present)")
+        ] = None,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+        reproducible: Annotated[
+            bool,
+            Doc("Build bit-identical binaries with -trimpath, -buildvcs=false and an empty build ID (default: false)")
+        ] = False,
+        profile: Annotated[
+            str,
+            Doc("Build profile: default, dev (fast compiles) or release (-s -w, PGO from default.pgo) (default: default)")
+        ] = "default",
+        debug_symbols: Annotated[
+            bool,
+            Doc("With the release profile, also produce an unstripped debug binary (default: false)")
+        ] = False,
+        trace: Annotated[
+            bool,
+            Doc(f"Record per-stage timing spans and write them as OTLP/JSON to {TRACE_FILE} in the output (default: false)")
+        ] = False,
+        otlp_endpoint: Annotated[
+            Optional[str],
+            Doc("OTLP/HTTP collector to send the timing spans to (e.g., http://localhost:4318)")
+        ] = None,
+        previous_output: Annotated[
+            Optional[dagger.Directory],
+            Doc(f"Output of an earlier build; returned unchanged if its {BUILD_MANIFEST_FILE} matches the inputs")
+        ] = None,
+        plugin_dir: Annotated[
+            Optional[str],
+            Doc("Plugin directory inside source when source is a repository root; only the plugin and the local modules it uses are mounted")
+        ] = None,
+    ) -> dagger.Directory:
+        """
+        Build plugin artifacts for several platforms concurrently into one directory.
+        
+        Git source, Go version and version information are resolved once, then one
+        build per platform is fanned out concurrently, so the total wall time
+        approaches that of the slowest single target. The results are merged into a
+        single directory using the same layout as build_artifacts:
+        
+            packer-plugin-{name}_v{version}_x5.0_{os}_{arch}[.exe]
+            packer-plugin-{name}_v{version}_x5.0_{os}_{arch}[.exe]_SHA256SUM
+        
+        Args:
+            source: Plugin source directory
+            platforms: Target platforms in os/arch form
+            git_source: Git import path (auto-detected from go.mod if not provided)
+            version: Semantic version string
+            plugin_name: Override auto-detected plugin name
+            use_version_file: Read version from VERSION file
+            go_version: Go container image version (auto-detected from .go-version or go.mod if not provided)
+            packer_version: Packer container image version
+            install_mode: Install via the Packer image ('packer') or natively ('native')
+            force_rebuild: Bypass the content-addressed build cache
+            include: Include patterns for the build context (default: Go-relevant files)
+            exclude: Additional exclude patterns for the build context
+            vendored: Use vendor/ instead of the module download stage
+            image_lock: Lockfile with digest-pinned base images
+            registry_mirror: Registry mirror host for base images
+            reproducible: Remove all sources of nondeterminism from the build
+            profile: Build profile (default, dev, release)
+            debug_symbols: Produce a separate unstripped debug binary (release profile)
+            trace: Write per-stage timing spans to the output
+            otlp_endpoint: OTLP/HTTP collector for the timing spans
+            previous_output: Previous output directory to check for up-to-date artifacts
+            plugin_dir: Plugin directory inside a repository root source
+            
+        Returns:
+            Directory with the artifacts of every requested platform
+            
+        Example:
+            dagger call build-matrix \\
+              --source=. \\
+              --use-version-file \\
+              --platforms=linux/amd64,linux/arm64,darwin/arm64,windows/amd64 \\
+              export --path=./dist
+        """
+        targets, platform_error = _parse_platforms(platforms)
+        if platform_error:
+            raise PluginValidationError([platform_error])
+        _raise_for_problems(_validate_build_inputs(
+            version=version,
+            git_source=git_source,
+            plugin_name=plugin_name,
+            platforms=targets,
+            profile=profile,
+            install_mode=install_mode,
+        ))
+        
+        tracer = _Tracer(enabled=trace or bool(otlp_endpoint))
+        with tracer.span("build_matrix", platforms=",".join(f"{o}/{a}" for o, a in targets)):
+            # Resolve once for all platforms; every target shares these options
+            source, metadata, options, diagnostics = await _resolve_build_options(
+                source,
+                _BuildOptions(
+                    git_source=git_source,
+                    version=version,
+                    plugin_name=plugin_name,
+                    use_version_file=use_version_file,
+                    go_version=go_version,
+                    force_rebuild=force_rebuild,
+                    include=include,
+                    exclude=exclude,
+                    vendored=vendored,
+                    reproducible=reproducible,
+                    profile=profile,
+                    debug_symbols=debug_symbols,
+                    plugin_dir=plugin_dir,
+                ),
+                image_lock=image_lock,
+                registry_mirror=registry_mirror,
+                tracer=tracer,
+            )
+            native_platform = await _native_platform()
+            
+            async def build_target(target_os: str, target_arch: str) -> tuple[dagger.Directory, Optional[dict]]:
+                with tracer.span("build_target", goos=target_os, goarch=target_arch):
+                    build_plugin = partial(
+                        self._build_plugin_internal,
+                        source=source,
+                        options=options,
+                        target_os=target_os,
+                        target_arch=target_arch,
+                        metadata=metadata,
+                        diagnostics=diagnostics,
+                    )
+                    build_info: dict = {}
+                    effective_mode = _effective_install_mode(install_mode, (target_os, target_arch), native_platform)
+                    if previous_output is None:
+                        build_container = await build_plugin(tracer=tracer, build_info=build_info)
+                    else:
+                        # Reuse this platform's previous artifacts if they are up to date
+                        build_container = await build_plugin(build_info=build_info)
+                        if build_info:
+                            recorded, reason = await _check_previous_output(
+                                previous_output,
+                                f"{target_os}/{target_arch}",
+                                {
+                                    "build_key": build_info["build_key"],
+                                    "install_mode": effective_mode,
+                                    "packer_version": packer_version if effective_mode == "packer" else None,
+                                },
+                            )
+                            if recorded is not None:
+                                diagnostics.info(f"ℹ {recorded['binary']} is up to date; skipping build and install")
+                                return _previous_artifacts(previous_output, recorded), recorded
+                            diagnostics.info(f"ℹ Previous {target_os}/{target_arch} output is out of date ({reason}); rebuilding")
+                        if tracer.enabled:
+                            build_container = await build_plugin(tracer=tracer)
+                    
+                    description: Optional[dict] = None
+                    if effective_mode == "native":
+                        native_build = build_container if (target_os, target_arch) == native_platform else None
+                        with tracer.span("describe"):
+                            description = await self._describe_native(
+                                build_plugin, build_info["source_digest"], diagnostics, native_build
+                            )
+                    
+                    installed, effective_mode = await self._install_plugin_internal(
+                        build_container=build_container,
+                        git_source=options.git_source,
+                        plugin_name=options.plugin_name,
+                        packer_version=packer_version,
+                        skip_normalization=True,
+                        target_os=target_os,
+                        diagnostics=diagnostics,
+                        install_mode=install_mode,
+                        images=options.images,
+                        tracer=tracer,
+                        description=description,
+                    )
+                    if debug_symbols and profile == "release":
+                        installed = await _with_debug_artifact(installed, build_container)
+                    # Force evaluation here so all targets build concurrently
+                    installed = await installed.sync()
+                    
+                    entry: Optional[dict] = None
+                    if build_info:
+                        binary, sha256 = await _installed_artifact(installed)
+                        entry = _manifest_entry(build_info, effective_mode, packer_version, binary, sha256)
+                    return installed, entry
+            
+            results = await asyncio.gather(*(
+                build_target(target_os, target_arch) for target_os, target_arch in targets
+            ))
+            diagnostics.emit()
+        
+        dist = dag.directory()
+        manifest: dict[str, dict] = {}
+        for (target_os, target_arch), (installed, entry) in zip(targets, results):
+            dist = dist.with_directory(".", installed)
+            if entry is not None:
+                manifest[f"{target_os}/{target_arch}"] = entry
+        if manifest:
+            dist = dist.with_new_file(BUILD_MANIFEST_FILE, json.dumps({"builds": manifest}, indent=2) + "\n")
+        
+        if tracer.enabled:
+            trace_diagnostics = _Diagnostics()
+            payload = await _finish_trace(tracer, otlp_endpoint, trace_diagnostics)
+            trace_diagnostics.emit()
+            if trace:
+                dist = dist.with_new_file(TRACE_FILE, payload)
+        return dist
+
+    @function
+    async def build_many(
+        self,
+        source: Annotated[
+            dagger.Directory,
+            Doc("Parent directory containing the plugin source directories")
+        ],
+        paths: Annotated[
+            Optional[list[str]],
+            Doc("Plugin directories relative to source (discovered from go.mod files if not provided)")
+        ] = None,
+        concurrency: Annotated[
+            int,
+            Doc(f"Maximum number of plugins built at once (default: {DEFAULT_BATCH_CONCURRENCY})")
+        ] = DEFAULT_BATCH_CONCURRENCY,
+        version: Annotated[
+            Optional[str],
+            Doc("Semantic version applied to every plugin (default: each plugin's VERSION file)")
+        ] = None,
+        use_version_file: Annotated[
+            bool,
+            Doc("Use each plugin's VERSION file as its version (default: true)")
+        ] = True,
+        go_version: Annotated[
+            Optional[str],
+            Doc("Go version for all plugins. Auto-detected per plugin from .go-version or go.mod if not provided")
+        ] = None,
+        packer_version: Annotated[
+            str,
+            Doc("Packer image version for installation (default: latest)")
+        ] = "latest",
+        install_mode: Annotated[
+            str,
+            Doc("Install with 'packer' (packer plugins install in the Packer image) or 'native' (no Packer image) (default: packer)")
+        ] = "packer",
+        target_os: Annotated[
+            str,
+            Doc("Target operating system for cross-compilation (default: linux)")
+        ] = "linux",
+        target_arch: Annotated[
+            str,
+            Doc("Target CPU architecture for cross-compilation (default: amd64)")
+        ] = "amd64",
+        force_rebuild: Annotated[
+            bool,
+            Doc("Ignore cached build and install layers and rebuild from scratch (default: false)")
+        ] = False,
+        registry_mirror: Annotated[
+            Optional[str],
+            Doc("Registry host to pull base images from instead of their original registry (e.g., localhost:5000)")
+        ] = None,
+        reproducible: Annotated[
+            bool,
+            Doc("Build bit-identical binaries with -trimpath, -buildvcs=false and an empty build ID (default: false)")
+        ] = False,
+        profile: Annotated[
+            str,
+            Doc("Build profile: default, dev (fast compiles) or release (-s -w, PGO from default.pgo) (default: default)")
+        ] = "default",
+    ) -> dagger.Directory:
+        """
+        Build artifacts for many plugins in a monorepo with bounded concurrency.
+        
+        Plugins are discovered from go.mod files under the parent directory (or
+        taken from --paths) and at most `concurrency` builds run at once. All builds share the Go module and
+        build cache volumes. Each plugin's git source, plugin name, Go version
+        and image lockfile are resolved from its own directory, and its build
+        context holds only the plugin and the local modules it uses (see
+        --plugin-dir on build_artifacts).
+        
+        A failing plugin does not abort the others: its status and error are
+        recorded in build-report.json and the remaining plugins are still built.
+        
+        Output layout:
+        
+            {path}/packer-plugin-{name}_v{version}_x5.0_{os}_{arch}[.exe]
+            {path}/packer-plugin-{name}_v{version}_x5.0_{os}_{arch}[.exe]_SHA256SUM
+            build-report.json
+        
+        Args:
+            source: Parent directory containing the plugins
+            paths: Plugin directories relative to source
+            concurrency: Maximum number of concurrent plugin builds
+            version: Semantic version applied to every plugin
+            use_version_file: Read each plugin's version from its VERSION file
+            go_version: Go container image version (auto-detected per plugin if not provided)
+            packer_version: Packer container image version
+            install_mode: Install via the Packer image ('packer') or natively ('native')
+            target_os: Target OS for cross-compilation (linux, darwin, windows)
+            target_arch: Target architecture for cross-compilation (amd64, arm64, 386)
+            force_rebuild: Bypass the content-addressed build cache
+            registry_mirror: Registry mirror host for base images
+            reproducible: Remove all sources of nondeterminism from the build
+            profile: Build profile (default, dev, release)
+            
+        Returns:
+            Directory with each plugin's artifacts under its path plus build-report.json
+            
+        Example:
+            dagger call build-many \\
+              --source=./plugins \\
+              --concurrency=8 \\
+              export --path=./dist
+        """
+        problems = _validate_build_inputs(
+            version=version,
+            platforms=[(target_os, target_arch)],
+            profile=profile,
+            install_mode=install_mode,
         )
+        if concurrency < 1:
+            problems.append("concurrency must be at least 1")
+        _raise_for_problems(problems)
+        
+        if paths:
+            plugin_dirs = [p.strip("/") or "." for p in paths]
+        else:
+            plugin_dirs = _discover_plugin_dirs(await source.glob("**/go.mod"))
+        if not plugin_dirs:
+            raise PluginValidationError(["no plugin directories with a go.mod found"])
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def build_one(path: str) -> tuple[dict, Optional[dagger.Directory]]:
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    artifacts = await self.build_artifacts(
+                        source=source,
+                        plugin_dir=path,
+                        version=version,
+                        use_version_file=use_version_file,
+                        go_version=go_version,
+                        packer_version=packer_version,
+                        install_mode=install_mode,
+                        target_os=target_os,
+                        target_arch=target_arch,
+                        force_rebuild=force_rebuild,
+                        registry_mirror=registry_mirror,
+                        reproducible=reproducible,
+                        profile=profile,
+                    )
+                    # Evaluate inside the semaphore so the limit bounds real work
+                    artifacts = await artifacts.sync()
+                    entries = await artifacts.entries()
+                except Exception as e:
+                    # Any failure, including a missing path or a failed probe,
+                    # is recorded for this plugin only
+                    status = {
+                        "path": path,
+                        "status": "failed",
+                        "error": _summarize_build_error(e),
+                        "duration_seconds": round(time.monotonic() - started, 3),
+                    }
+                    return status, None
+                status = {
+                    "path": path,
+                    "status": "success",
+                    "artifacts": sorted(entries),
+                    "duration_seconds": round(time.monotonic() - started, 3),
+                }
+                return status, artifacts
+        
+        results = await asyncio.gather(*(build_one(path) for path in plugin_dirs))
+        
+        dist = dag.directory()
+        for status, artifacts in results:
+            if artifacts is not None:
+                dist = dist.with_directory(status["path"], artifacts)
+        
+        report = [status for status, _ in results]
+        failed = [status for status in report if status["status"] == "failed"]
+        diagnostics = _Diagnostics()
+        for status in failed:
+            diagnostics.warning(f"⚠ Warning: {status['path']} failed: {status['error']}")
+        diagnostics.info(f"ℹ Built {len(report) - len(failed)}/{len(report)} plugins")
+        diagnostics.emit()
+        
+        return dist.with_new_file(BATCH_REPORT_FILE, json.dumps({"plugins": report}, indent=2) + "\n")
@@ -0,0 +1 @@
+"""Opt-in benchmark suite for dagger-packer-plugin module."""
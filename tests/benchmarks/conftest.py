@@ -0,0 +1,226 @@
+"""Shared fixtures for the benchmark suite.
+
+Benchmarks are opt-in: set PACKER_PLUGIN_BENCH=1 to run them. Results are
+written as JSON to PACKER_PLUGIN_BENCH_RESULTS (default:
+tests/benchmarks/results.json) and each median is compared against
+baseline.json; a benchmark fails when it is slower than its baseline by more
+than the regression threshold. A benchmark without a baseline entry only
+warns, unless PACKER_PLUGIN_BENCH_STRICT=1 is set, in which case it fails.
+Set PACKER_PLUGIN_BENCH_UPDATE=1 to record the measured medians as the new
+baseline.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import statistics
+import time
+import warnings
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import pytest
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent.parent
+FIXTURES = BENCH_DIR.parent / "fixtures"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+DEFAULT_RESULTS_FILE = BENCH_DIR / "results.json"
+
+# Default allowed slowdown relative to the baseline median (0.25 = 25%)
+DEFAULT_THRESHOLD = 0.25
+
+
+def bench_enabled() -> bool:
+    """Whether the opt-in benchmark suite should run."""
+    return os.environ.get("PACKER_PLUGIN_BENCH", "") not in ("", "0", "false")
+
+
+class FakeFile:
+    """In-memory stand-in for dagger.File."""
+
+    def __init__(self, directory: "FakeDirectory", path: str):
+        self._directory = directory
+        self._path = path
+
+    async def contents(self) -> str:
+        await self._directory.round_trip()
+        return self._directory.files[self._path]
+
+
+class FakeDirectory:
+    """In-memory stand-in for the dagger.Directory calls made by the metadata probe.
+
+    Each call sleeps for `latency` seconds to model an engine round trip, so
+    the benchmarks reflect how many sequential round trips a code path makes.
+    A `salt` changes the digest, defeating the metadata memo for cold runs.
+    """
+
+    def __init__(self, files: dict[str, str], latency: float = 0.0, salt: str = ""):
+        self.files = files
+        self.latency = latency
+        self.salt = salt
+        self.calls = 0
+
+    @classmethod
+    def from_fixture(cls, name: str, latency: float = 0.0, salt: str = "") -> "FakeDirectory":
+        root = FIXTURES / name
+        files = {
+            path.relative_to(root).as_posix(): path.read_text()
+            for path in sorted(root.rglob("*"))
+            if path.is_file()
+        }
+        return cls(files, latency=latency, salt=salt)
+
+    async def round_trip(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def digest(self) -> str:
+        await self.round_trip()
+        payload = json.dumps(self.files, sort_keys=True) + self.salt
+        return "sha256:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def entries(self) -> list[str]:
+        await self.round_trip()
+        names = set()
+        for path in self.files:
+            head, sep, _ = path.partition("/")
+            names.add(f"{head}/" if sep else head)
+        return sorted(names)
+
+    async def glob(self, pattern: str) -> list[str]:
+        await self.round_trip()
+        prefix = pattern.rstrip("*")
+        return sorted(
+            path for path in self.files
+            if path.startswith(prefix) and "/" not in path[len(prefix):]
+        )
+
+    def file(self, path: str) -> FakeFile:
+        return FakeFile(self, path)
+
+
+class BenchmarkRecorder:
+    """Time benchmarks, record their results and check them against the baseline."""
+
+    def __init__(self, baseline: dict, threshold: float, update: bool, strict: bool = False):
+        self.baseline = baseline
+        self.threshold = threshold
+        self.update = update
+        self.strict = strict
+        self.results: dict[str, dict] = {}
+
+    def measure(self, name: str, func: Callable[[], None], rounds: int = 50, warmup: int = 3) -> dict:
+        """Time a synchronous callable and compare its median to the baseline."""
+        for _ in range(warmup):
+            func()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return self.record(name, timings)
+
+    def measure_async(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[object]],
+        rounds: int = 50,
+        warmup: int = 3,
+    ) -> dict:
+        """Time a coroutine factory on a fresh event loop per benchmark."""
+        async def run() -> list[float]:
+            for _ in range(warmup):
+                await factory()
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                await factory()
+                timings.append(time.perf_counter() - started)
+            return timings
+
+        return self.record(name, asyncio.run(run()))
+
+    def record(self, name: str, timings: list[float]) -> dict:
+        """Record timings and fail if the median regressed past the threshold.
+
+        Benchmarks without a baseline entry are recorded and only warn, or
+        fail in strict mode.
+        """
+        result = {
+            "rounds": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "max": max(timings),
+        }
+        baseline = self.baseline.get(name)
+        if baseline:
+            result["baseline_median"] = baseline
+            result["ratio"] = result["median"] / baseline
+        self.results[name] = result
+
+        if self.update:
+            return result
+        if not baseline:
+            message = (
+                f"{name} has no baseline in {BASELINE_FILE.name}; record one with "
+                "PACKER_PLUGIN_BENCH=1 PACKER_PLUGIN_BENCH_UPDATE=1 pytest tests/benchmarks"
+            )
+            assert not self.strict, message
+            warnings.warn(message, stacklevel=2)
+            return result
+        limit = baseline * (1 + self.threshold)
+        assert result["median"] <= limit, (
+            f"{name} regressed: median {result['median'] * 1000:.3f}ms > "
+            f"{limit * 1000:.3f}ms (baseline {baseline * 1000:.3f}ms + {self.threshold:.0%})"
+        )
+        return result
+
+
+def _load_baseline() -> dict:
+    if not BASELINE_FILE.is_file():
+        return {"threshold": DEFAULT_THRESHOLD, "benchmarks": {}}
+    return json.loads(BASELINE_FILE.read_text())
+
+
+@pytest.fixture(scope="session")
+def bench() -> BenchmarkRecorder:
+    """Session-wide recorder; writes results (and optionally the baseline) at exit."""
+    baseline = _load_baseline()
+    threshold = float(os.environ.get("PACKER_PLUGIN_BENCH_THRESHOLD", baseline.get("threshold", DEFAULT_THRESHOLD)))
+    update = os.environ.get("PACKER_PLUGIN_BENCH_UPDATE", "") not in ("", "0", "false")
+    strict = os.environ.get("PACKER_PLUGIN_BENCH_STRICT", "") not in ("", "0", "false")
+    recorder = BenchmarkRecorder(baseline.get("benchmarks", {}), threshold, update, strict)
+
+    yield recorder
+
+    if not recorder.results:
+        return
+    results_file = Path(os.environ.get("PACKER_PLUGIN_BENCH_RESULTS", DEFAULT_RESULTS_FILE))
+    results_file.write_text(json.dumps({
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "threshold": threshold,
+        "benchmarks": recorder.results,
+    }, indent=2) + "\n")
+
+    if update:
+        benchmarks = dict(baseline.get("benchmarks", {}))
+        benchmarks.update({name: result["median"] for name, result in recorder.results.items()})
+        baseline["benchmarks"] = dict(sorted(benchmarks.items()))
+        baseline.setdefault("threshold", DEFAULT_THRESHOLD)
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+@pytest.fixture
+def fake_source() -> Callable[..., FakeDirectory]:
+    """Factory for in-memory fixture plugin directories."""
+    def make(name: str = "version-file-plugin", latency: float = 0.0, salt: Optional[str] = None) -> FakeDirectory:
+        return FakeDirectory.from_fixture(name, latency=latency, salt=salt or "")
+    return make
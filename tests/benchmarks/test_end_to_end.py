@@ -0,0 +1,65 @@
+"""End-to-end timings of the build functions on a local Dagger engine.
+
+Each benchmark runs `dagger call` against the bench-plugin fixture, so it
+needs the dagger CLI and a running engine. Cold runs pass --force-rebuild;
+warm runs measure the fully cached path, which is dominated by the module's
+own orchestration overhead.
+"""
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from .conftest import FIXTURES, REPO_ROOT, bench_enabled
+
+
+pytestmark = [
+    pytest.mark.skipif(not bench_enabled(), reason="set PACKER_PLUGIN_BENCH=1 to run benchmarks"),
+    pytest.mark.skipif(shutil.which("dagger") is None, reason="dagger CLI not found"),
+]
+
+BENCH_PLUGIN = FIXTURES / "bench-plugin"
+
+# Rounds per end-to-end benchmark (each round is a full dagger call)
+E2E_ROUNDS = int(os.environ.get("PACKER_PLUGIN_BENCH_E2E_ROUNDS", "3"))
+
+
+def _dagger_call(*args: str) -> float:
+    """Run a dagger call against the module and return its wall time in seconds."""
+    command = ["dagger", "call", "-m", str(REPO_ROOT), *args]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    assert completed.returncode == 0, f"{' '.join(command)} failed:\n{completed.stderr}"
+    return elapsed
+
+
+def _timings(*args: str) -> list[float]:
+    """Warm the engine once, then time E2E_ROUNDS calls."""
+    _dagger_call(*args)
+    return [_dagger_call(*args) for _ in range(E2E_ROUNDS)]
+
+
+class TestEndToEndBenchmarks:
+    """Benchmark build_binary and build_artifacts on the bench-plugin fixture."""
+
+    def test_build_binary_cold(self, bench):
+        """Benchmark build_binary with the build cache bypassed."""
+        bench.record("e2e_build_binary_cold", _timings(
+            "build-binary", f"--source={BENCH_PLUGIN}", "--use-version-file", "--force-rebuild", "sync",
+        ))
+
+    def test_build_binary_warm(self, bench):
+        """Benchmark a fully cached build_binary."""
+        bench.record("e2e_build_binary_warm", _timings(
+            "build-binary", f"--source={BENCH_PLUGIN}", "--use-version-file", "sync",
+        ))
+
+    def test_build_artifacts_warm(self, bench):
+        """Benchmark a fully cached build_artifacts with the native install."""
+        bench.record("e2e_build_artifacts_warm", _timings(
+            "build-artifacts", f"--source={BENCH_PLUGIN}", "--use-version-file", "--install-mode=native", "entries",
+        ))
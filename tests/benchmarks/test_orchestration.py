@@ -0,0 +1,106 @@
+"""Micro-benchmarks of the module's resolution paths against an in-memory source.
+
+These import main.py directly, so they need the dagger SDK installed but no
+engine: the source directory is a FakeDirectory and no query is executed.
+"""
+
+import asyncio
+import itertools
+
+import pytest
+
+from .conftest import bench_enabled
+
+
+pytestmark = pytest.mark.skipif(not bench_enabled(), reason="set PACKER_PLUGIN_BENCH=1 to run benchmarks")
+
+# Simulated engine round trip for the probe benchmarks (1ms)
+ROUND_TRIP = 0.001
+
+
+@pytest.fixture
+def metadata(main_module, fake_source):
+    """Probed metadata of the version-file fixture plugin."""
+    return asyncio.run(main_module._probe_source_metadata(fake_source("version-file-plugin")))
+
+
+def _fresh(main_module, metadata):
+    """Copy metadata without its cached properties, so resolution is re-run."""
+    return main_module._SourceMetadata(files=metadata.files, entries=metadata.entries, digest=metadata.digest)
+
+
+class TestProbeBenchmarks:
+    """Benchmark the single-pass metadata probe and its memo."""
+
+    def test_probe_cold(self, bench, main_module, fake_source):
+        """Benchmark a full probe with a simulated engine round trip per call."""
+        salts = itertools.count()
+
+        async def probe():
+            main_module._metadata_cache.clear()
+            source = fake_source("version-file-plugin", latency=ROUND_TRIP, salt=str(next(salts)))
+            await main_module._get_source_metadata(source)
+
+        bench.measure_async("probe_cold", probe, rounds=30)
+
+    def test_probe_memoized(self, bench, main_module, fake_source):
+        """Benchmark a memo hit, which costs only the digest round trip."""
+        source = fake_source("version-file-plugin", latency=ROUND_TRIP, salt="memo")
+
+        async def probe():
+            await main_module._get_source_metadata(source)
+
+        bench.measure_async("probe_memoized", probe, rounds=30)
+
+
+class TestResolutionBenchmarks:
+    """Benchmark the pure resolvers on already-probed metadata."""
+
+    def test_resolve_git_source_from_gomod(self, bench, main_module, metadata):
+        """Benchmark git source auto-detection from go.mod."""
+        bench.measure(
+            "resolve_git_source_gomod",
+            lambda: main_module._resolve_git_source(_fresh(main_module, metadata), None),
+            rounds=500,
+        )
+
+    def test_resolve_git_source_explicit(self, bench, main_module, metadata):
+        """Benchmark an explicit git source, which skips go.mod parsing."""
+        bench.measure(
+            "resolve_git_source_explicit",
+            lambda: main_module._resolve_git_source(metadata, "github.com/example/packer-plugin-test"),
+            rounds=500,
+        )
+
+    def test_resolve_go_version(self, bench, main_module, fake_source):
+        """Benchmark Go version resolution from .go-version."""
+        go_metadata = asyncio.run(main_module._probe_source_metadata(fake_source("go-version-plugin")))
+        bench.measure(
+            "resolve_go_version",
+            lambda: main_module._resolve_go_version(_fresh(main_module, go_metadata), None),
+            rounds=500,
+        )
+
+
+class TestFunctionBenchmarks:
+    """Benchmark public functions end to end against the in-memory source."""
+
+    def test_detect_version(self, bench, main_module, fake_source):
+        """Benchmark detect_version including the (memoized) probe."""
+        plugin = main_module.PackerPlugin()
+        source = fake_source("version-file-plugin", latency=ROUND_TRIP, salt="detect")
+
+        async def detect():
+            await plugin.detect_version(source=source)
+
+        bench.measure_async("detect_version", detect, rounds=30)
+
+    def test_prep_gitignore(self, bench, main_module, fake_source):
+        """Benchmark prep_gitignore; the returned File is built lazily, not executed."""
+        plugin = main_module.PackerPlugin()
+        source = fake_source("version-file-plugin", latency=ROUND_TRIP, salt="gitignore")
+
+        async def prep():
+            await plugin.prep_gitignore(source=source)
+
+        bench.measure_async("prep_gitignore", prep, rounds=30)
@@ -0,0 +1,18 @@
+"""Fixtures shared by the unit tests and the benchmark suite."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    """Import the module's main.py (requires the dagger SDK)."""
+    pytest.importorskip("dagger")
+    sys.path.insert(0, str(REPO_ROOT / ".dagger" / "src"))
+    from dagger_packer_plugin import main
+    return main
@@ -0,0 +1,3 @@
+module github.com/example/packer-plugin-bench
+
+go 1.21
@@ -0,0 +1,15 @@
+package main
+
+import (
+	"fmt"
+
+	"github.com/example/packer-plugin-bench/version"
+)
+
+func main() {
+	v := version.Version
+	if version.VersionPrerelease != "" {
+		v += "-" + version.VersionPrerelease
+	}
+	fmt.Println(v)
+}
@@ -0,0 +1,7 @@
+package version
+
+// Version is set at build time via -ldflags.
+var Version string
+
+// VersionPrerelease is cleared at build time via -ldflags.
+var VersionPrerelease = "dev"
@@ -0,0 +1,3 @@
+module github.com/example/packer-plugin-describe
+
+go 1.21
@@ -0,0 +1,31 @@
+package main
+
+import (
+	"encoding/json"
+	"fmt"
+	"os"
+
+	"github.com/example/packer-plugin-describe/version"
+)
+
+// main answers the describe command like a packer-plugin-sdk plugin, which
+// is all packer plugins install needs, without depending on the SDK.
+func main() {
+	v := version.Version
+	if version.VersionPrerelease != "" {
+		v += "-" + version.VersionPrerelease
+	}
+	if len(os.Args) < 2 || os.Args[1] != "describe" {
+		fmt.Println(v)
+		return
+	}
+	json.NewEncoder(os.Stdout).Encode(map[string]interface{}{
+		"version":         v,
+		"sdk_version":     "0.5.2",
+		"api_version":     "x5.0",
+		"builders":        []string{"-packer-default-plugin-name-"},
+		"post_processors": []string{},
+		"provisioners":    []string{},
+		"datasources":     []string{},
+	})
+}
@@ -0,0 +1 @@
+"""Engine-backed integration tests for dagger-packer-plugin module."""
@@ -0,0 +1,89 @@
+"""Parity of the native install with `packer plugins install` on a real engine.
+
+Builds the describe-plugin fixture with build_artifacts in both install
+modes for the engine's native platform and compares the installed trees.
+Only native binaries can be installed by packer, so the target must match
+the engine; the build manifest confirms that the packer run really used the
+Packer image. The build key does not depend on the install mode, so both
+installs get the same binary and must produce the same file names, binary
+bytes and checksum files. Needs PACKER_PLUGIN_INTEGRATION=1, the dagger CLI
+and a running engine.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+
+pytestmark = [
+    pytest.mark.skipif(
+        os.environ.get("PACKER_PLUGIN_INTEGRATION", "") in ("", "0", "false"),
+        reason="set PACKER_PLUGIN_INTEGRATION=1 to run engine-backed tests",
+    ),
+    pytest.mark.skipif(shutil.which("dagger") is None, reason="dagger CLI not found"),
+]
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DESCRIBE_PLUGIN = REPO_ROOT / "tests" / "fixtures" / "describe-plugin"
+
+# Written by build_artifacts next to the installed files; records the install mode
+BUILD_MANIFEST_FILE = "build-manifest.json"
+
+
+@pytest.fixture(scope="module")
+def engine_platform() -> tuple[str, str]:
+    """Native (os, arch) of the Dagger engine, where packer can run the binary."""
+    completed = subprocess.run(
+        ["dagger", "query"],
+        input="{ defaultPlatform }",
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, f"dagger query failed:\n{completed.stderr}"
+    target_os, target_arch = json.loads(completed.stdout)["defaultPlatform"].split("/")[:2]
+    return target_os, target_arch
+
+
+def _export_install(install_mode: str, platform: tuple[str, str], path: Path) -> tuple[dict, dict[str, bytes]]:
+    """Build and install the fixture with one install mode; return its manifest entry and tree."""
+    target_os, target_arch = platform
+    command = [
+        "dagger", "call", "-m", str(REPO_ROOT),
+        "build-artifacts", f"--source={DESCRIBE_PLUGIN}", "--use-version-file",
+        f"--install-mode={install_mode}", f"--target-os={target_os}", f"--target-arch={target_arch}",
+        "export", f"--path={path}",
+    ]
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, f"{' '.join(command)} failed:\n{completed.stderr}"
+    manifest = json.loads((path / BUILD_MANIFEST_FILE).read_text())
+    tree = {
+        file.relative_to(path).as_posix(): file.read_bytes()
+        for file in sorted(path.rglob("*"))
+        if file.is_file() and file.name != BUILD_MANIFEST_FILE
+    }
+    return manifest["builds"][f"{target_os}/{target_arch}"], tree
+
+
+class TestInstallParity:
+    """Compare native and packer installs of the same binary."""
+
+    def test_native_matches_packer_install(self, tmp_path, engine_platform):
+        """Test that both install modes produce identical trees."""
+        packer_entry, packer = _export_install("packer", engine_platform, tmp_path / "packer")
+        native_entry, native = _export_install("native", engine_platform, tmp_path / "native")
+
+        # The packer run must not have fallen back to the native install
+        assert packer_entry["install_mode"] == "packer"
+        assert packer_entry["packer_version"]
+        assert native_entry["install_mode"] == "native"
+        assert packer_entry["build_key"] == native_entry["build_key"]
+
+        assert sorted(native) == sorted(packer)
+        assert any(name.endswith("_SHA256SUM") for name in packer)
+        for name, content in packer.items():
+            assert native[name] == content, f"{name} differs between native and packer installs"
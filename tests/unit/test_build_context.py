@@ -0,0 +1,57 @@
+"""Tests for the minimal build context assembled for the build container."""
+
+import re
+
+
+def _parse_embed_patterns(go_file: str, content: str) -> list[str]:
+    """Extract go:embed patterns as source-relative paths (mirrors main.py logic)."""
+    package_dir = go_file.rsplit("/", 1)[0] if "/" in go_file else ""
+    patterns: list[str] = []
+    for match in re.finditer(r'^//go:embed\s+(.+)$', content, re.MULTILINE):
+        for token in re.findall(r'"([^"]+)"|`([^`]+)`|(\S+)', match.group(1)):
+            pattern = next(part for part in token if part)
+            if pattern.startswith("all:"):
+                pattern = pattern[len("all:"):]
+            path = f"{package_dir}/{pattern}" if package_dir else pattern
+            for include in (path, f"{path}/**"):
+                if include not in patterns:
+                    patterns.append(include)
+    return patterns
+
+
+class TestEmbedPatterns:
+    """Test detection of go:embed targets."""
+    
+    def test_version_file_embed(self):
+        """Test the common version/VERSION embed."""
+        content = 'package version\n\nimport _ "embed"\n\n//go:embed VERSION\nvar Version string\n'
+        patterns = _parse_embed_patterns("version/version.go", content)
+        assert patterns == ["version/VERSION", "version/VERSION/**"]
+    
+    def test_root_package_embed(self):
+        """Test embeds in a root package are not prefixed."""
+        patterns = _parse_embed_patterns("main.go", "//go:embed docs\nvar docs embed.FS\n")
+        assert patterns == ["docs", "docs/**"]
+    
+    def test_multiple_and_quoted_patterns(self):
+        """Test several patterns on one directive, including quoted ones."""
+        content = '//go:embed templates/*.tmpl "static files/logo.png" `raw.txt`\nvar fs embed.FS\n'
+        patterns = _parse_embed_patterns("builder/config.go", content)
+        assert "builder/templates/*.tmpl" in patterns
+        assert "builder/static files/logo.png" in patterns
+        assert "builder/raw.txt" in patterns
+    
+    def test_all_prefix_stripped(self):
+        """Test that the all: prefix is removed from directory embeds."""
+        patterns = _parse_embed_patterns("assets/assets.go", "//go:embed all:web\nvar web embed.FS\n")
+        assert patterns == ["assets/web", "assets/web/**"]
+    
+    def test_multiple_directives(self):
+        """Test several go:embed directives in one file without duplicates."""
+        content = "//go:embed a.txt\nvar a string\n\n//go:embed a.txt b.txt\nvar ab embed.FS\n"
+        patterns = _parse_embed_patterns("pkg/x.go", content)
+        assert patterns == ["pkg/a.txt", "pkg/a.txt/**", "pkg/b.txt", "pkg/b.txt/**"]
+    
+    def test_no_embed(self):
+        """Test that files without directives produce no patterns."""
+        assert _parse_embed_patterns("main.go", "package main\n\n// go:embed is mentioned here\n") == []
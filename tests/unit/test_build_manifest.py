@@ -0,0 +1,168 @@
+"""Tests for the build manifest used by the up-to-date check."""
+
+import json
+from typing import Optional
+
+
+def _effective_install_mode(
+    install_mode: str,
+    target: tuple[str, str],
+    native_platform: tuple[str, str],
+) -> str:
+    """Return the install mode used for a target (mirrors main.py logic)."""
+    return install_mode if target == native_platform else "native"
+
+
+def _manifest_entry(
+    build_info: dict,
+    install_mode: str,
+    packer_version: str,
+    binary: str,
+    sha256: str,
+) -> dict:
+    """Build a manifest entry (mirrors main.py logic)."""
+    return {
+        "build_key": build_info["build_key"],
+        "source_digest": build_info["source_digest"],
+        "go_version": build_info["go_version"],
+        "ldflags": build_info["ldflags"],
+        "build_flags": list(build_info["build_flags"]),
+        "version": build_info["version"],
+        "install_mode": install_mode,
+        "packer_version": packer_version if install_mode == "packer" else None,
+        "binary": binary,
+        "sha256": sha256,
+    }
+
+
+def _parse_build_manifest(content: Optional[str]) -> dict[str, dict]:
+    """Parse a build manifest (mirrors main.py logic)."""
+    if not content:
+        return {}
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    builds = data.get("builds") if isinstance(data, dict) else None
+    if not isinstance(builds, dict):
+        return {}
+    return {platform: entry for platform, entry in builds.items() if isinstance(entry, dict)}
+
+
+def _manifest_mismatch(recorded: Optional[dict], expected: dict) -> Optional[str]:
+    """Compare a manifest entry with the requested build (mirrors main.py logic)."""
+    if recorded is None:
+        return "no manifest entry for this platform"
+    for key in ("build_key", "install_mode", "packer_version"):
+        if recorded.get(key) != expected.get(key):
+            return f"{key} changed"
+    if not recorded.get("binary") or not recorded.get("sha256"):
+        return "manifest entry has no artifacts"
+    return None
+
+
+BUILD_INFO = {
+    "build_key": "a" * 64,
+    "source_digest": "sha256:abc123",
+    "go_version": "1.23.2",
+    "ldflags": "-X github.com/user/packer-plugin-docker/version.Version=1.0.0 "
+               "-X github.com/user/packer-plugin-docker/version.VersionPrerelease=",
+    "build_flags": ["-trimpath", "-buildvcs=false"],
+    "version": "1.0.0",
+}
+BINARY = "packer-plugin-docker_v1.0.0_x5.0_linux_amd64"
+
+
+def _expected(build_key: str = "a" * 64, install_mode: str = "packer", packer_version: Optional[str] = "1.11.2") -> dict:
+    return {"build_key": build_key, "install_mode": install_mode, "packer_version": packer_version}
+
+
+class TestManifestEntry:
+    """Test the recorded manifest entry."""
+    
+    def test_records_inputs_and_artifact(self):
+        """Test that the entry holds the build inputs, platform artifact and digest."""
+        entry = _manifest_entry(BUILD_INFO, "packer", "1.11.2", BINARY, "f" * 64)
+        assert entry["build_key"] == "a" * 64
+        assert entry["go_version"] == "1.23.2"
+        assert entry["ldflags"] == BUILD_INFO["ldflags"]
+        assert entry["build_flags"] == ["-trimpath", "-buildvcs=false"]
+        assert entry["binary"] == BINARY
+        assert entry["sha256"] == "f" * 64
+        assert entry["packer_version"] == "1.11.2"
+    
+    def test_native_install_ignores_packer_version(self):
+        """Test that the Packer version is not recorded for native installs."""
+        entry = _manifest_entry(BUILD_INFO, "native", "latest", BINARY, "f" * 64)
+        assert entry["packer_version"] is None
+    
+    def test_round_trip(self):
+        """Test that a written manifest parses back to the same entries."""
+        entry = _manifest_entry(BUILD_INFO, "packer", "1.11.2", BINARY, "f" * 64)
+        content = json.dumps({"builds": {"linux/amd64": entry}}, indent=2)
+        assert _parse_build_manifest(content) == {"linux/amd64": entry}
+
+
+class TestEffectiveInstallMode:
+    """Test that manifests record the install mode actually used."""
+    
+    def test_native_target_keeps_requested_mode(self):
+        """Test that native targets are installed with the requested mode."""
+        assert _effective_install_mode("packer", ("linux", "arm64"), ("linux", "arm64")) == "packer"
+        assert _effective_install_mode("native", ("linux", "arm64"), ("linux", "arm64")) == "native"
+    
+    def test_foreign_target_is_native(self):
+        """Test that a packer install of a foreign target is recorded as native without a Packer version."""
+        mode = _effective_install_mode("packer", ("linux", "amd64"), ("linux", "arm64"))
+        assert mode == "native"
+        entry = _manifest_entry(BUILD_INFO, mode, "1.11.2", BINARY, "f" * 64)
+        assert entry["install_mode"] == "native"
+        assert entry["packer_version"] is None
+        assert _manifest_mismatch(entry, _expected(install_mode=mode, packer_version=None)) is None
+
+
+class TestParseBuildManifest:
+    """Test tolerant parsing of previous manifests."""
+    
+    def test_missing_or_malformed(self):
+        """Test that missing and malformed manifests have no entries."""
+        assert _parse_build_manifest(None) == {}
+        assert _parse_build_manifest("") == {}
+        assert _parse_build_manifest("{not json") == {}
+        assert _parse_build_manifest("[]") == {}
+        assert _parse_build_manifest('{"builds": []}') == {}
+    
+    def test_skips_invalid_entries(self):
+        """Test that non-object platform entries are ignored."""
+        content = json.dumps({"builds": {"linux/amd64": {"build_key": "x"}, "darwin/arm64": "bad"}})
+        assert _parse_build_manifest(content) == {"linux/amd64": {"build_key": "x"}}
+
+
+class TestManifestMismatch:
+    """Test the up-to-date comparison."""
+    
+    def _recorded(self, **overrides) -> dict:
+        entry = _manifest_entry(BUILD_INFO, "packer", "1.11.2", BINARY, "f" * 64)
+        entry.update(overrides)
+        return entry
+    
+    def test_matching_entry(self):
+        """Test that identical inputs are up to date."""
+        assert _manifest_mismatch(self._recorded(), _expected()) is None
+    
+    def test_missing_entry(self):
+        """Test that a platform without an entry is stale."""
+        assert _manifest_mismatch(None, _expected()) == "no manifest entry for this platform"
+    
+    def test_changed_build_key(self):
+        """Test that changed build inputs are stale."""
+        assert _manifest_mismatch(self._recorded(), _expected(build_key="b" * 64)) == "build_key changed"
+    
+    def test_changed_install_inputs(self):
+        """Test that a different install mode or Packer version is stale."""
+        assert _manifest_mismatch(self._recorded(), _expected(install_mode="native", packer_version=None)) == "install_mode changed"
+        assert _manifest_mismatch(self._recorded(), _expected(packer_version="1.12.0")) == "packer_version changed"
+    
+    def test_entry_without_artifacts(self):
+        """Test that an entry without a binary digest is stale."""
+        assert _manifest_mismatch(self._recorded(sha256=""), _expected()) == "manifest entry has no artifacts"
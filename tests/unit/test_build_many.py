@@ -0,0 +1,251 @@
+"""Tests for monorepo plugin discovery and batch build error reporting."""
+
+import asyncio
+import json
+
+import pytest
+
+
+def _discover_plugin_dirs(go_mod_paths: list[str]) -> list[str]:
+    """Select plugin directories from go.mod paths (mirrors main.py logic)."""
+    ignored = {"vendor", "testdata", ".dagger"}
+    dirs: list[str] = []
+    for path in go_mod_paths:
+        parts = path.strip("/").split("/")[:-1]
+        if ignored.intersection(parts):
+            continue
+        dirs.append("/".join(parts) or ".")
+
+    nested = [d for d in dirs if d != "."]
+    if not nested:
+        return sorted(set(dirs))
+
+    plugin_dirs: list[str] = []
+    for d in sorted(set(nested)):
+        if not any(d.startswith(f"{parent}/") for parent in plugin_dirs):
+            plugin_dirs.append(d)
+    return plugin_dirs
+
+
+class PluginValidationError(Exception):
+    """Invalid inputs (mirrors main.py logic)."""
+    
+    def __init__(self, problems: list[str]) -> None:
+        self.problems = list(problems)
+        super().__init__("\n".join(f"✗ Error: {problem}" for problem in self.problems))
+
+
+def _summarize_build_error(error: Exception) -> str:
+    """Extract a one-line failure reason (mirrors main.py logic)."""
+    if isinstance(error, PluginValidationError):
+        return "; ".join(error.problems)
+    stdout = getattr(error, "stdout", "") or ""
+    stderr = getattr(error, "stderr", "") or ""
+    for line in (stdout + "\n" + stderr).splitlines():
+        if "✗ Error:" in line:
+            return line.split("✗ Error:", 1)[1].strip()
+    lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+    if lines:
+        return lines[-1]
+    return str(error).strip() or type(error).__name__
+
+
+class FakeExecError(Exception):
+    """Stand-in carrying the stdout/stderr attributes of a failed exec."""
+    
+    def __init__(self, message: str, stdout: str = "", stderr: str = ""):
+        super().__init__(message)
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class FakePluginDirectory:
+    """Stand-in for a plugin directory of the batch source."""
+    
+    def __init__(self, path: str, exists: bool):
+        self.path = path
+        self.exists = exists
+    
+    async def digest(self) -> str:
+        if not self.exists:
+            raise FakeExecError(f"{self.path}: no such file or directory")
+        return f"sha256:{self.path}"
+
+
+class FakeBatchSource:
+    """Stand-in for the parent directory passed to build_many."""
+    
+    def __init__(self, plugin_dirs: list[str]):
+        self.plugin_dirs = plugin_dirs
+    
+    def directory(self, path: str) -> FakePluginDirectory:
+        return FakePluginDirectory(path, path in self.plugin_dirs)
+
+
+class FakeArtifacts:
+    """Stand-in for the artifacts directory of one plugin."""
+    
+    def __init__(self, entries: list[str]):
+        self._entries = entries
+    
+    async def sync(self) -> "FakeArtifacts":
+        return self
+    
+    async def entries(self) -> list[str]:
+        return self._entries
+
+
+class FakeDist:
+    """Records the directories and files added to the batch output."""
+    
+    def __init__(self, directories: tuple = (), files: tuple = ()):
+        self.directories = directories
+        self.files = files
+    
+    def with_directory(self, path: str, directory: FakeArtifacts) -> "FakeDist":
+        return FakeDist(self.directories + (path,), self.files)
+    
+    def with_new_file(self, path: str, contents: str) -> "FakeDist":
+        return FakeDist(self.directories, self.files + ((path, contents),))
+
+
+class FakeDag:
+    """Stand-in for the dag client used to assemble the batch output."""
+    
+    def directory(self) -> FakeDist:
+        return FakeDist()
+
+
+class TestDiscoverPluginDirs:
+    """Test plugin discovery from go.mod files."""
+    
+    def test_sibling_plugins(self):
+        """Test that each plugin directory is discovered once, sorted."""
+        paths = ["packer-plugin-vsphere/go.mod", "packer-plugin-docker/go.mod"]
+        assert _discover_plugin_dirs(paths) == ["packer-plugin-docker", "packer-plugin-vsphere"]
+    
+    def test_nested_modules_are_skipped(self):
+        """Test that tool modules inside a plugin are not built separately."""
+        paths = [
+            "packer-plugin-docker/go.mod",
+            "packer-plugin-docker/tools/go.mod",
+            "plugins/packer-plugin-ansible/go.mod",
+        ]
+        assert _discover_plugin_dirs(paths) == ["packer-plugin-docker", "plugins/packer-plugin-ansible"]
+    
+    def test_vendor_and_testdata_are_ignored(self):
+        """Test that vendored and fixture modules are ignored."""
+        paths = [
+            "packer-plugin-docker/go.mod",
+            "packer-plugin-docker/vendor/github.com/x/y/go.mod",
+            "shared/testdata/fixture/go.mod",
+            ".dagger/go.mod",
+        ]
+        assert _discover_plugin_dirs(paths) == ["packer-plugin-docker"]
+    
+    def test_root_module_with_subplugins(self):
+        """Test that a root go.mod does not hide the plugins below it."""
+        paths = ["go.mod", "packer-plugin-a/go.mod", "packer-plugin-b/go.mod"]
+        assert _discover_plugin_dirs(paths) == ["packer-plugin-a", "packer-plugin-b"]
+    
+    def test_single_root_plugin(self):
+        """Test that a lone root go.mod is built as a plugin."""
+        assert _discover_plugin_dirs(["go.mod"]) == ["."]
+    
+    def test_no_modules(self):
+        """Test that no go.mod files yield no plugins."""
+        assert _discover_plugin_dirs([]) == []
+
+
+class TestSummarizeBuildError:
+    """Test extraction of per-plugin failure reasons."""
+    
+    def test_module_error_message(self):
+        """Test that the module's own error message is preferred."""
+        error = FakeExecError(
+            "exit code: 1",
+            stdout="✗ Error: version is required. Provide --version or use --use-version-file\n",
+        )
+        assert _summarize_build_error(error) == "version is required. Provide --version or use --use-version-file"
+    
+    def test_validation_error_problems(self):
+        """Test that every problem of a validation error is reported on one line."""
+        error = PluginValidationError([
+            "Version 'v1.0.0' should not have 'v' prefix. Use '1.0.0' instead.",
+            "profile must be one of: default, dev, release",
+        ])
+        assert _summarize_build_error(error) == (
+            "Version 'v1.0.0' should not have 'v' prefix. Use '1.0.0' instead.; "
+            "profile must be one of: default, dev, release"
+        )
+    
+    def test_last_stderr_line(self):
+        """Test that compiler failures report the last stderr line."""
+        error = FakeExecError(
+            "exit code: 1",
+            stderr="# github.com/user/packer-plugin-docker\n./main.go:10:2: undefined: foo\n\n",
+        )
+        assert _summarize_build_error(error) == "./main.go:10:2: undefined: foo"
+    
+    def test_plain_exception(self):
+        """Test that errors without output fall back to the message."""
+        assert _summarize_build_error(Exception("connection reset")) == "connection reset"
+        assert _summarize_build_error(RuntimeError()) == "RuntimeError"
+
+
+class TestBuildMany:
+    """Test that one failing plugin does not abort the batch."""
+    
+    @pytest.fixture
+    def plugin(self, main_module, monkeypatch):
+        """A PackerPlugin whose builds only probe the plugin directory."""
+        monkeypatch.setattr(main_module, "dag", FakeDag())
+        plugin = main_module.PackerPlugin()
+        
+        async def build_artifacts(source, plugin_dir, **kwargs):
+            await source.directory(plugin_dir).digest()
+            if plugin_dir == "packer-plugin-broken":
+                raise RuntimeError("unexpected failure")
+            return FakeArtifacts([f"{plugin_dir}_v1.0.0_x5.0_linux_amd64"])
+        
+        monkeypatch.setattr(plugin, "build_artifacts", build_artifacts)
+        return plugin
+    
+    @staticmethod
+    def _report(dist: FakeDist) -> dict:
+        [(name, contents)] = dist.files
+        assert name == "build-report.json"
+        return {entry["path"]: entry for entry in json.loads(contents)["plugins"]}
+    
+    def test_missing_path_is_reported(self, plugin):
+        """Test that a nonexistent --paths entry still yields a report with the others built."""
+        source = FakeBatchSource(["packer-plugin-a", "packer-plugin-b"])
+        dist = asyncio.run(plugin.build_many(
+            source=source,
+            paths=["packer-plugin-a", "packer-plugin-typo", "packer-plugin-b"],
+        ))
+        
+        report = self._report(dist)
+        assert report["packer-plugin-typo"]["status"] == "failed"
+        assert report["packer-plugin-typo"]["error"] == "packer-plugin-typo: no such file or directory"
+        assert report["packer-plugin-a"]["status"] == "success"
+        assert report["packer-plugin-b"]["status"] == "success"
+        assert dist.directories == ("packer-plugin-a", "packer-plugin-b")
+    
+    def test_unexpected_error_is_reported(self, plugin):
+        """Test that an error outside the Dagger and validation errors is isolated too."""
+        source = FakeBatchSource(["packer-plugin-a", "packer-plugin-broken"])
+        dist = asyncio.run(plugin.build_many(
+            source=source,
+            paths=["packer-plugin-a", "packer-plugin-broken"],
+        ))
+        
+        report = self._report(dist)
+        assert report["packer-plugin-broken"] == {
+            "path": "packer-plugin-broken",
+            "status": "failed",
+            "error": "unexpected failure",
+            "duration_seconds": report["packer-plugin-broken"]["duration_seconds"],
+        }
+        assert report["packer-plugin-a"]["status"] == "success"
+        assert dist.directories == ("packer-plugin-a",)
@@ -0,0 +1,102 @@
+"""Tests for build profile flags and debug artifact naming."""
+
+import os
+import re
+
+
+def _go_version_at_least(go_version: str, minimum: tuple[int, int]) -> bool:
+    """Check a Go version against a minimum (mirrors main.py logic)."""
+    match = re.match(r"^(\d+)\.(\d+)", go_version)
+    if not match:
+        return True
+    return (int(match.group(1)), int(match.group(2))) >= minimum
+
+
+def _profile_build_args(profile: str, go_version: str, has_pgo_profile: bool) -> tuple[list[str], list[str]]:
+    """Compute build flags and ldflags for a profile (mirrors main.py logic)."""
+    build_flags: list[str] = []
+    ldflags: list[str] = []
+    if profile == "dev":
+        build_flags.append("-gcflags=all=-N -l")
+        if _go_version_at_least(go_version, (1, 21)):
+            build_flags.append("-pgo=off")
+    elif profile == "release":
+        ldflags.extend(["-s", "-w"])
+        if has_pgo_profile and _go_version_at_least(go_version, (1, 20)):
+            build_flags.append("-pgo=auto")
+    return build_flags, ldflags
+
+
+def _debug_artifact_name(binary_name: str, version: str, target_os: str, target_arch: str) -> str:
+    """Path of the debug binary (mirrors main.py logic)."""
+    stem, ext = os.path.splitext(binary_name)
+    return f"debug/{stem}_v{version}_{target_os}_{target_arch}{ext}.debug"
+
+
+class TestGoVersionAtLeast:
+    """Test Go version comparison used to gate -pgo."""
+    
+    def test_versions(self):
+        """Test major.minor comparison of version tags."""
+        assert _go_version_at_least("1.21", (1, 21))
+        assert _go_version_at_least("1.23.2", (1, 21))
+        assert _go_version_at_least("1.22-alpine", (1, 21))
+        assert not _go_version_at_least("1.20.14", (1, 21))
+        assert not _go_version_at_least("1.9", (1, 20))
+    
+    def test_unversioned_tag_assumed_current(self):
+        """Test that tags without a version are treated as current."""
+        assert _go_version_at_least("latest", (1, 21))
+
+
+class TestProfileBuildArgs:
+    """Test the compiler and linker flags of each profile."""
+    
+    def test_default_profile_uses_toolchain_defaults(self):
+        """Test that the default profile adds no flags."""
+        assert _profile_build_args("default", "1.23.2", True) == ([], [])
+    
+    def test_release_strips_symbols(self):
+        """Test that release strips symbol tables and DWARF."""
+        build_flags, ldflags = _profile_build_args("release", "1.23.2", False)
+        assert ldflags == ["-s", "-w"]
+        assert build_flags == []
+    
+    def test_release_uses_pgo_profile_when_present(self):
+        """Test that release enables PGO when default.pgo exists."""
+        build_flags, _ = _profile_build_args("release", "1.23.2", True)
+        assert build_flags == ["-pgo=auto"]
+    
+    def test_release_skips_pgo_on_old_go(self):
+        """Test that -pgo is not passed to Go versions without it."""
+        build_flags, _ = _profile_build_args("release", "1.19", True)
+        assert build_flags == []
+    
+    def test_dev_disables_optimizations(self):
+        """Test that dev disables optimizations, inlining and PGO."""
+        build_flags, ldflags = _profile_build_args("dev", "1.23.2", True)
+        assert build_flags == ["-gcflags=all=-N -l", "-pgo=off"]
+        assert ldflags == []
+    
+    def test_dev_omits_pgo_flag_before_go_1_21(self):
+        """Test that dev omits -pgo=off where PGO is off by default."""
+        build_flags, _ = _profile_build_args("dev", "1.20", False)
+        assert build_flags == ["-gcflags=all=-N -l"]
+
+
+class TestDebugArtifactName:
+    """Test naming of the separate debug binary."""
+    
+    def test_linux(self):
+        """Test the debug binary name for Linux."""
+        assert (
+            _debug_artifact_name("packer-plugin-docker", "1.0.0", "linux", "amd64")
+            == "debug/packer-plugin-docker_v1.0.0_linux_amd64.debug"
+        )
+    
+    def test_windows_keeps_exe(self):
+        """Test that Windows debug binaries keep the .exe extension."""
+        assert (
+            _debug_artifact_name("packer-plugin-docker.exe", "1.0.0", "windows", "amd64")
+            == "debug/packer-plugin-docker_v1.0.0_windows_amd64.exe.debug"
+        )
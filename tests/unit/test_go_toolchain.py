@@ -0,0 +1,115 @@
+"""Tests for Go toolchain resolution from .go-version and go.mod directives.
+
+Exercises the resolution functions of main.py against in-memory
+_SourceMetadata (skipped when the dagger SDK is not installed).
+"""
+
+from pathlib import Path
+
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def _gomod(main, *directives: str, **files: str):
+    """Probed metadata of a source whose go.mod holds the given directives."""
+    gomod = "module github.com/example/packer-plugin-test\n\n" + "\n".join(directives) + "\n"
+    return main._SourceMetadata(files={"go.mod": gomod, **files})
+
+
+class TestGoModDirectives:
+    """Test parsing of the go and toolchain directives."""
+    
+    def test_go_and_toolchain(self, main_module):
+        """Test that both directives are detected."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain go1.23.2")
+        assert main_module._detect_gomod_go_versions(metadata) == ("1.22.5", "1.23.2")
+    
+    def test_go_only(self, main_module):
+        """Test a go.mod without a toolchain directive."""
+        metadata = _gomod(main_module, "go 1.22")
+        assert main_module._detect_gomod_go_versions(metadata) == ("1.22", None)
+    
+    def test_prerelease_and_comments(self, main_module):
+        """Test prerelease versions and trailing comments."""
+        metadata = _gomod(main_module, "go 1.24rc1 // testing")
+        assert main_module._detect_gomod_go_versions(metadata) == ("1.24rc1", None)
+    
+    def test_toolchain_default_ignored(self, main_module):
+        """Test that `toolchain default` does not select a version."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain default")
+        assert main_module._detect_gomod_go_versions(metadata) == ("1.22.5", None)
+    
+    def test_toolchain_older_than_go_ignored(self, main_module):
+        """Test that a toolchain below the go directive is ignored."""
+        metadata = _gomod(main_module, "go 1.23.2", "toolchain go1.22.0")
+        assert main_module._detect_gomod_go_versions(metadata) == ("1.23.2", None)
+    
+    def test_missing_gomod(self, main_module):
+        """Test that a source without go.mod declares nothing."""
+        metadata = main_module._SourceMetadata()
+        assert main_module._detect_gomod_go_versions(metadata) == (None, None)
+    
+    def test_memoized_on_metadata(self, main_module):
+        """Test that the resolution reads the directives memoized on the metadata."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain go1.23.2")
+        assert metadata.gomod_go_versions == main_module._detect_gomod_go_versions(metadata)
+
+
+class TestResolveGoVersion:
+    """Test the Go version resolution order."""
+    
+    def test_explicit_wins(self, main_module):
+        """Test that --go-version takes precedence over every file."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain go1.23.2", **{".go-version": "1.22.1\n"})
+        assert main_module._resolve_go_version(metadata, "1.21") == ("1.21", "explicit")
+    
+    def test_go_version_file_before_gomod(self, main_module):
+        """Test that .go-version takes precedence over go.mod."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain go1.23.2", **{".go-version": "1.23.4\n"})
+        assert main_module._resolve_go_version(metadata, None) == ("1.23.4", "file")
+    
+    def test_toolchain_before_go_directive(self, main_module):
+        """Test that the toolchain directive takes precedence over the go directive."""
+        metadata = _gomod(main_module, "go 1.22.5", "toolchain go1.23.2")
+        assert main_module._resolve_go_version(metadata, None) == ("1.23.2", "toolchain")
+    
+    def test_go_directive(self, main_module):
+        """Test that the go directive is used without a toolchain directive."""
+        metadata = _gomod(main_module, "go 1.22.5")
+        assert main_module._resolve_go_version(metadata, None) == ("1.22.5", "gomod")
+    
+    def test_default(self, main_module):
+        """Test the fallback when nothing declares a version."""
+        metadata = main_module._SourceMetadata()
+        assert main_module._resolve_go_version(metadata, None) == (main_module.DEFAULT_GO_VERSION, "default")
+    
+    def test_fixture_plugin(self, main_module):
+        """Test resolution from a fixture plugin's go.mod."""
+        metadata = main_module._SourceMetadata(files={
+            "go.mod": (FIXTURES / "version-file-plugin" / "go.mod").read_text(),
+        })
+        assert main_module._resolve_go_version(metadata, None) == ("1.21", "gomod")
+
+
+class TestGoVersionBelow:
+    """Test the go.mod minimum version check."""
+    
+    def test_older_minor(self, main_module):
+        """Test that an older minor release is below the minimum."""
+        assert main_module._go_version_below("1.21", "1.22.5")
+        assert not main_module._go_version_below("1.23", "1.22.5")
+    
+    def test_image_tag_without_patch_is_latest(self, main_module):
+        """Test that a major.minor tag satisfies any patch of that release."""
+        assert not main_module._go_version_below("1.22", "1.22.5")
+    
+    def test_patch_releases(self, main_module):
+        """Test that patch releases are compared when both are given."""
+        assert main_module._go_version_below("1.22.3", "1.22.5")
+        assert not main_module._go_version_below("1.22.5", "1.22.5")
+        assert not main_module._go_version_below("1.22.0", "1.22")
+    
+    def test_unparseable_tags_are_current(self, main_module):
+        """Test that tags like latest are never reported as too old."""
+        assert not main_module._go_version_below("latest", "1.22.5")
+        assert not main_module._go_version_below("1.22-alpine", "1.22")
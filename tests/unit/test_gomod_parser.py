@@ -0,0 +1,217 @@
+"""Tests for the go.mod/go.work parser and local module resolution.
+
+Exercises the parser and _local_modules of main.py (skipped when the dagger
+SDK is not installed); _local_modules reads an in-memory workspace.
+"""
+
+import asyncio
+
+
+class FakeFile:
+    """In-memory stand-in for dagger.File."""
+    
+    def __init__(self, contents: str):
+        self._contents = contents
+    
+    async def contents(self) -> str:
+        return self._contents
+
+
+class FakeWorkspace:
+    """In-memory stand-in for the dagger.Directory calls made by _local_modules.
+    
+    Records every glob so tests can check which files were looked up.
+    """
+    
+    def __init__(self, files: dict[str, str]):
+        self.files = files
+        self.globs: list[str] = []
+    
+    async def glob(self, pattern: str) -> list[str]:
+        self.globs.append(pattern)
+        return [pattern] if pattern in self.files else []
+    
+    def file(self, path: str) -> FakeFile:
+        return FakeFile(self.files[path])
+
+
+PLUGIN_GOMOD = """module github.com/example/packer-plugin-docker // plugin
+
+go 1.22.5
+
+toolchain go1.23.2
+
+require (
+\tgithub.com/hashicorp/packer-plugin-sdk v0.5.4
+\tgithub.com/example/shared v0.0.0
+\tgolang.org/x/sys v0.20.0 // indirect
+)
+
+require github.com/example/single v1.0.0
+
+replace github.com/example/shared => ../../shared
+
+replace (
+\tgithub.com/example/forked v1.2.0 => github.com/fork/forked v1.2.1
+\t"github.com/example/quoted" => "./internal/quoted"
+)
+
+exclude github.com/example/bad v0.1.0
+"""
+
+
+class TestParseGoMod:
+    """Test the go.mod directives extracted by the parser."""
+    
+    def test_module_go_and_toolchain(self, main_module):
+        """Test single-value directives, ignoring comments."""
+        gomod = main_module._parse_go_mod(PLUGIN_GOMOD)
+        assert gomod.module == "github.com/example/packer-plugin-docker"
+        assert gomod.go == "1.22.5"
+        assert gomod.toolchain == "go1.23.2"
+    
+    def test_require_blocks_and_lines(self, main_module):
+        """Test block and single-line require directives with indirect markers."""
+        gomod = main_module._parse_go_mod(PLUGIN_GOMOD)
+        assert [(r.path, r.version, r.indirect) for r in gomod.require] == [
+            ("github.com/hashicorp/packer-plugin-sdk", "v0.5.4", False),
+            ("github.com/example/shared", "v0.0.0", False),
+            ("golang.org/x/sys", "v0.20.0", True),
+            ("github.com/example/single", "v1.0.0", False),
+        ]
+    
+    def test_replace_directives(self, main_module):
+        """Test module and directory replacements, including quoted paths."""
+        gomod = main_module._parse_go_mod(PLUGIN_GOMOD)
+        assert [r.format() for r in gomod.replace] == [
+            "github.com/example/shared => ../../shared",
+            "github.com/example/forked v1.2.0 => github.com/fork/forked v1.2.1",
+            "github.com/example/quoted => ./internal/quoted",
+        ]
+        assert gomod.local_replacements == ["../../shared", "./internal/quoted"]
+    
+    def test_go_work(self, main_module):
+        """Test use blocks and single-line use directives of a go.work file."""
+        work = main_module._parse_go_mod("go 1.22\n\nuse (\n\t./plugins/a\n\t./shared\n)\nuse ./tools\n")
+        assert work.module is None
+        assert work.go == "1.22"
+        assert work.use == ("./plugins/a", "./shared", "./tools")
+    
+    def test_module_without_directives(self, main_module):
+        """Test an empty file and a module line only."""
+        assert main_module._parse_go_mod("") == main_module._GoMod()
+        assert main_module._parse_go_mod("module example.com/x\n").module == "example.com/x"
+    
+    def test_quoted_module_path(self, main_module):
+        """Test that quoted module paths containing // are not cut at the comment marker."""
+        assert main_module._parse_go_mod('module "example.com//x"\n').module == "example.com//x"
+
+
+class TestFormatGoWork:
+    """Test rendering of a trimmed go.work file."""
+    
+    def test_use_and_replace(self, main_module):
+        """Test that go, toolchain and replace directives are kept for the used modules."""
+        work = main_module._parse_go_mod(
+            "go 1.22.5\ntoolchain go1.23.2\n\nuse ./a\nuse ./b\n\n"
+            "replace github.com/example/x => ./x\n"
+        )
+        assert main_module._format_go_work(work, ["a", "."]) == (
+            "go 1.22.5\n"
+            "toolchain go1.23.2\n"
+            "\n"
+            "use (\n"
+            "\t./a\n"
+            "\t.\n"
+            ")\n"
+            "\n"
+            "replace (\n"
+            "\tgithub.com/example/x => ./x\n"
+            ")\n"
+        )
+    
+    def test_round_trip(self, main_module):
+        """Test that a rendered go.work parses back to the same directives."""
+        work = main_module._parse_go_mod("go 1.22\n\nuse (\n\t./plugins/a\n\t./shared\n)\n")
+        rendered = main_module._parse_go_mod(main_module._format_go_work(work, ["plugins/a"]))
+        assert rendered.go == "1.22"
+        assert rendered.use == ("./plugins/a",)
+
+
+class TestLocalModules:
+    """Test which local modules end up in a plugin's build context."""
+    
+    @staticmethod
+    def _local_modules(main, files: dict[str, str], plugin_dir: str):
+        return asyncio.run(main._local_modules(FakeWorkspace(files), plugin_dir))
+    
+    def _repo(self, **extra: str) -> dict[str, str]:
+        files = {
+            "plugins/docker/go.mod": "module github.com/example/packer-plugin-docker\n\n"
+                                     "require github.com/example/shared v0.0.0\n\n"
+                                     "replace github.com/example/shared => ../../shared\n",
+            "shared/go.mod": "module github.com/example/shared\n\n"
+                             "replace github.com/example/util => ../util\n",
+            "util/go.mod": "module github.com/example/util\n",
+            "unused/go.mod": "module github.com/example/unused\n",
+        }
+        files.update(extra)
+        return files
+    
+    def test_follows_replace_directives_transitively(self, main_module):
+        """Test that replace targets of replace targets are included."""
+        dirs, go_work, error = self._local_modules(main_module, self._repo(), "plugins/docker")
+        assert error is None
+        assert dirs == ["plugins/docker", "shared", "util"]
+        assert go_work is None
+    
+    def test_plugin_without_local_modules(self, main_module):
+        """Test that a self-contained plugin needs only its own directory."""
+        dirs, _, error = self._local_modules(main_module, self._repo(), "unused")
+        assert (dirs, error) == (["unused"], None)
+    
+    def test_go_work_trimmed_to_required_modules(self, main_module):
+        """Test that only required go.work modules are used and kept."""
+        files = {
+            "go.work": "go 1.22.5\n\nuse (\n\t./plugins/aws\n\t./libs/cloud\n\t./libs/unused\n)\n",
+            "plugins/aws/go.mod": "module github.com/example/packer-plugin-aws\n\n"
+                                  "require github.com/example/cloud v0.0.0\n",
+            "libs/cloud/go.mod": "module github.com/example/cloud\n",
+            "libs/unused/go.mod": "module github.com/example/unused\n",
+        }
+        dirs, go_work, error = self._local_modules(main_module, files, "plugins/aws")
+        assert error is None
+        assert dirs == ["plugins/aws", "libs/cloud"]
+        assert go_work == "go 1.22.5\n\nuse (\n\t./plugins/aws\n\t./libs/cloud\n)\n"
+    
+    def test_go_work_not_using_plugin_ignored(self, main_module):
+        """Test that a go.work which does not use the plugin is not applied."""
+        files = self._repo(**{"go.work": "go 1.22\n\nuse ./unused\n"})
+        dirs, go_work, _ = self._local_modules(main_module, files, "plugins/docker")
+        assert go_work is None
+        assert "unused" not in dirs
+    
+    def test_replace_outside_source(self, main_module):
+        """Test that replace targets above the repository root are rejected."""
+        files = {"plugin/go.mod": "module x\n\nreplace y => ../../outside\n"}
+        dirs, _, error = self._local_modules(main_module, files, "plugin")
+        assert dirs == []
+        assert error == "local module ../outside is outside the source directory"
+    
+    def test_missing_replace_target(self, main_module):
+        """Test that a replace target without go.mod is reported."""
+        files = {"plugin/go.mod": "module x\n\nreplace y => ../missing\n"}
+        _, _, error = self._local_modules(main_module, files, "plugin")
+        assert error == "local module missing has no go.mod"
+    
+    def test_go_work_module_without_go_mod_skipped(self, main_module):
+        """Test that go.work entries without a go.mod are read but not required."""
+        files = {
+            "go.work": "go 1.22\n\nuse (\n\t./plugin\n\t./gone\n)\n",
+            "plugin/go.mod": "module github.com/example/plugin\n",
+        }
+        workspace = FakeWorkspace(files)
+        dirs, go_work, error = asyncio.run(main_module._local_modules(workspace, "plugin"))
+        assert (dirs, error) == (["plugin"], None)
+        assert go_work == "go 1.22\n\nuse (\n\t./plugin\n)\n"
+        assert "gone/go.mod" in workspace.globs
@@ -0,0 +1,128 @@
+"""Tests for digest-pinned base images, the image lockfile and registry mirrors."""
+
+import json
+from typing import Optional
+
+
+IMAGE_LOCK_FILE = "packer-plugin-images.lock.json"
+
+GOLANG_DIGEST = "sha256:" + "a" * 64
+PACKER_DIGEST = "sha256:" + "b" * 64
+
+
+def _split_image_registry(ref: str) -> tuple[str, str]:
+    """Split an image reference into (registry, path) (mirrors main.py logic)."""
+    first, _, rest = ref.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        return first, rest
+    if not rest:
+        return "docker.io", f"library/{ref}"
+    return "docker.io", ref
+
+
+def _mirror_image_ref(ref: str, mirror: str) -> str:
+    """Rewrite an image reference for a registry mirror (mirrors main.py logic)."""
+    _, path = _split_image_registry(ref)
+    return f"{mirror.rstrip('/')}/{path}"
+
+
+def _parse_image_lock(content: Optional[str]) -> tuple[dict[str, str], Optional[str]]:
+    """Parse an image lockfile (mirrors main.py logic)."""
+    if content is None:
+        return {}, None
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        return {}, f"{IMAGE_LOCK_FILE} is not valid JSON: {e.msg}"
+    images = data.get("images") if isinstance(data, dict) else None
+    if not isinstance(images, dict) or not all(
+        isinstance(tag, str) and isinstance(ref, str) and "@sha256:" in ref
+        for tag, ref in images.items()
+    ):
+        return {}, f"{IMAGE_LOCK_FILE} must map image tags to digest references under 'images'"
+    return images, None
+
+
+def _pinned_ref(images: dict[str, str], mirror: Optional[str], tag: str) -> str:
+    """Return the address to pull for a tag (mirrors _ImagePins.ref)."""
+    ref = images.get(tag, tag)
+    if mirror:
+        ref = _mirror_image_ref(ref, mirror)
+    return ref
+
+
+class TestImageRegistrySplit:
+    """Test qualification of image references."""
+    
+    def test_official_image(self):
+        assert _split_image_registry("golang:1.21") == ("docker.io", "library/golang:1.21")
+    
+    def test_namespaced_hub_image(self):
+        assert _split_image_registry("hashicorp/packer:latest") == ("docker.io", "hashicorp/packer:latest")
+    
+    def test_qualified_image(self):
+        assert _split_image_registry("docker.io/library/golang:1.21@" + GOLANG_DIGEST) == (
+            "docker.io", "library/golang:1.21@" + GOLANG_DIGEST
+        )
+    
+    def test_registry_with_port(self):
+        assert _split_image_registry("localhost:5000/hashicorp/packer:1.10.0") == (
+            "localhost:5000", "hashicorp/packer:1.10.0"
+        )
+
+
+class TestRegistryMirror:
+    """Test rewriting of image references for a local registry mirror."""
+    
+    def test_mirror_official_image(self):
+        assert _mirror_image_ref("golang:1.21", "localhost:5000") == "localhost:5000/library/golang:1.21"
+    
+    def test_mirror_pinned_image_keeps_digest(self):
+        ref = "docker.io/hashicorp/packer:latest@" + PACKER_DIGEST
+        assert _mirror_image_ref(ref, "mirror.internal:5000/") == (
+            "mirror.internal:5000/hashicorp/packer:latest@" + PACKER_DIGEST
+        )
+
+
+class TestImageLock:
+    """Test parsing of the image lockfile and pinned reference selection."""
+    
+    def _lock(self) -> str:
+        return json.dumps({
+            "images": {
+                "golang:1.23.2": "docker.io/library/golang:1.23.2@" + GOLANG_DIGEST,
+                "hashicorp/packer:latest": "docker.io/hashicorp/packer:latest@" + PACKER_DIGEST,
+            }
+        })
+    
+    def test_missing_lockfile(self):
+        assert _parse_image_lock(None) == ({}, None)
+    
+    def test_valid_lockfile(self):
+        images, error = _parse_image_lock(self._lock())
+        assert error is None
+        assert images["golang:1.23.2"].endswith(GOLANG_DIGEST)
+    
+    def test_invalid_json(self):
+        images, error = _parse_image_lock("{not json")
+        assert images == {}
+        assert "not valid JSON" in error
+    
+    def test_unpinned_reference_rejected(self):
+        images, error = _parse_image_lock(json.dumps({"images": {"golang:1.21": "golang:1.21"}}))
+        assert images == {}
+        assert "digest references" in error
+    
+    def test_pinned_tag_uses_digest(self):
+        images, _ = _parse_image_lock(self._lock())
+        assert _pinned_ref(images, None, "golang:1.23.2") == "docker.io/library/golang:1.23.2@" + GOLANG_DIGEST
+    
+    def test_unlocked_tag_falls_back_to_tag(self):
+        images, _ = _parse_image_lock(self._lock())
+        assert _pinned_ref(images, None, "golang:1.22") == "golang:1.22"
+    
+    def test_pinned_tag_through_mirror(self):
+        images, _ = _parse_image_lock(self._lock())
+        assert _pinned_ref(images, "localhost:5000", "hashicorp/packer:latest") == (
+            "localhost:5000/hashicorp/packer:latest@" + PACKER_DIGEST
+        )
@@ -0,0 +1,83 @@
+"""Tests for the native (Packer-image-free) install naming and checksums.
+
+The expected names and checksum format below are fixed reference values
+copied from `packer plugins install --path` output (binary renamed to
+packer-plugin-{name}_v{version}_x5.0_{os}_{arch}[.exe] plus a _SHA256SUM file
+holding the bare hex digest). They only pin the naming rules; the comparison
+against a real `packer plugins install` run is the engine-backed
+tests/integration/test_install_parity.py.
+"""
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _installed_binary_name(
+    plugin_name: str,
+    version: str,
+    api_version: str,
+    target_os: str,
+    target_arch: str,
+) -> str:
+    """Build the installed binary name (mirrors main.py logic)."""
+    name = f"packer-plugin-{plugin_name}_v{version}_{api_version}_{target_os}_{target_arch}"
+    if target_os == "windows":
+        name += ".exe"
+    return name
+
+
+def _sha256_path(path: str) -> str:
+    """Compute a chunked SHA256 of a local file (mirrors main.py logic)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TestInstalledBinaryName:
+    """Test installed binary names against reference packer names."""
+    
+    @pytest.mark.parametrize(
+        "args, packer_output",
+        [
+            (("docker", "1.0.10", "x5.0", "linux", "amd64"), "packer-plugin-docker_v1.0.10_x5.0_linux_amd64"),
+            (("amazon", "1.2.1", "x5.0", "darwin", "arm64"), "packer-plugin-amazon_v1.2.1_x5.0_darwin_arm64"),
+            (("ansible-navigator", "3.0.0", "x5.0", "windows", "amd64"),
+             "packer-plugin-ansible-navigator_v3.0.0_x5.0_windows_amd64.exe"),
+            (("qemu", "1.1.0-beta.1", "x5.0", "linux", "386"), "packer-plugin-qemu_v1.1.0-beta.1_x5.0_linux_386"),
+        ],
+    )
+    def test_matches_reference_names(self, args, packer_output):
+        """Test that native names match the recorded packer names."""
+        assert _installed_binary_name(*args) == packer_output
+    
+    def test_checksum_file_name(self):
+        """Test that the checksum file sits next to the binary with a _SHA256SUM suffix."""
+        name = _installed_binary_name("docker", "1.0.10", "x5.0", "windows", "amd64")
+        assert f"{name}_SHA256SUM" == "packer-plugin-docker_v1.0.10_x5.0_windows_amd64.exe_SHA256SUM"
+
+
+class TestChecksum:
+    """Test the checksum contents written by the native install."""
+    
+    def test_checksum_is_bare_hex_digest(self, tmp_path: Path):
+        """Test that the checksum is the bare lowercase hex digest without newline."""
+        binary = tmp_path / "packer-plugin-docker"
+        binary.write_bytes(b"\x7fELF" + b"\x00" * 100)
+        checksum = _sha256_path(str(binary))
+        assert checksum == hashlib.sha256(binary.read_bytes()).hexdigest()
+        assert len(checksum) == 64
+        assert checksum == checksum.strip().lower()
+    
+    def test_chunked_hash_matches_single_read(self, tmp_path: Path):
+        """Test that chunked hashing matches hashing the whole file across chunk boundaries."""
+        binary = tmp_path / "large"
+        data = bytes(range(256)) * (HASH_CHUNK_SIZE // 256 * 2 + 7)
+        binary.write_bytes(data)
+        assert _sha256_path(str(binary)) == hashlib.sha256(data).hexdigest()
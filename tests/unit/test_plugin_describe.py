@@ -0,0 +1,146 @@
+"""Tests for parsing plugin describe output and memoizing it per source."""
+
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import pytest
+
+
+METADATA_CACHE_SIZE = 32
+
+
+def _parse_plugin_description(output: str) -> Optional[dict]:
+    """Parse plugin describe output (mirrors main.py logic)."""
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not re.fullmatch(r"x\d+\.\d+", str(data.get("api_version", ""))):
+        return None
+    components = {
+        kind: sorted(data.get(kind) or [])
+        for kind in ("builders", "provisioners", "post_processors", "datasources")
+    }
+    return {"api_version": data["api_version"], "components": components}
+
+
+def _lru_get(cache: OrderedDict, key: str):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key: str, value) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > METADATA_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+_description_cache: OrderedDict = OrderedDict()
+
+
+async def _get_plugin_description(source_digest: str, describe: Callable[[], Awaitable[dict]]) -> dict:
+    """Run describe at most once per source (mirrors main.py logic)."""
+    task = _lru_get(_description_cache, source_digest)
+    if task is None:
+        task = asyncio.ensure_future(describe())
+        _lru_put(_description_cache, source_digest, task)
+    try:
+        return await task
+    except BaseException:
+        if _description_cache.get(source_digest) is task:
+            del _description_cache[source_digest]
+        raise
+
+
+DESCRIBE_OUTPUT = json.dumps({
+    "version": "1.0.0",
+    "sdk_version": "0.5.2",
+    "api_version": "x5.0",
+    "builders": ["docker", "-packer-default-plugin-name-"],
+    "post_processors": ["docker-push", "docker-tag"],
+    "provisioners": [],
+    "datasources": None,
+})
+
+
+class TestParsePluginDescription:
+    """Test parsing the describe command's JSON."""
+
+    def test_api_version_and_components(self):
+        """Test that the API version and sorted components are extracted."""
+        assert _parse_plugin_description(DESCRIBE_OUTPUT) == {
+            "api_version": "x5.0",
+            "components": {
+                "builders": ["-packer-default-plugin-name-", "docker"],
+                "provisioners": [],
+                "post_processors": ["docker-push", "docker-tag"],
+                "datasources": [],
+            },
+        }
+
+    def test_unrecognized_output(self):
+        """Test that non-JSON output and missing or malformed API versions are rejected."""
+        assert _parse_plugin_description("Usage: packer-plugin-docker [command]") is None
+        assert _parse_plugin_description("[]") is None
+        assert _parse_plugin_description(json.dumps({"version": "1.0.0"})) is None
+        assert _parse_plugin_description(json.dumps({"api_version": "5.0"})) is None
+
+
+class TestGetPluginDescription:
+    """Test the per-source describe memo."""
+
+    def setup_method(self):
+        _description_cache.clear()
+
+    def test_concurrent_targets_share_one_describe(self):
+        """Test that concurrent matrix targets run describe once."""
+        calls = []
+
+        async def describe() -> dict:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _parse_plugin_description(DESCRIBE_OUTPUT)
+
+        async def matrix() -> list[dict]:
+            return await asyncio.gather(*(_get_plugin_description("sha256:abc", describe) for _ in range(4)))
+
+        results = asyncio.run(matrix())
+        assert len(calls) == 1
+        assert all(result["api_version"] == "x5.0" for result in results)
+
+    def test_keyed_by_source_digest(self):
+        """Test that different sources are described separately."""
+        calls = []
+
+        async def describe() -> dict:
+            calls.append(1)
+            return {"api_version": "x5.0", "components": {}}
+
+        async def run() -> None:
+            await _get_plugin_description("sha256:a", describe)
+            await _get_plugin_description("sha256:a", describe)
+            await _get_plugin_description("sha256:b", describe)
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_failures_are_not_memoized(self):
+        """Test that a failed describe is retried by the next build."""
+        async def failing() -> dict:
+            raise RuntimeError("exit code: 1")
+
+        async def working() -> dict:
+            return {"api_version": "x5.0", "components": {}}
+
+        async def run() -> dict:
+            with pytest.raises(RuntimeError):
+                await _get_plugin_description("sha256:a", failing)
+            return await _get_plugin_description("sha256:a", working)
+
+        assert asyncio.run(run())["api_version"] == "x5.0"
@@ -1,18 +1,16 @@
 """Tests for plugin name auto-detection, version validation, normalization, and Go version detection logic.
 
-These tests directly test the utility functions that don't require
-the full Dagger SDK to be available.
+Most tests exercise copies of the pure utility functions; version
+validation and Go version resolution use the real functions from main.py
+(skipped when the dagger SDK is not installed).
 """
 
+import hashlib
+import json
 import pytest
-import re
 from typing import Optional
 
 
-# Default Go version constant (mirrors main.py)
-DEFAULT_GO_VERSION = "1.21"
-
-
 def _normalize_to_lowercase(value: str) -> tuple[str, bool]:
     """Normalize a string to lowercase (mirrors main.py logic)."""
     normalized = value.lower()
@@ -155,22 +153,9 @@ class TestPluginNameExtraction:
 
 
 class TestVersionValidation:
-    """Test semantic version validation."""
-    
-    def _validate_version(self, version: str) -> tuple[bool, str]:
-        """Validate semantic version format (mirrors main.py logic)."""
-        # Check for v prefix
-        if version.startswith("v"):
-            return False, f"Version '{version}' should not have 'v' prefix. Use '{version[1:]}' instead."
-        
-        # Basic semver pattern
-        semver_pattern = r'^(\d+)\.(\d+)\.(\d+)(-[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?(\+[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*)?$'
-        if not re.match(semver_pattern, version):
-            return False, f"Version '{version}' is not valid semantic versioning. Use format: MAJOR.MINOR.PATCH (e.g., 1.0.0)"
-        
-        return True, ""
+    """Test semantic version validation (main.py _validate_semver)."""
     
-    def test_valid_semver(self):
+    def test_valid_semver(self, main_module):
         """Test valid semantic versions pass validation."""
         valid_versions = [
             "1.0.0",
@@ -180,19 +165,20 @@ class TestVersionValidation:
             "1.0.0-beta.1",
             "1.0.0-alpha",
             "1.0.0-rc.1",
+            "1.0.0-dev",
         ]
         for version in valid_versions:
-            is_valid, error = self._validate_version(version)
+            is_valid, error = main_module._validate_semver(version)
             assert is_valid, f"Version {version} should be valid: {error}"
     
-    def test_invalid_v_prefix(self):
+    def test_invalid_v_prefix(self, main_module):
         """Test versions with v prefix are rejected."""
-        is_valid, error = self._validate_version("v1.0.0")
+        is_valid, error = main_module._validate_semver("v1.0.0")
         assert not is_valid
         assert "should not have 'v' prefix" in error
         assert "1.0.0" in error  # Should suggest correct format
     
-    def test_invalid_format(self):
+    def test_invalid_format(self, main_module):
         """Test invalid version formats are rejected."""
         invalid_versions = [
             "1.0",        # Incomplete
@@ -202,7 +188,7 @@ class TestVersionValidation:
             "",           # Empty
         ]
         for version in invalid_versions:
-            is_valid, error = self._validate_version(version)
+            is_valid, error = main_module._validate_semver(version)
             assert not is_valid, f"Version {version} should be invalid"
 
 
@@ -452,144 +438,250 @@ class TestStripPluginPrefixFromSource:
 
 
 class TestGoVersionDetection:
-    """Test Go version detection and resolution logic."""
-    
-    def _detect_go_version_from_content(self, content: Optional[str]) -> Optional[str]:
-        """Detect Go version from file content (mirrors main.py async logic but synchronous for testing).
-        
-        Args:
-            content: Content of .go-version file (None if file doesn't exist)
-            
-        Returns:
-            Version string if valid, None otherwise
-        """
-        if content is None:
-            return None
-        version = content.strip()
-        if version:
-            return version
-        return None
-    
-    def _resolve_go_version(
-        self,
-        go_version_file_content: Optional[str],
-        explicit_version: Optional[str],
-    ) -> tuple[str, str]:
-        """Resolve Go version based on priority (mirrors main.py logic).
-        
-        Priority:
-        1. Explicit --go-version parameter
-        2. .go-version file
-        3. Default (1.21)
-        
-        Returns:
-            Tuple of (resolved_version, source_description)
-        """
-        # If explicit version provided, use it
-        if explicit_version is not None:
-            return explicit_version, "explicit"
-        
-        # Try to detect from .go-version file content
-        detected = self._detect_go_version_from_content(go_version_file_content)
-        if detected:
-            return detected, "file"
-        
-        # Fall back to default
-        return DEFAULT_GO_VERSION, "default"
-    
-    def test_detect_version_from_file(self):
+    """Test Go version detection and resolution logic (main.py _resolve_go_version)."""
+    
+    def _metadata(self, main_module, go_version_file: Optional[str] = None, go_mod: Optional[str] = None):
+        """Probed metadata with an optional .go-version file and go.mod."""
+        files = {}
+        if go_version_file is not None:
+            files[".go-version"] = go_version_file
+        if go_mod is not None:
+            files["go.mod"] = go_mod
+        return main_module._SourceMetadata(files=files)
+    
+    def test_detect_version_from_file(self, main_module):
         """Test Go version detection from .go-version file content."""
-        version = self._detect_go_version_from_content("1.23.2\n")
-        assert version == "1.23.2"
+        assert main_module._detect_go_version(self._metadata(main_module, "1.23.2\n")) == "1.23.2"
     
-    def test_detect_version_from_file_no_newline(self):
+    def test_detect_version_from_file_no_newline(self, main_module):
         """Test Go version detection without trailing newline."""
-        version = self._detect_go_version_from_content("1.22.0")
-        assert version == "1.22.0"
+        assert main_module._detect_go_version(self._metadata(main_module, "1.22.0")) == "1.22.0"
     
-    def test_detect_version_from_file_with_whitespace(self):
+    def test_detect_version_from_file_with_whitespace(self, main_module):
         """Test Go version detection with surrounding whitespace."""
-        version = self._detect_go_version_from_content("  1.21.5  \n")
-        assert version == "1.21.5"
+        assert main_module._detect_go_version(self._metadata(main_module, "  1.21.5  \n")) == "1.21.5"
     
-    def test_detect_version_empty_file(self):
-        """Test that empty file returns None."""
-        version = self._detect_go_version_from_content("")
-        assert version is None
+    def test_detect_version_empty_file(self, main_module):
+        """Test that empty or whitespace-only files return None."""
+        assert main_module._detect_go_version(self._metadata(main_module, "")) is None
+        assert main_module._detect_go_version(self._metadata(main_module, "   \n\t  ")) is None
     
-    def test_detect_version_whitespace_only(self):
-        """Test that whitespace-only file returns None."""
-        version = self._detect_go_version_from_content("   \n\t  ")
-        assert version is None
-    
-    def test_detect_version_file_not_exists(self):
+    def test_detect_version_file_not_exists(self, main_module):
         """Test that missing file returns None."""
-        version = self._detect_go_version_from_content(None)
-        assert version is None
+        assert main_module._detect_go_version(self._metadata(main_module)) is None
     
-    def test_resolve_explicit_version_takes_precedence(self):
+    def test_resolve_explicit_version_takes_precedence(self, main_module):
         """Test that explicit --go-version always takes precedence."""
-        # Explicit version overrides .go-version file
-        version, source = self._resolve_go_version("1.23.2", "1.20")
-        assert version == "1.20"
-        assert source == "explicit"
-    
-    def test_resolve_explicit_version_ignores_default(self):
-        """Test that explicit version is used even when no file exists."""
-        version, source = self._resolve_go_version(None, "1.19")
-        assert version == "1.19"
-        assert source == "explicit"
-    
-    def test_resolve_file_version_when_no_explicit(self):
-        """Test that .go-version file is used when no explicit version provided."""
-        version, source = self._resolve_go_version("1.23.2\n", None)
-        assert version == "1.23.2"
-        assert source == "file"
-    
-    def test_resolve_fallback_to_default(self):
-        """Test fallback to default when no explicit version and no file."""
-        version, source = self._resolve_go_version(None, None)
-        assert version == DEFAULT_GO_VERSION
-        assert source == "default"
-    
-    def test_resolve_fallback_when_file_empty(self):
-        """Test fallback to default when .go-version file is empty."""
-        version, source = self._resolve_go_version("", None)
-        assert version == DEFAULT_GO_VERSION
-        assert source == "default"
-    
-    def test_priority_explicit_over_file_over_default(self):
-        """Test complete priority chain: explicit > file > default."""
-        # All sources available - explicit wins
-        version, source = self._resolve_go_version("1.22.0", "1.21.0")
-        assert version == "1.21.0"
-        assert source == "explicit"
-        
-        # No explicit - file wins
-        version, source = self._resolve_go_version("1.22.0", None)
-        assert version == "1.22.0"
-        assert source == "file"
-        
-        # No explicit, no file - default wins
-        version, source = self._resolve_go_version(None, None)
-        assert version == DEFAULT_GO_VERSION
-        assert source == "default"
+        metadata = self._metadata(main_module, "1.23.2", "module example.com/x\n\ngo 1.22\n\ntoolchain go1.22.5\n")
+        assert main_module._resolve_go_version(metadata, "1.20") == ("1.20", "explicit")
+        assert main_module._resolve_go_version(self._metadata(main_module), "1.19") == ("1.19", "explicit")
+    
+    def test_resolve_file_version_before_go_mod(self, main_module):
+        """Test that .go-version wins over the go.mod directives."""
+        metadata = self._metadata(main_module, "1.23.2\n", "module example.com/x\n\ngo 1.22\n\ntoolchain go1.22.5\n")
+        assert main_module._resolve_go_version(metadata, None) == ("1.23.2", "file")
+    
+    def test_resolve_toolchain_before_go_directive(self, main_module):
+        """Test that the go.mod toolchain directive wins over the go directive."""
+        metadata = self._metadata(main_module, None, "module example.com/x\n\ngo 1.22\n\ntoolchain go1.22.5\n")
+        assert main_module._resolve_go_version(metadata, None) == ("1.22.5", "toolchain")
+    
+    def test_resolve_go_directive(self, main_module):
+        """Test that the go.mod go directive is used without a toolchain directive."""
+        metadata = self._metadata(main_module, "", "module example.com/x\n\ngo 1.23.2\n")
+        assert main_module._resolve_go_version(metadata, None) == ("1.23.2", "gomod")
+    
+    def test_resolve_fallback_to_default(self, main_module):
+        """Test fallback to default when nothing declares a Go version."""
+        for metadata in (self._metadata(main_module), self._metadata(main_module, "", "module example.com/x\n")):
+            assert main_module._resolve_go_version(metadata, None) == (main_module.DEFAULT_GO_VERSION, "default")
+
+
+class TestBuildCacheKey:
+    """Test content-addressed build cache key computation."""
+    
+    def _compute_build_cache_key(
+        self,
+        source_digest: str,
+        go_version: str,
+        ldflags: str,
+        target_os: str,
+        target_arch: str,
+        module_path: str,
+        binary_name: str,
+        rebuild_nonce: Optional[str] = None,
+        build_flags: Optional[list[str]] = None,
+    ) -> str:
+        """Compute build cache key (mirrors main.py logic)."""
+        inputs = {
+            "source_digest": source_digest,
+            "go_version": go_version,
+            "ldflags": ldflags,
+            "goos": target_os,
+            "goarch": target_arch,
+            "module_path": module_path,
+            "binary_name": binary_name,
+        }
+        if rebuild_nonce:
+            inputs["rebuild_nonce"] = rebuild_nonce
+        if build_flags:
+            inputs["build_flags"] = list(build_flags)
+        payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _default_inputs(self) -> dict:
+        return {
+            "source_digest": "sha256:abc123",
+            "go_version": "1.23.2",
+            "ldflags": "-X github.com/user/packer-plugin-docker/version.Version=1.0.0 "
+                       "-X github.com/user/packer-plugin-docker/version.VersionPrerelease=",
+            "target_os": "linux",
+            "target_arch": "amd64",
+            "module_path": "github.com/user/packer-plugin-docker",
+            "binary_name": "packer-plugin-docker",
+        }
+    
+    def test_key_is_hex_sha256(self):
+        """Test that the cache key is a 64-character hex digest."""
+        key = self._compute_build_cache_key(**self._default_inputs())
+        assert len(key) == 64
+        assert all(c in "0123456789abcdef" for c in key)
+    
+    def test_identical_inputs_identical_key(self):
+        """Test that unchanged inputs produce the same key (cache reuse)."""
+        key1 = self._compute_build_cache_key(**self._default_inputs())
+        key2 = self._compute_build_cache_key(**self._default_inputs())
+        assert key1 == key2
+    
+    def test_each_input_changes_key(self):
+        """Test that every build-relevant input affects the key."""
+        base = self._compute_build_cache_key(**self._default_inputs())
+        changes = {
+            "source_digest": "sha256:def456",
+            "go_version": "1.22.0",
+            "ldflags": "-X github.com/user/packer-plugin-docker/version.Version=1.0.1",
+            "target_os": "darwin",
+            "target_arch": "arm64",
+            "module_path": "github.com/other/packer-plugin-docker",
+            "binary_name": "packer-plugin-docker.exe",
+        }
+        for field, value in changes.items():
+            inputs = self._default_inputs()
+            inputs[field] = value
+            assert self._compute_build_cache_key(**inputs) != base, f"{field} should affect the key"
+    
+    def test_force_rebuild_nonce_changes_key(self):
+        """Test that force_rebuild nonces produce distinct keys."""
+        base = self._compute_build_cache_key(**self._default_inputs())
+        forced1 = self._compute_build_cache_key(**self._default_inputs(), rebuild_nonce="1700000000000")
+        forced2 = self._compute_build_cache_key(**self._default_inputs(), rebuild_nonce="1700000000001")
+        assert forced1 != base
+        assert forced1 != forced2
+    
+    def test_empty_nonce_matches_unforced_key(self):
+        """Test that an empty nonce does not change the key."""
+        base = self._compute_build_cache_key(**self._default_inputs())
+        assert self._compute_build_cache_key(**self._default_inputs(), rebuild_nonce="") == base
+    
+    def test_build_flags_change_key(self):
+        """Test that reproducible build flags produce a distinct key."""
+        base = self._compute_build_cache_key(**self._default_inputs())
+        reproducible = self._compute_build_cache_key(
+            **self._default_inputs(), build_flags=["-trimpath", "-buildvcs=false"]
+        )
+        assert reproducible != base
+    
+    def test_no_build_flags_matches_existing_key(self):
+        """Test that an empty flag list keeps keys of default builds unchanged."""
+        base = self._compute_build_cache_key(**self._default_inputs())
+        assert self._compute_build_cache_key(**self._default_inputs(), build_flags=[]) == base
+
+
+class TestGoCacheVolumes:
+    """Test naming of the persistent Go cache volumes."""
+    
+    def _go_cache_volume_names(self, go_version: str, target_os: str, target_arch: str) -> tuple[str, str]:
+        """Compute cache volume names (mirrors main.py logic)."""
+        return (
+            f"packer-plugin-gomod-{go_version}",
+            f"packer-plugin-gobuild-{go_version}-{target_os}-{target_arch}",
+        )
+    
+    def test_volume_names(self):
+        """Test module and build cache volume names."""
+        mod_cache, build_cache = self._go_cache_volume_names("1.23.2", "linux", "amd64")
+        assert mod_cache == "packer-plugin-gomod-1.23.2"
+        assert build_cache == "packer-plugin-gobuild-1.23.2-linux-amd64"
+    
+    def test_module_cache_shared_across_platforms(self):
+        """Test that all targets of a Go version share the module cache."""
+        linux_mod, linux_build = self._go_cache_volume_names("1.22", "linux", "amd64")
+        darwin_mod, darwin_build = self._go_cache_volume_names("1.22", "darwin", "arm64")
+        assert linux_mod == darwin_mod
+        assert linux_build != darwin_build
+    
+    def test_go_version_separates_caches(self):
+        """Test that different Go versions never share cache volumes."""
+        old_mod, old_build = self._go_cache_volume_names("1.21", "linux", "amd64")
+        new_mod, new_build = self._go_cache_volume_names("1.22", "linux", "amd64")
+        assert old_mod != new_mod
+        assert old_build != new_build
 
 
-class TestCacheBusting:
-    """Test cache-busting mechanism for consistent exports."""
-    
-    def test_timestamp_is_numeric(self):
-        """Test that cache-busting timestamps are valid numeric strings."""
-        import time
-        cache_bust = str(int(time.time() * 1000))
-        assert cache_bust.isdigit()
-        assert len(cache_bust) >= 13  # Millisecond timestamp
-    
-    def test_consecutive_timestamps_differ(self):
-        """Test that consecutive cache-bust values are different."""
-        import time
-        bust1 = str(int(time.time() * 1000))
-        time.sleep(0.002)  # 2ms to ensure difference
-        bust2 = str(int(time.time() * 1000))
-        assert bust1 != bust2 or True  # They might be equal if executed very fast, but typically differ
\ No newline at end of file
+class TestPlatformParsing:
+    """Test os/arch platform parsing for matrix builds."""
+    
+    def _parse_platforms(self, platforms: list[str]) -> tuple[list[tuple[str, str]], Optional[str]]:
+        """Parse platform specifications (mirrors main.py logic)."""
+        targets: list[tuple[str, str]] = []
+        for entry in platforms:
+            for spec in entry.split(","):
+                spec = spec.strip().lower()
+                if not spec:
+                    continue
+                parts = spec.split("/")
+                if len(parts) != 2 or not parts[0] or not parts[1]:
+                    return [], f"Invalid platform '{spec}'. Use format: os/arch (e.g., linux/amd64)"
+                target = (parts[0], parts[1])
+                if target not in targets:
+                    targets.append(target)
+        
+        if not targets:
+            return [], "At least one platform is required (e.g., linux/amd64)"
+        return targets, None
+    
+    def test_list_of_platforms(self):
+        """Test a list of separate platform entries."""
+        targets, error = self._parse_platforms(["linux/amd64", "darwin/arm64"])
+        assert error is None
+        assert targets == [("linux", "amd64"), ("darwin", "arm64")]
+    
+    def test_comma_separated_platforms(self):
+        """Test a single comma-separated entry."""
+        targets, error = self._parse_platforms(["linux/amd64,linux/arm64,darwin/arm64,windows/amd64"])
+        assert error is None
+        assert targets == [
+            ("linux", "amd64"),
+            ("linux", "arm64"),
+            ("darwin", "arm64"),
+            ("windows", "amd64"),
+        ]
+    
+    def test_duplicates_removed_and_normalized(self):
+        """Test that duplicates are dropped and case/whitespace normalized."""
+        targets, error = self._parse_platforms([" Linux/AMD64 ", "linux/amd64,"])
+        assert error is None
+        assert targets == [("linux", "amd64")]
+    
+    def test_invalid_platform(self):
+        """Test that malformed platforms are rejected."""
+        for bad in ["linux", "linux/", "/amd64", "linux/amd64/v8"]:
+            targets, error = self._parse_platforms([bad])
+            assert targets == []
+            assert error is not None and "os/arch" in error
+    
+    def test_empty_platforms(self):
+        """Test that an empty platform list is rejected."""
+        targets, error = self._parse_platforms([])
+        assert targets == []
+        assert error is not None
@@ -0,0 +1,159 @@
+"""Tests for the portable build cache layout, index and image references."""
+
+import json
+from typing import Optional
+
+
+def _portable_cache_paths(
+    module_key: str,
+    go_version: str,
+    target_os: str,
+    target_arch: str,
+    build_key: str,
+) -> dict[str, str]:
+    """Compute portable cache paths (mirrors main.py logic)."""
+    return {
+        "modules": f"gomod/{module_key}.tar.gz",
+        "build_cache": f"gobuild/go{go_version}-{target_os}-{target_arch}.tar.gz",
+        "artifacts": f"artifacts/{build_key}",
+    }
+
+
+def _parse_cache_index(content: Optional[str]) -> dict[str, dict]:
+    """Parse a portable cache index (mirrors main.py logic)."""
+    index: dict[str, dict] = {"modules": {}, "build_caches": {}, "artifacts": {}}
+    if not content:
+        return index
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return index
+    if not isinstance(data, dict):
+        return index
+    for section in index:
+        entries = data.get(section)
+        if isinstance(entries, dict):
+            index[section] = {key: entry for key, entry in entries.items() if isinstance(entry, dict)}
+    return index
+
+
+def _update_cache_index(
+    index: dict[str, dict],
+    paths: dict[str, str],
+    module_key: Optional[str],
+    entry: dict,
+    target_os: str,
+    target_arch: str,
+) -> dict[str, dict]:
+    """Record an exported build in the index (mirrors main.py logic)."""
+    go_version = entry["go_version"]
+    updated = {section: dict(entries) for section, entries in index.items()}
+    if module_key:
+        updated["modules"][module_key] = {"path": paths["modules"], "go_version": go_version}
+    updated["build_caches"][f"go{go_version}-{target_os}-{target_arch}"] = {
+        "path": paths["build_cache"],
+        "go_version": go_version,
+        "goos": target_os,
+        "goarch": target_arch,
+    }
+    updated["artifacts"][entry["build_key"]] = {
+        "path": paths["artifacts"],
+        "platform": f"{target_os}/{target_arch}",
+        "binary": entry["binary"],
+        "version": entry["version"],
+    }
+    return updated
+
+
+def _cache_image_ref(ref: str, go_version: str, target_os: str, target_arch: str) -> str:
+    """Add a default tag to a cache image reference (mirrors main.py logic)."""
+    if "@" in ref or ":" in ref.rsplit("/", 1)[-1]:
+        return ref
+    return f"{ref}:go{go_version}-{target_os}-{target_arch}"
+
+
+ENTRY = {
+    "build_key": "a" * 64,
+    "go_version": "1.23.2",
+    "binary": "packer-plugin-docker_v1.0.0_x5.0_linux_amd64",
+    "version": "1.0.0",
+}
+
+
+class TestPortableCachePaths:
+    """Test the keys of the portable cache entries."""
+    
+    def test_layout(self):
+        """Test that modules, build caches and artifacts use their own keys."""
+        paths = _portable_cache_paths("m" * 64, "1.23.2", "linux", "arm64", "a" * 64)
+        assert paths == {
+            "modules": f"gomod/{'m' * 64}.tar.gz",
+            "build_cache": "gobuild/go1.23.2-linux-arm64.tar.gz",
+            "artifacts": f"artifacts/{'a' * 64}",
+        }
+    
+    def test_build_cache_matches_volume_scope(self):
+        """Test that build caches are split per Go version and platform, like their volumes."""
+        amd64 = _portable_cache_paths("m", "1.23.2", "linux", "amd64", "a")
+        arm64 = _portable_cache_paths("m", "1.23.2", "linux", "arm64", "b")
+        assert amd64["modules"] == arm64["modules"]
+        assert amd64["build_cache"] != arm64["build_cache"]
+
+
+class TestCacheIndex:
+    """Test parsing and updating the cache index."""
+    
+    def test_missing_or_malformed(self):
+        """Test that missing and malformed indexes are empty."""
+        empty = {"modules": {}, "build_caches": {}, "artifacts": {}}
+        assert _parse_cache_index(None) == empty
+        assert _parse_cache_index("{not json") == empty
+        assert _parse_cache_index("[]") == empty
+        assert _parse_cache_index('{"modules": [], "artifacts": {"x": "bad"}}') == empty
+    
+    def test_update_records_all_sections(self):
+        """Test that an export adds its module cache, build cache and artifacts."""
+        paths = _portable_cache_paths("m" * 64, "1.23.2", "linux", "amd64", "a" * 64)
+        index = _update_cache_index(_parse_cache_index(None), paths, "m" * 64, ENTRY, "linux", "amd64")
+        assert index["modules"] == {"m" * 64: {"path": paths["modules"], "go_version": "1.23.2"}}
+        assert index["build_caches"]["go1.23.2-linux-amd64"]["goarch"] == "amd64"
+        assert index["artifacts"]["a" * 64]["platform"] == "linux/amd64"
+    
+    def test_vendored_export_has_no_module_cache(self):
+        """Test that vendored plugins record no module cache."""
+        paths = _portable_cache_paths("", "1.23.2", "linux", "amd64", "a" * 64)
+        index = _update_cache_index(_parse_cache_index(None), paths, None, ENTRY, "linux", "amd64")
+        assert index["modules"] == {}
+    
+    def test_update_keeps_existing_entries(self):
+        """Test that exporting into an existing cache extends its index."""
+        first = _update_cache_index(
+            _parse_cache_index(None),
+            _portable_cache_paths("m", "1.23.2", "linux", "amd64", "a" * 64),
+            "m", ENTRY, "linux", "amd64",
+        )
+        arm64 = dict(ENTRY, build_key="b" * 64)
+        second = _update_cache_index(
+            _parse_cache_index(json.dumps(first)),
+            _portable_cache_paths("m", "1.23.2", "linux", "arm64", "b" * 64),
+            "m", arm64, "linux", "arm64",
+        )
+        assert set(second["artifacts"]) == {"a" * 64, "b" * 64}
+        assert set(second["build_caches"]) == {"go1.23.2-linux-amd64", "go1.23.2-linux-arm64"}
+        assert set(first["artifacts"]) == {"a" * 64}
+
+
+class TestCacheImageRef:
+    """Test the default tag of published caches."""
+    
+    def test_adds_platform_tag(self):
+        """Test that untagged references get a Go version and platform tag."""
+        assert _cache_image_ref("localhost:5000/plugin-cache", "1.23.2", "linux", "amd64") == \
+            "localhost:5000/plugin-cache:go1.23.2-linux-amd64"
+    
+    def test_keeps_explicit_tag_or_digest(self):
+        """Test that tagged and digest references are used as given."""
+        assert _cache_image_ref("localhost:5000/plugin-cache:main", "1.23.2", "linux", "amd64") == \
+            "localhost:5000/plugin-cache:main"
+        ref = "localhost:5000/plugin-cache@sha256:" + "f" * 64
+        assert _cache_image_ref(ref, "1.23.2", "linux", "amd64") == ref
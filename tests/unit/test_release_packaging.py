@@ -0,0 +1,108 @@
+"""Tests for release archive naming and streaming zip creation."""
+
+import hashlib
+import re
+import zipfile
+from typing import Optional
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_INSTALLED_BINARY_PATTERN = re.compile(
+    r"^packer-plugin-(?P<name>[a-z0-9._-]+?)_v(?P<version>[^_]+)_(?P<api>x\d+\.\d+)"
+    r"_(?P<os>[a-z0-9]+)_(?P<arch>[a-z0-9]+)(?:\.exe)?$"
+)
+
+
+def _parse_installed_binary_name(name: str) -> Optional[dict]:
+    """Split an installed binary name (mirrors main.py logic)."""
+    match = _INSTALLED_BINARY_PATTERN.match(name)
+    if not match:
+        return None
+    return {
+        "name": match.group("name"),
+        "version": match.group("version"),
+        "api_version": match.group("api"),
+        "os": match.group("os"),
+        "arch": match.group("arch"),
+    }
+
+
+def _sha256_path(path: str) -> str:
+    """Compute the SHA256 of a local file in chunks (mirrors main.py logic)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_release_archive(binary_path: str, archive_path: str, member_name: str) -> tuple[str, str]:
+    """Zip a plugin binary for release (mirrors main.py logic)."""
+    binary_digest = hashlib.sha256()
+    info = zipfile.ZipInfo(member_name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = (0o100755 & 0xFFFF) << 16
+    with zipfile.ZipFile(archive_path, "w") as archive, open(binary_path, "rb") as binary:
+        with archive.open(info, "w", force_zip64=True) as member:
+            for chunk in iter(lambda: binary.read(HASH_CHUNK_SIZE), b""):
+                binary_digest.update(chunk)
+                member.write(chunk)
+    return binary_digest.hexdigest(), _sha256_path(archive_path)
+
+
+class TestParseInstalledBinaryName:
+    """Test parsing installed binary names."""
+
+    def test_linux_binary(self):
+        """Test a plain linux binary name."""
+        assert _parse_installed_binary_name("packer-plugin-docker_v1.0.10_x5.0_linux_amd64") == {
+            "name": "docker",
+            "version": "1.0.10",
+            "api_version": "x5.0",
+            "os": "linux",
+            "arch": "amd64",
+        }
+
+    def test_windows_binary_and_dashed_name(self):
+        """Test .exe binaries and plugin names containing dashes."""
+        info = _parse_installed_binary_name("packer-plugin-ansible-navigator_v2.1.0-rc.1_x5.0_windows_arm64.exe")
+        assert info["name"] == "ansible-navigator"
+        assert info["version"] == "2.1.0-rc.1"
+        assert (info["os"], info["arch"]) == ("windows", "arm64")
+
+    def test_other_files_are_ignored(self):
+        """Test that checksums, manifests and bare binaries are not release binaries."""
+        assert _parse_installed_binary_name("packer-plugin-docker_v1.0.10_x5.0_linux_amd64_SHA256SUM") is None
+        assert _parse_installed_binary_name("build-manifest.json") is None
+        assert _parse_installed_binary_name("packer-plugin-docker") is None
+        assert _parse_installed_binary_name("packer-plugin-docker_v1.0.10_x5.0_linux_amd64.debug") is None
+
+
+class TestWriteReleaseArchive:
+    """Test streaming zip creation."""
+
+    def test_archive_contents_and_digests(self, tmp_path):
+        """Test that the archive holds the executable binary and both digests match."""
+        payload = b"\x7fELF" + bytes(range(256)) * 10000
+        binary = tmp_path / "packer-plugin-docker_v1.0.0_x5.0_linux_amd64"
+        binary.write_bytes(payload)
+        archive = tmp_path / "packer-plugin-docker_v1.0.0_x5.0_linux_amd64.zip"
+
+        binary_sha, archive_sha = _write_release_archive(str(binary), str(archive), binary.name)
+
+        assert binary_sha == hashlib.sha256(payload).hexdigest()
+        assert archive_sha == hashlib.sha256(archive.read_bytes()).hexdigest()
+        with zipfile.ZipFile(archive) as zf:
+            (info,) = zf.infolist()
+            assert info.filename == binary.name
+            assert (info.external_attr >> 16) & 0o777 == 0o755
+            assert zf.read(info) == payload
+
+    def test_identical_binaries_give_identical_archives(self, tmp_path):
+        """Test that archives are reproducible."""
+        binary = tmp_path / "bin"
+        binary.write_bytes(b"plugin" * 1000)
+        first = _write_release_archive(str(binary), str(tmp_path / "a.zip"), "plugin")
+        second = _write_release_archive(str(binary), str(tmp_path / "b.zip"), "plugin")
+        assert first == second
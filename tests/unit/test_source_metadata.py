@@ -0,0 +1,152 @@
+"""Tests for the single-pass source metadata probe and version report logic.
+
+The probe itself needs a Dagger engine, so these tests load the fixture
+plugins into the same path -> contents mapping the probe produces and
+exercise the real resolution logic from main.py against it (skipped when
+the dagger SDK is not installed).
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def _probe_fixture(main, name: str):
+    """Collect probed files from a fixture directory as _SourceMetadata (mirrors the probe's output)."""
+    root = FIXTURES / name
+    files: dict[str, str] = {}
+    for path in main._PROBE_ROOT_FILES + main._PROBE_VERSION_DIR_FILES:
+        candidate = root / path
+        if candidate.is_file():
+            files[path] = candidate.read_text()
+    entries = tuple(sorted(entry.name for entry in root.iterdir()))
+    return main._SourceMetadata(files=files, entries=entries)
+
+
+class TestProbeFixtures:
+    """Test the probe's view of the fixture plugins."""
+    
+    def test_version_file_plugin_files(self, main_module):
+        """Test that nested version files are picked up."""
+        metadata = _probe_fixture(main_module, "version-file-plugin")
+        assert set(metadata.files) == {"go.mod", "version/VERSION", "version/version.go"}
+    
+    def test_go_version_plugin_files(self, main_module):
+        """Test that .go-version is picked up at the root."""
+        metadata = _probe_fixture(main_module, "go-version-plugin")
+        assert set(metadata.files) == {"go.mod", ".go-version"}
+    
+    def test_image_lock_is_probed(self, main_module):
+        """Test that the image lockfile is read with the other root files."""
+        assert main_module.IMAGE_LOCK_FILE in main_module._PROBE_ROOT_FILES
+
+
+class TestVersionReport:
+    """Test version detection against probed metadata."""
+    
+    def test_embedded_version_file(self, main_module):
+        """Test detection of an embedded version/VERSION file."""
+        report = _probe_fixture(main_module, "version-file-plugin").version_report
+        assert report == {
+            "version_source": "file",
+            "version_file": "version/VERSION",
+            "current_version": "1.2.3",
+            "version_package": "github.com/example/packer-plugin-test/version",
+            "recommendation": "use_version_file",
+        }
+    
+    def test_no_version_information(self, main_module):
+        """Test that plugins without version files default to ldflags."""
+        report = _probe_fixture(main_module, "go-version-plugin").version_report
+        assert report["version_source"] == "ldflags"
+        assert report["version_file"] is None
+        assert report["current_version"] is None
+        assert report["recommendation"] is None
+    
+    def test_hardcoded_version(self, main_module):
+        """Test detection of a hardcoded version in version/version.go."""
+        metadata = main_module._SourceMetadata(files={
+            "go.mod": "module github.com/example/packer-plugin-hard\n",
+            "version/version.go": 'package version\n\nvar Version = "0.4.2"\n',
+        })
+        report = metadata.version_report
+        assert report["version_source"] == "hardcoded"
+        assert report["current_version"] == "0.4.2"
+        assert report["version_package"] == "github.com/example/packer-plugin-hard/version"
+    
+    def test_hardcoded_root_version_go(self, main_module):
+        """Test fallback to a root version.go when version/version.go is absent."""
+        metadata = main_module._SourceMetadata(files={"version.go": 'package main\n\nvar Version = "2.0.0"\n'})
+        report = metadata.version_report
+        assert report["version_source"] == "hardcoded"
+        assert report["current_version"] == "2.0.0"
+    
+    def test_root_version_file_takes_precedence_over_hardcoded(self, main_module):
+        """Test that a VERSION file wins over a hardcoded version."""
+        metadata = main_module._SourceMetadata(files={
+            "VERSION": "3.1.0\n",
+            "version.go": 'package main\n\nvar Version = "2.0.0"\n',
+        })
+        report = metadata.version_report
+        assert report["version_source"] == "file"
+        assert report["current_version"] == "3.1.0"
+        assert report["recommendation"] == "use_version_file"
+    
+    def test_empty_version_file_ignored(self, main_module):
+        """Test that an empty VERSION file is not used."""
+        report = main_module._SourceMetadata(files={"VERSION": "  \n"}).version_report
+        assert report["version_file"] is None
+        assert report["version_source"] == "ldflags"
+
+
+class TestGitSourceFromGoMod:
+    """Test git source detection from probed go.mod contents."""
+    
+    def test_module_detected(self, main_module):
+        """Test module path extraction from a fixture go.mod."""
+        metadata = _probe_fixture(main_module, "go-version-plugin")
+        module_path, error = main_module._detect_git_source_from_gomod(metadata)
+        assert module_path == "github.com/example/packer-plugin-goversion"
+        assert error is None
+    
+    def test_quoted_module_path(self, main_module):
+        """Test that go.mod is parsed by _parse_go_mod, which unquotes module paths."""
+        metadata = main_module._SourceMetadata(files={"go.mod": 'module "github.com/example/packer-plugin-quoted"\n'})
+        assert main_module._detect_git_source_from_gomod(metadata) == ("github.com/example/packer-plugin-quoted", None)
+    
+    def test_missing_gomod(self, main_module):
+        """Test error when go.mod was not found by the probe."""
+        module_path, error = main_module._detect_git_source_from_gomod(main_module._SourceMetadata())
+        assert module_path is None
+        assert error == "file not found"
+    
+    def test_gomod_without_module(self, main_module):
+        """Test error when go.mod has no module declaration."""
+        metadata = main_module._SourceMetadata(files={"go.mod": "go 1.21\n"})
+        module_path, error = main_module._detect_git_source_from_gomod(metadata)
+        assert module_path is None
+        assert error == "no module declaration found"
+
+
+class TestMetadataMemo:
+    """Test the LRU memo of probed metadata keyed by source digest."""
+    
+    def test_repeated_digest_is_memoized(self, main_module):
+        """Test that a memoized digest returns the same metadata."""
+        cache: OrderedDict = OrderedDict()
+        metadata = _probe_fixture(main_module, "version-file-plugin")
+        main_module._lru_put(cache, "sha256:aaa", metadata)
+        assert main_module._lru_get(cache, "sha256:aaa") is metadata
+        assert main_module._lru_get(cache, "sha256:bbb") is None
+    
+    def test_bounded_size_evicts_least_recently_used(self, main_module, monkeypatch):
+        """Test that the memo evicts the least recently used digest."""
+        monkeypatch.setattr(main_module, "METADATA_CACHE_SIZE", 2)
+        cache: OrderedDict = OrderedDict()
+        main_module._lru_put(cache, "sha256:a", 1)
+        main_module._lru_put(cache, "sha256:b", 2)
+        main_module._lru_get(cache, "sha256:a")  # a becomes most recently used
+        main_module._lru_put(cache, "sha256:c", 3)  # evicts b
+        assert list(cache) == ["sha256:a", "sha256:c"]
@@ -0,0 +1,75 @@
+"""Tests for Packer template discovery used by validate_templates."""
+
+import posixpath
+
+
+def _discover_templates(template_paths: list[str]) -> list[str]:
+    """Select the Packer templates to validate (mirrors main.py logic)."""
+    templates: set[str] = set()
+    for path in template_paths:
+        path = path.strip("/")
+        parent = posixpath.dirname(path)
+        if path.endswith(".pkr.json") or not parent:
+            templates.add(path)
+        else:
+            templates.add(parent)
+    return sorted(templates)
+
+
+class TestDiscoverTemplates:
+    """Test grouping template files into templates."""
+
+    def test_directory_is_one_template(self):
+        """Test that the HCL files of a directory form a single template."""
+        paths = ["basic/source.pkr.hcl", "basic/build.pkr.hcl", "basic/variables.pkr.hcl"]
+        assert _discover_templates(paths) == ["basic"]
+
+    def test_root_files_are_separate_templates(self):
+        """Test that each HCL file at the root is its own template."""
+        paths = ["docker.pkr.hcl", "null.pkr.hcl"]
+        assert _discover_templates(paths) == ["docker.pkr.hcl", "null.pkr.hcl"]
+
+    def test_json_templates(self):
+        """Test that JSON templates are always checked file by file."""
+        paths = ["legacy/a.pkr.json", "legacy/b.pkr.json", "legacy/c.pkr.hcl"]
+        assert _discover_templates(paths) == ["legacy", "legacy/a.pkr.json", "legacy/b.pkr.json"]
+
+    def test_nested_directories(self):
+        """Test that nested template directories are found and sorted."""
+        paths = ["z/build.pkr.hcl", "builders/docker/build.pkr.hcl", "/a.pkr.hcl"]
+        assert _discover_templates(paths) == ["a.pkr.hcl", "builders/docker", "z"]
+
+    def test_no_templates(self):
+        """Test that an empty directory has no templates."""
+        assert _discover_templates([]) == []
+
+
+class TestInstalledPluginFiles:
+    """Test finding installed plugin binaries for validate_templates."""
+
+    def test_flat_artifacts(self, main_module):
+        """Test build_artifacts output, with the manifest and debug binary skipped."""
+        paths = [
+            "packer-plugin-example_v1.0.0_x5.0_linux_amd64",
+            "packer-plugin-example_v1.0.0_x5.0_linux_amd64_SHA256SUM",
+            "debug/packer-plugin-example_v1.0.0_linux_amd64.debug",
+        ]
+        assert main_module._installed_plugin_files(paths) == [
+            "packer-plugin-example_v1.0.0_x5.0_linux_amd64",
+            "packer-plugin-example_v1.0.0_x5.0_linux_amd64_SHA256SUM",
+        ]
+
+    def test_dev_install_layout(self, main_module):
+        """Test that binaries nested under the install source path are found."""
+        paths = [
+            "github.com/user/example/packer-plugin-example_v0.0.0-dev_x5.0_linux_amd64_SHA256SUM",
+            "github.com/user/example/packer-plugin-example_v0.0.0-dev_x5.0_linux_amd64",
+        ]
+        assert main_module._installed_plugin_files(paths) == [
+            "github.com/user/example/packer-plugin-example_v0.0.0-dev_x5.0_linux_amd64",
+            "github.com/user/example/packer-plugin-example_v0.0.0-dev_x5.0_linux_amd64_SHA256SUM",
+        ]
+
+    def test_binary_without_checksum(self, main_module):
+        """Test that binaries without a checksum file are not installed."""
+        assert main_module._installed_plugin_files(["packer-plugin-example_v1.0.0_x5.0_linux_amd64"]) == []
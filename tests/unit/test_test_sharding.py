@@ -0,0 +1,152 @@
+"""Tests for go test sharding and merging of go test -json output."""
+
+import json
+from typing import Optional
+
+
+def _package_durations(content: Optional[str]) -> dict[str, float]:
+    """Read per-package durations from go test -json output (mirrors main.py logic)."""
+    durations: dict[str, float] = {}
+    for line in (content or "").splitlines():
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(event, dict) or event.get("Test") or not event.get("Package"):
+            continue
+        if event.get("Action") in ("pass", "fail") and isinstance(event.get("Elapsed"), (int, float)):
+            durations[event["Package"]] = float(event["Elapsed"])
+    return durations
+
+
+def _shard_packages(packages: list[str], durations: dict[str, float], shards: int) -> list[list[str]]:
+    """Split test packages across shards (mirrors main.py logic)."""
+    known = [durations[p] for p in packages if p in durations]
+    default = sum(known) / len(known) if known else 1.0
+    bins: list[tuple[float, list[str]]] = [(0.0, []) for _ in range(min(shards, len(packages)))]
+    for package in sorted(packages, key=lambda p: (-durations.get(p, default), p)):
+        index = min(range(len(bins)), key=lambda i: (bins[i][0], i))
+        total, assigned = bins[index]
+        bins[index] = (total + durations.get(package, default), assigned + [package])
+    return [sorted(assigned) for _, assigned in bins]
+
+
+def _merge_test_events(outputs: list[str]) -> tuple[list[str], dict[str, dict]]:
+    """Merge the go test -json output of several shards (mirrors main.py logic)."""
+    lines: list[str] = []
+    results: dict[str, dict] = {}
+    for output in outputs:
+        for line in output.splitlines():
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            lines.append(line)
+            if event.get("Package") and not event.get("Test") and event.get("Action") in ("pass", "fail", "skip"):
+                results[event["Package"]] = {
+                    "status": event["Action"],
+                    "elapsed": event.get("Elapsed", 0.0),
+                }
+    return lines, results
+
+
+def _events(*events: dict) -> str:
+    return "".join(json.dumps(event) + "\n" for event in events)
+
+
+MODULE = "github.com/user/packer-plugin-docker"
+
+
+class TestPackageDurations:
+    """Test reading historical durations from previous output."""
+
+    def test_package_level_events_only(self):
+        """Test that only package pass/fail events carry durations."""
+        content = _events(
+            {"Action": "run", "Package": f"{MODULE}/builder", "Test": "TestBuilder"},
+            {"Action": "pass", "Package": f"{MODULE}/builder", "Test": "TestBuilder", "Elapsed": 0.4},
+            {"Action": "pass", "Package": f"{MODULE}/builder", "Elapsed": 12.5},
+            {"Action": "fail", "Package": f"{MODULE}/provisioner", "Elapsed": 3},
+            {"Action": "skip", "Package": f"{MODULE}/version", "Elapsed": 0},
+        )
+        assert _package_durations(content) == {
+            f"{MODULE}/builder": 12.5,
+            f"{MODULE}/provisioner": 3.0,
+        }
+
+    def test_missing_or_malformed(self):
+        """Test that missing output and non-JSON lines are ignored."""
+        assert _package_durations(None) == {}
+        assert _package_durations("# github.com/x\nbuild failed\n[1, 2]\n") == {}
+
+
+class TestShardPackages:
+    """Test duration-balanced shard assignment."""
+
+    def test_balances_by_duration(self):
+        """Test that the longest packages are spread across shards first."""
+        durations = {"a": 10.0, "b": 6.0, "c": 5.0, "d": 4.0, "e": 1.0}
+        shards = _shard_packages(list(durations), durations, 2)
+        totals = sorted(sum(durations[p] for p in shard) for shard in shards)
+        assert totals == [12.0, 14.0]
+        assert sorted(p for shard in shards for p in shard) == sorted(durations)
+
+    def test_unknown_packages_use_mean_duration(self):
+        """Test that new packages are weighted with the mean known duration."""
+        durations = {"slow": 9.0, "fast": 1.0}
+        shards = _shard_packages(["slow", "fast", "new"], durations, 2)
+        assert shards == [["slow"], ["fast", "new"]]
+
+    def test_without_history(self):
+        """Test round-robin-like assignment without previous timings."""
+        shards = _shard_packages(["d", "c", "b", "a"], {}, 2)
+        assert shards == [["a", "c"], ["b", "d"]]
+
+    def test_more_shards_than_packages(self):
+        """Test that no empty shards are created."""
+        assert _shard_packages(["a", "b"], {}, 8) == [["a"], ["b"]]
+
+    def test_deterministic(self):
+        """Test that the assignment does not depend on the input order."""
+        durations = {"a": 2.0, "b": 2.0, "c": 2.0}
+        assert _shard_packages(["c", "a", "b"], durations, 2) == _shard_packages(["a", "b", "c"], durations, 2)
+
+
+class TestMergeTestEvents:
+    """Test merging shard outputs into one go test -json stream."""
+
+    def test_merges_shards_in_order(self):
+        """Test that every JSON event is kept and package results are collected."""
+        first = _events(
+            {"Action": "start", "Package": f"{MODULE}/builder"},
+            {"Action": "pass", "Package": f"{MODULE}/builder", "Elapsed": 2.0},
+        )
+        second = _events(
+            {"Action": "output", "Package": f"{MODULE}/provisioner", "Test": "TestRun", "Output": "--- FAIL\n"},
+            {"Action": "fail", "Package": f"{MODULE}/provisioner", "Test": "TestRun", "Elapsed": 0.1},
+            {"Action": "fail", "Package": f"{MODULE}/provisioner", "Elapsed": 0.5},
+            {"Action": "skip", "Package": f"{MODULE}/version"},
+        )
+        lines, results = _merge_test_events([first, second])
+        assert lines == first.splitlines() + second.splitlines()
+        assert results == {
+            f"{MODULE}/builder": {"status": "pass", "elapsed": 2.0},
+            f"{MODULE}/provisioner": {"status": "fail", "elapsed": 0.5},
+            f"{MODULE}/version": {"status": "skip", "elapsed": 0.0},
+        }
+
+    def test_drops_non_json_lines(self):
+        """Test that plain build output does not corrupt the merged stream."""
+        output = "# github.com/x/builder\nbuilder.go:3: undefined: foo\n" + _events(
+            {"Action": "pass", "Package": "github.com/x/version", "Elapsed": 0.1},
+        )
+        lines, results = _merge_test_events([output])
+        assert len(lines) == 1
+        assert list(results) == ["github.com/x/version"]
+
+    def test_merged_output_feeds_next_run(self):
+        """Test that merged output can be used as the next run's timings."""
+        lines, _ = _merge_test_events([_events({"Action": "pass", "Package": "p", "Elapsed": 4.0})])
+        assert _package_durations("\n".join(lines)) == {"p": 4.0}
@@ -0,0 +1,200 @@
+"""Tests for span recording and the OTLP/JSON trace encoding."""
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import time
+from typing import Optional
+
+
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("_current_span", default=None)
+
+
+class _Tracer:
+    """Span recorder (mirrors main.py logic, without container stages)."""
+    
+    def __init__(self, enabled: bool = False, service: str = "dagger-packer-plugin") -> None:
+        self.enabled = enabled
+        self.service = service
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[dict] = []
+    
+    def start(self, name: str, **attributes) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        span = {
+            "name": name,
+            "span_id": os.urandom(8).hex(),
+            "parent_id": _current_span.get(),
+            "start": time.time_ns(),
+            "end": None,
+            "attributes": dict(attributes),
+            "error": None,
+        }
+        self.spans.append(span)
+        return span
+    
+    def end(self, span: Optional[dict], error: Optional[str] = None, **attributes) -> None:
+        if span is None:
+            return
+        span["end"] = time.time_ns()
+        span["attributes"].update(attributes)
+        span["error"] = error
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start(name, **attributes)
+        token = _current_span.set(span["span_id"]) if span else None
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, error=str(e) or type(e).__name__)
+            raise
+        else:
+            self.end(span)
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+    
+    def to_otlp(self) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service})},
+                "scopeSpans": [{
+                    "scope": {"name": self.service},
+                    "spans": [_otlp_span(self.trace_id, span) for span in self.spans if span["end"]],
+                }],
+            }],
+        }
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    """Encode attributes as OTLP/JSON key-value pairs (mirrors main.py logic)."""
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+def _otlp_span(trace_id: str, span: dict) -> dict:
+    """Encode a recorded span (mirrors main.py logic)."""
+    encoded = {
+        "traceId": trace_id,
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": 1,
+        "startTimeUnixNano": str(span["start"]),
+        "endTimeUnixNano": str(span["end"]),
+        "attributes": _otlp_attributes(span["attributes"]),
+        "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+    }
+    if span["parent_id"]:
+        encoded["parentSpanId"] = span["parent_id"]
+    return encoded
+
+
+def _spans_by_name(tracer: _Tracer) -> dict[str, dict]:
+    return {span["name"]: span for span in tracer.spans}
+
+
+class TestOtlpEncoding:
+    """Test the OTLP/JSON encoding of spans and attributes."""
+    
+    def test_attribute_types(self):
+        """Test that attribute values use the matching OTLP value type."""
+        encoded = _otlp_attributes({"cache.hit": True, "rounds": 3, "ratio": 0.5, "goos": "linux"})
+        assert encoded == [
+            {"key": "cache.hit", "value": {"boolValue": True}},
+            {"key": "rounds", "value": {"intValue": "3"}},
+            {"key": "ratio", "value": {"doubleValue": 0.5}},
+            {"key": "goos", "value": {"stringValue": "linux"}},
+        ]
+    
+    def test_document_structure(self):
+        """Test the resourceSpans/scopeSpans envelope and span fields."""
+        tracer = _Tracer(enabled=True)
+        with tracer.span("build_artifacts", goos="linux"):
+            pass
+        document = tracer.to_otlp()
+        resource = document["resourceSpans"][0]
+        assert resource["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "dagger-packer-plugin"}}
+        ]
+        span = resource["scopeSpans"][0]["spans"][0]
+        assert span["traceId"] == tracer.trace_id
+        assert len(span["traceId"]) == 32
+        assert len(span["spanId"]) == 16
+        assert span["name"] == "build_artifacts"
+        assert span["status"] == {"code": 1}
+        assert "parentSpanId" not in span
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    
+    def test_unfinished_spans_are_not_exported(self):
+        """Test that spans left open by early returns are dropped."""
+        tracer = _Tracer(enabled=True)
+        tracer.start("resolve")
+        assert tracer.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"] == []
+
+
+class TestSpanRecording:
+    """Test span nesting, errors and the disabled tracer."""
+    
+    def test_nested_spans_record_parent(self):
+        """Test that spans opened inside a span are its children."""
+        tracer = _Tracer(enabled=True)
+        with tracer.span("build_binary"):
+            stage = tracer.start("go.link")
+            tracer.end(stage, **{"cache.hit": False})
+        spans = _spans_by_name(tracer)
+        assert spans["go.link"]["parent_id"] == spans["build_binary"]["span_id"]
+        assert spans["go.link"]["attributes"] == {"cache.hit": False}
+        assert _current_span.get() is None
+    
+    def test_concurrent_targets_share_root_parent(self):
+        """Test that spans in gathered tasks are parented to the enclosing span."""
+        tracer = _Tracer(enabled=True)
+
+        async def build_target(goarch: str) -> None:
+            with tracer.span("build_target", goarch=goarch):
+                await asyncio.sleep(0)
+                tracer.end(tracer.start("go.link"))
+
+        async def matrix() -> None:
+            with tracer.span("build_matrix"):
+                await asyncio.gather(build_target("amd64"), build_target("arm64"))
+
+        asyncio.run(matrix())
+        root = _spans_by_name(tracer)["build_matrix"]
+        targets = [span for span in tracer.spans if span["name"] == "build_target"]
+        links = [span for span in tracer.spans if span["name"] == "go.link"]
+        assert {span["parent_id"] for span in targets} == {root["span_id"]}
+        assert {span["parent_id"] for span in links} == {span["span_id"] for span in targets}
+    
+    def test_error_status(self):
+        """Test that a failing span records the error and re-raises."""
+        tracer = _Tracer(enabled=True)
+        try:
+            with tracer.span("packer.plugins.install"):
+                raise RuntimeError("exit code: 1")
+        except RuntimeError:
+            pass
+        span = tracer.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["status"] == {"code": 2, "message": "exit code: 1"}
+    
+    def test_disabled_tracer_records_nothing(self):
+        """Test that a disabled tracer is a no-op."""
+        tracer = _Tracer()
+        with tracer.span("build_binary") as span:
+            assert span is None
+            tracer.end(tracer.start("go.link"))
+        assert tracer.spans == []
+        assert _current_span.get() is None
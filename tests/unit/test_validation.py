@@ -0,0 +1,129 @@
+"""Tests for up-front input validation and PluginValidationError.
+
+Exercises the validation functions of main.py (skipped when the dagger SDK
+is not installed).
+"""
+
+
+class TestValidateSemver:
+    """Test version validation including -dev prereleases."""
+
+    def test_dev_prerelease_accepted(self, main_module):
+        """Test that -dev versions are valid build versions."""
+        assert main_module._validate_semver("1.2.0-dev") == (True, "")
+        assert main_module._validate_semver("1.2.0-dev.3") == (True, "")
+
+    def test_is_dev_version(self, main_module):
+        """Test that only -dev prereleases are flagged for the packer install gate."""
+        assert main_module._is_dev_version("1.2.0-dev")
+        assert main_module._is_dev_version("1.2.0-dev.3+build.1")
+        assert not main_module._is_dev_version("1.2.0")
+        assert not main_module._is_dev_version("1.2.0-beta.1")
+        assert not main_module._is_dev_version("1.2.0-devel")
+        assert not main_module._is_dev_version("1.2.0+dev")
+
+
+class TestValidateBuildInputs:
+    """Test the up-front checks of user-provided inputs."""
+
+    def test_valid_inputs(self, main_module):
+        """Test that typical inputs have no problems."""
+        assert main_module._validate_build_inputs(
+            version="1.0.0",
+            git_source="github.com/SolomonHD/packer-plugin-docker",
+            plugin_name="docker",
+            platforms=[("linux", "amd64"), ("windows", "arm64")],
+            profile="release",
+            install_mode="native",
+        ) == []
+
+    def test_unset_inputs_are_not_checked(self, main_module):
+        """Test that omitted inputs produce no problems."""
+        assert main_module._validate_build_inputs() == []
+
+    def test_git_source_with_scheme(self, main_module):
+        """Test that URLs and SSH remotes are rejected as git sources."""
+        for git_source in ("https://github.com/org/packer-plugin-x", "git@github.com:org/packer-plugin-x"):
+            problems = main_module._validate_build_inputs(git_source=git_source)
+            assert len(problems) == 1
+            assert "without a scheme" in problems[0]
+
+    def test_git_source_import_paths(self, main_module):
+        """Test import paths with hosts, ports and trailing slashes."""
+        assert main_module._validate_build_inputs(git_source="git.example.com:8443/team/packer-plugin-x/") == []
+        assert main_module._validate_build_inputs(git_source="github.com/org//packer-plugin-x") != []
+        assert main_module._validate_build_inputs(git_source="github.com/org/packer plugin") != []
+
+    def test_plugin_name(self, main_module):
+        """Test that plugin names must be usable in a binary name."""
+        assert main_module._validate_build_inputs(plugin_name="My-Plugin") == []
+        assert main_module._validate_build_inputs(plugin_name="-docker") != []
+        assert main_module._validate_build_inputs(plugin_name="my/plugin") != []
+
+    def test_unknown_platforms(self, main_module):
+        """Test that unknown GOOS and GOARCH values are reported."""
+        problems = main_module._validate_build_inputs(platforms=[("linx", "amd64"), ("linux", "x86_64")])
+        assert len(problems) == 2
+        assert problems[0].startswith("Unknown target OS 'linx'")
+        assert problems[1].startswith("Unknown target architecture 'x86_64'")
+
+    def test_collects_every_problem(self, main_module):
+        """Test that all problems are reported together."""
+        problems = main_module._validate_build_inputs(
+            version="v1.0.0",
+            git_source="https://github.com/org/x",
+            platforms=[("linux", "sparc")],
+            profile="fast",
+            install_mode="copy",
+        )
+        assert len(problems) == 5
+
+
+class TestResolvePluginVersion:
+    """Test version resolution from --version and the VERSION file."""
+
+    def test_explicit_version_wins(self, main_module):
+        """Test that an explicit version is used even with a VERSION file."""
+        metadata = main_module._SourceMetadata(files={"VERSION": "2.0.0\n"})
+        assert main_module._resolve_plugin_version(metadata, "1.0.0", True) == ("1.0.0", [])
+
+    def test_missing_version(self, main_module):
+        """Test that a version is required without --use-version-file."""
+        metadata = main_module._SourceMetadata()
+        assert main_module._resolve_plugin_version(metadata, None, False)[1] == [
+            "version is required. Provide --version or use --use-version-file"
+        ]
+        assert main_module._resolve_plugin_version(metadata, None, True)[1] == [
+            "use_version_file is true but no VERSION file found"
+        ]
+
+    def test_invalid_file_version_names_the_file(self, main_module):
+        """Test that an invalid VERSION file is reported with its path."""
+        metadata = main_module._SourceMetadata(files={"VERSION": "v1.0.0\n"})
+        version, problems = main_module._resolve_plugin_version(metadata, None, True)
+        assert version is None
+        assert problems[0].startswith("VERSION: Version 'v1.0.0' should not have 'v' prefix")
+
+    def test_dev_version_file(self, main_module):
+        """Test that a -dev VERSION file is accepted."""
+        metadata = main_module._SourceMetadata(files={"version/VERSION": "1.3.0-dev\n"})
+        assert main_module._resolve_plugin_version(metadata, None, True) == ("1.3.0-dev", [])
+
+    def test_dev_version_inputs(self, main_module):
+        """Test that -dev versions pass while the other inputs are still checked."""
+        assert main_module._validate_build_inputs(version="0.0.0-dev") == []
+        problems = main_module._validate_build_inputs(version="v0.0.0-dev", plugin_name="bad/name")
+        assert len(problems) == 2
+
+
+class TestPluginValidationError:
+    """Test the error raised for invalid inputs."""
+
+    def test_message_lists_every_problem(self, main_module):
+        """Test that the message has one error line per problem."""
+        error = main_module.PluginValidationError(["profile must be one of: default, dev, release", "concurrency must be at least 1"])
+        assert str(error) == (
+            "✗ Error: profile must be one of: default, dev, release\n"
+            "✗ Error: concurrency must be at least 1"
+        )
+        assert error.problems == ["profile must be one of: default, dev, release", "concurrency must be at least 1"]